@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import experiment_rotation_invariance
+import lod_expert_optimizer
+from experiment_culling_sim import CullingSim
+from lod_expert_implementation import LODConfig, LODCore
+from lod_expert_selector import TileLODSelector, make_tile_grid
+
+# ==============================================================================
+# BENCHMARK SUITE
+# Times every LOD / culling module over fixed workloads, records wall time,
+# peak memory and ops/s into a JSON baseline and fails on regressions.
+# ==============================================================================
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 0.25 # Fail if median wall time grows by more than 25%
+CULLING_TILE_SIZES = [512, 1024, 2048]
+
+
+def _quiet(fn):
+    # Runs fn with stdout discarded (the experiments print their reports)
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+def _tiles_tested(sim, tile_size):
+    # Same grid as run_benchmark / run_benchmark_batch for this sim's VISIBILITY
+    return sim.tile_grid(tile_size)[0].size
+
+
+def build_workloads():
+    """
+    Returns {name: (callable, ops_per_call, ops_unit)}.
+    Setup cost is paid here, outside the timed callables.
+    """
+    sim = CullingSim()
+    workloads = {}
+    for ts in CULLING_TILE_SIZES:
+        workloads[f'culling.run_benchmark[{ts}]'] = (
+            _quiet(lambda ts=ts: sim.run_benchmark(ts)), _tiles_tested(sim, ts), 'tiles')
+        workloads[f'culling.run_benchmark_batch[{ts}]'] = (
+            _quiet(lambda ts=ts: sim.run_benchmark_batch(ts)), _tiles_tested(sim, ts), 'tiles')
+    workloads['culling.run_quadtree[4096->512]'] = (
+        _quiet(lambda: sim.run_quadtree(512, 4096, 2000.0)), 1, 'frames')
+
+    workloads['optimizer.calculate_lod_strategy'] = (
+        _quiet(lod_expert_optimizer.calculate_lod_strategy), 1, 'calls')
+
+    config = _quiet(LODConfig)()
+    workloads['lod.get_lod_table'] = (_quiet(config.get_lod_table), 1, 'calls')
+    core = LODCore()
+    workloads['lod.core_lod_table_x1000'] = (
+        lambda: [core.lod_table() for _ in range(1000)], 1000, 'calls')
+
+    def rotation():
+        random.seed(0) # Turbulence samples -> deterministic workload
+        experiment_rotation_invariance.run_simulation()
+    workloads['rotation.run_simulation'] = (_quiet(rotation), 1, 'calls')
+
+    bounds = make_tile_grid(256)
+    selector = TileLODSelector(bounds, config=core)
+    selector.update((0.0, 0.0, 100.0))
+    workloads[f'selector.update[{len(bounds)}]'] = (
+        lambda: selector.update((0.0, 500.0, 100.0)), len(bounds), 'tiles')
+    return workloads
+
+
+def measure(fn, ops, repeats=5, min_time=0.05):
+    """
+    Median wall time per call (each sample loops until min_time has passed),
+    then one extra call under tracemalloc for peak Python/NumPy allocations.
+    """
+    fn() # Warm-up
+    samples = []
+    for _ in range(repeats):
+        n = 0
+        t0 = time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time:
+                break
+        samples.append(elapsed / n)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall = statistics.median(samples)
+    return {
+        "wall_s": wall,
+        "wall_min_s": min(samples),
+        "peak_bytes": peak,
+        "ops_per_s": ops / wall,
+    }
+
+
+def run_suite(only=None, repeats=5):
+    results = {}
+    for name, (fn, ops, unit) in build_workloads().items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        r = measure(fn, ops, repeats)
+        r["ops_unit"] = unit
+        results[name] = r
+        print(f"{name:<38} | {r['wall_s'] * 1000.0:>10.3f} ms | {r['peak_bytes'] / 1024:>9.1f} KiB | "
+              f"{r['ops_per_s']:>14,.0f} {unit}/s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a list of (name, ratio) for workloads whose median wall time grew
+    past (1 + threshold) x the baseline. Missing baseline entries are skipped.
+    """
+    regressions = []
+    print(f"\n--- COMPARISON (threshold +{threshold * 100:.0f}%) ---")
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<38} | (no baseline)")
+            continue
+        ratio = r["wall_s"] / base["wall_s"]
+        status = "REGRESSION" if ratio > 1.0 + threshold else "ok"
+        print(f"{name:<38} | {ratio:>6.2f}x | {status}")
+        if status != "ok":
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOD / culling benchmark suite with regression baselines.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument('--save-baseline', action='store_true', help="Write this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative wall-time growth before failing (0.25 = +25%%)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-k', '--only', action='append', help="Only run workloads containing this substring")
+    args = parser.parse_args(argv)
+
+    print("--- BENCHMARK SUITE ---")
+    results = run_suite(args.only, args.repeats)
+    record = {
+        "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(record, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline first)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} regression(s)")
+        return 1
+    print("\nPASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
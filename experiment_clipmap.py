@@ -0,0 +1,190 @@
+import argparse
+import math
+
+import numpy as np
+
+from experiment_flight_replay import read_trajectory_csv, synthetic_trajectory
+from experiment_streaming import BYTES_PER_SAMPLE, LOD0_SPACING, run_streaming
+from lod_expert_implementation import LODCore
+
+# ==============================================================================
+# EXPERIMENT E: GEOMETRY CLIPMAP UPDATE COST
+# Nested camera-centred rings of heightmap posts (Reports/Flight Sim Tiling and
+# Rendering Strategy.md, 4.1). Ring sizes come from the LODCore switch
+# distances; as the camera moves each level is re-centred on its snap grid and
+# only the newly exposed rows / columns (toroidal wrap-around) are uploaded.
+# Counts bytes per frame per level to compare with tile streaming
+# (experiment_streaming) at Mach 1.
+# ==============================================================================
+
+MACH_1 = 340.0 # m/s
+
+
+def ring_posts(half_extent, spacing):
+    # Smallest 2^k - 1 posts per side whose half width covers half_extent
+    n = 2 * math.ceil(half_extent / spacing) + 1
+    return (1 << max(n.bit_length(), 2)) - 1 if n & (n + 1) else n
+
+
+class ClipmapLayout:
+    """
+    Level l: post spacing LOD0_SPACING * 2^l, ring of n_l x n_l posts sized
+    so its half width reaches the distance where level l hands over to
+    l + 1 (LODCore.calculate_switch_distance of its geometric error; errors
+    keep doubling past the LOD table). Levels are added until the coarsest
+    ring covers `visibility`.
+    A level is only needed while the camera altitude is below its switch
+    distance (nothing closer than the altitude can need that detail).
+    """
+
+    def __init__(self, config=None, visibility=20000.0, lod0_spacing=LOD0_SPACING, bytes_per_sample=BYTES_PER_SAMPLE):
+        config = config or LODCore()
+        self.bytes_per_sample = bytes_per_sample
+        self.spacing = []
+        self.switch_dist = []
+        self.posts = []
+        level = 0
+        while True:
+            err = config.ERRORS[level] if level < len(config.ERRORS) else config.ERRORS[-1] * 2.0 ** (level - len(config.ERRORS) + 1)
+            spacing = lod0_spacing * 2.0 ** level
+            reach = min(config.calculate_switch_distance(err), visibility)
+            self.spacing.append(spacing)
+            self.switch_dist.append(reach)
+            self.posts.append(ring_posts(reach, spacing))
+            if reach >= visibility:
+                break
+            level += 1
+        self.spacing = np.asarray(self.spacing)
+        self.switch_dist = np.asarray(self.switch_dist)
+        self.posts = np.asarray(self.posts, dtype=np.int64)
+        self.n_levels = self.posts.size
+
+    def ring_bytes(self):
+        return self.posts * self.posts * self.bytes_per_sample
+
+    def exposed_posts(self, x, y, z):
+        """
+        Posts uploaded per frame and level, shape (frames, levels), for camera
+        positions x, y, altitudes z (arrays over frames).
+        Each level is centred on the camera snapped to twice its spacing (the
+        next level's grid, so rings stay nested); a move of (dx, dy) posts
+        exposes |dx| columns and |dy| rows of the torus, or the whole ring
+        when it moves by n or more. A level (re)activated by descending is
+        filled completely; the first frame fills every active level.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        snap = 2.0 * self.spacing[None, :]
+        cx = np.floor(x[:, None] / snap)
+        cy = np.floor(y[:, None] / snap)
+        n = self.posts[None, :]
+
+        ax = np.abs(np.diff(cx, axis=0)).astype(np.int64) * 2
+        ay = np.abs(np.diff(cy, axis=0)).astype(np.int64) * 2
+        ax = np.minimum(ax, n)
+        ay = np.minimum(ay, n)
+        moved = ax * n + ay * (n - ax)
+
+        active = z[:, None] < self.switch_dist[None, :]
+        active[:, -1] = True # The coarsest ring always draws the far field
+        fresh = active.copy()
+        fresh[1:] &= ~active[:-1]
+        posts = np.zeros(active.shape, dtype=np.int64)
+        posts[1:] = np.where(active[1:], moved, 0)
+        posts[fresh] = np.broadcast_to(n * n, active.shape)[fresh]
+        return posts, active
+
+
+def run_clipmap(trajectory, config=None, visibility=20000.0, label=None, verbose=True):
+    """
+    Replays a trajectory through a ClipmapLayout and prints/returns bytes
+    updated per frame, per-level update frequency and peak bandwidth
+    (single frame and 1 s window). The first frame (cold fill) is reported
+    separately and not scored.
+    """
+    frames = list(trajectory)
+    layout = ClipmapLayout(config, visibility)
+    t = np.array([f.t for f in frames])
+    posts, active = layout.exposed_posts([f.x for f in frames], [f.y for f in frames], [f.z for f in frames])
+    nbytes = posts * layout.bytes_per_sample
+
+    dt = float(np.median(np.diff(t))) if t.size > 1 else 1.0
+    duration = max(t[-1] - t[0], dt)
+    per_frame = nbytes[1:].sum(axis=1)
+    window = max(int(round(1.0 / dt)), 1)
+    per_second = np.convolve(per_frame, np.ones(window), mode='valid') if per_frame.size >= window else per_frame
+    updates = np.count_nonzero(posts[1:], axis=0)
+
+    result = {
+        "frames": len(frames),
+        "levels": layout.n_levels,
+        "resident_bytes": int(layout.ring_bytes()[active[-1]].sum()),
+        "cold_fill_bytes": int(nbytes[0].sum()),
+        "bytes_per_frame_mean": float(per_frame.mean()) if per_frame.size else 0.0,
+        "mb_per_s": float(per_frame.sum()) / duration / 1e6,
+        "peak_frame_mb_per_s": float(per_frame.max()) / dt / 1e6 if per_frame.size else 0.0,
+        "peak_1s_mb_per_s": float(per_second.max()) / (window * dt) / 1e6 if per_frame.size else 0.0,
+        "updates_per_s": updates / duration,
+        "level_mb_per_s": nbytes[1:].sum(axis=0) / duration / 1e6,
+    }
+    if verbose:
+        print(f"\n--- GEOMETRY CLIPMAP: {label or 'trajectory'} ({layout.n_levels} levels, {visibility / 1000.0:.0f} km) ---")
+        print(f"{'Level':<6} | {'Spacing(m)':<10} | {'Ring':<6} | {'Reach(km)':<9} | {'Updates/s':<9} | "
+              f"{'Posts/Update':<12} | {'MB/s':<8}")
+        print("-" * 80)
+        for level in range(layout.n_levels):
+            per_update = posts[1:, level].sum() / max(updates[level], 1)
+            print(f"{level:<6} | {layout.spacing[level]:<10.0f} | {layout.posts[level]:<6} | "
+                  f"{layout.switch_dist[level] / 1000.0:<9.2f} | {result['updates_per_s'][level]:<9.1f} | "
+                  f"{per_update:<12.0f} | {result['level_mb_per_s'][level]:<8.3f}")
+        print(f"Resident: {result['resident_bytes'] / 1e6:.1f} MB | Cold Fill: {result['cold_fill_bytes'] / 1e6:.1f} MB")
+        print(f"Updated: {result['bytes_per_frame_mean'] / 1e3:.1f} KB/frame | {result['mb_per_s']:.2f} MB/s mean | "
+              f"peak {result['peak_frame_mb_per_s']:.2f} MB/s (1 frame) / {result['peak_1s_mb_per_s']:.2f} MB/s (1 s)")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Geometry clipmap toroidal update cost vs tile streaming.")
+    parser.add_argument('trajectory', nargs='?', help="Recorded trajectory CSV (default: synthetic flights)")
+    parser.add_argument('--speeds', type=float, nargs='+', default=[100.0, 250.0, MACH_1, 2 * MACH_1],
+                        help="Synthetic ground speeds (m/s)")
+    parser.add_argument('--altitude', type=float, default=100.0)
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--dt', type=float, default=1.0 / 60.0)
+    parser.add_argument('--no-streaming', action='store_true', help="Skip the Mach 1 tile streaming comparison")
+    args = parser.parse_args(argv)
+
+    if args.trajectory:
+        run_clipmap(read_trajectory_csv(args.trajectory), label=args.trajectory)
+        return
+
+    summary = []
+    for speed in args.speeds:
+        traj = synthetic_trajectory(duration_s=args.duration, dt=args.dt, speed=speed, altitude=args.altitude,
+                                    turn_rate_deg_s=1.0)
+        summary.append((speed, run_clipmap(traj, label=f"{speed:.0f} m/s, {args.altitude:.0f} m AGL")))
+
+    print(f"\n--- CLIPMAP UPDATE BANDWIDTH vs SPEED ({args.altitude:.0f} m AGL) ---")
+    print(f"{'Speed(m/s)':<10} | {'Mean MB/s':<9} | {'Peak 1s MB/s':<12} | {'Peak Frame MB/s':<15}")
+    print("-" * 55)
+    for speed, r in summary:
+        print(f"{speed:<10.0f} | {r['mb_per_s']:<9.2f} | {r['peak_1s_mb_per_s']:<12.2f} | {r['peak_frame_mb_per_s']:<15.2f}")
+
+    if not args.no_streaming:
+        # Tile streaming at Mach 1 over the same kind of flight (512m tiles, 2s lookahead)
+        traj = synthetic_trajectory(duration_s=args.duration, dt=0.1, speed=MACH_1, altitude=args.altitude,
+                                    turn_rate_deg_s=1.0)
+        streaming = run_streaming(traj, 512, 2.0, label="tile streaming at Mach 1, 2s lookahead")
+        clipmap = dict(summary).get(MACH_1)
+        if clipmap is None:
+            traj = synthetic_trajectory(duration_s=args.duration, dt=args.dt, speed=MACH_1, altitude=args.altitude,
+                                        turn_rate_deg_s=1.0)
+            clipmap = run_clipmap(traj, verbose=False)
+        # Like for like: both means exclude the cold fill / warm-up
+        print(f"\nMach 1 mean upload: clipmap {clipmap['mb_per_s']:.2f} MB/s vs tile streaming "
+              f"{streaming['mb_per_s']:.2f} MB/s (clipmap 1 s peak {clipmap['peak_1s_mb_per_s']:.2f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,151 @@
+import collections
 import math
+import time
+
+import numpy as np
+
+import instrumentation
+from instrumentation import CULL_ANGLE, CULL_DISTANCE, CULL_HORIZON, CULL_VISIBLE
+from lod_expert_implementation import LODCore
 
 # ==============================================================================
 # EXPERIMENT B: CULLING EFFICIENCY SIMULATOR
 # Comparing 512m vs 1024m Tile Granularity
 # ==============================================================================
 
+# Draws below this triangle count starve the GPU front end
+# (Reports/Flight Sim Tiling and Rendering Strategy.md: 500-1,000 triangle floor)
+TRI_FLOOR_LOW = 500
+TRI_FLOOR_HIGH = 1000
+
+# Vectorized angle tests whose margin to the wedge edge is below this (degrees)
+# are re-run through the scalar path. NumPy's SIMD atan/atan2 can differ from
+# libm by 1 ulp (~1e-14 deg), so this band only ever catches a handful of tiles.
+ANGLE_TIE_EPS_DEG = 1e-9
+
+# Tile center to nearest corner, as a fraction of the tile size
+HALF_DIAGONAL = math.sqrt(0.5)
+
+# Azimuth buckets across the FOV for the terrain horizon line
+OCCLUSION_BUCKETS = 256
+
+# Default terrain top for horizon culling (m above the datum): the highest
+# summit on Earth, so the cull stays conservative until a real maximum (DEM /
+# pyramid heights.max()) is passed as max_terrain_h
+DEFAULT_MAX_TERRAIN_H = 8848.0
+
+# One view for multi-view culling (main camera, shadow cascade, mirror, sensor).
+# near/far: distance band (m) the view needs tiles from (a cascade split).
+# tile_size: draw granularity; a multiple of the shared base tile size, or None
+# for the base size itself.
+CullView = collections.namedtuple('CullView', 'name cam_pos cam_dir fov_deg near far tile_size',
+                                  defaults=(0.0, 20000.0, None))
+
+
+def synthetic_terrain_height(x, y, relief=1200.0, valley_width=6000.0, seed=0):
+    """
+    Mountainous test terrain (m): random ridge waves plus a valley along the
+    y axis (x = 0), so a North-looking camera at the origin looks up the valley.
+    Returns (heights, slope_bound) where slope_bound bounds |grad h| (for
+    conservative per-tile bounds from a finite sample grid).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # Valley walls: 0 on the floor, relief / 2 on the shoulders
+    h = (relief / 4.0) * (1.0 - np.cos(2.0 * np.pi * x / valley_width))
+    slope = (relief / 4.0) * 2.0 * np.pi / valley_width
+    for _ in range(12):
+        wavelength = rng.uniform(1500.0, 12000.0)
+        amplitude = relief * wavelength / 24000.0
+        phase = rng.uniform(0, 2 * np.pi)
+        angle = rng.uniform(0, np.pi)
+        proj = x * np.cos(angle) + y * np.sin(angle)
+        h = h + amplitude * np.abs(np.sin(2 * np.pi * proj / wavelength + phase))
+        slope += amplitude * 2 * np.pi / wavelength
+    return h, slope
+
+
+def synthetic_tile_bounds(tx, ty, tile_size, sample_spacing=64.0, **terrain):
+    """
+    Conservative (z_min, z_max) per tile of synthetic_terrain_height: min/max
+    over a sample grid, padded by slope_bound * (half the sample diagonal).
+    """
+    n = int(math.ceil(tile_size / sample_spacing)) + 1
+    offsets = np.linspace(0.0, tile_size, n)
+    step = tile_size / (n - 1)
+    z_min = np.empty(len(tx))
+    z_max = np.empty(len(tx))
+    chunk = max(1, (1 << 20) // (n * n))
+    for s in range(0, len(tx), chunk):
+        e = min(s + chunk, len(tx))
+        xs = np.asarray(tx[s:e])[:, None, None] + offsets[None, :, None]
+        ys = np.asarray(ty[s:e])[:, None, None] + offsets[None, None, :]
+        h, slope = synthetic_terrain_height(xs, ys, **terrain)
+        z_min[s:e] = h.min(axis=(1, 2))
+        z_max[s:e] = h.max(axis=(1, 2))
+    pad = slope * step * HALF_DIAGONAL
+    return z_min - pad, z_max + pad
+
+
+def heading_deg(cam_dir):
+    # Compass-free heading of a 2D view vector: 0 = East (+x), 90 = North (+y)
+    return math.degrees(math.atan2(cam_dir[1], cam_dir[0]))
+
+
 class CullingSim:
-    def __init__(self):
-        self.FOV_DEG = 12.0
-        self.VISIBILITY = 20000.0 # 20km
-        self.CAM_POS = (0, 100) # x, z
-        self.CAM_DIR = (0, 1) # Looking North
+    def __init__(self, cam_pos=(0, 100), cam_dir=(0, 1), fov_deg=12.0, visibility=20000.0, curvature=False,
+                 max_terrain_h=DEFAULT_MAX_TERRAIN_H):
+        self.FOV_DEG = fov_deg
+        self.VISIBILITY = visibility # 20km
+        self.CURVATURE = curvature # Reject tiles below the geometric horizon
+        self.CAM_POS = cam_pos # x, z
+        self.CAM_DIR = cam_dir # Default: Looking North
+        self.HEADING_DEG = heading_deg(cam_dir) # 90 for North
         
         # Frustum Planes (Simplified 2D Wedge)
         half_fov = math.radians(self.FOV_DEG / 2.0)
-        self.FRUSTUM_LEFT = math.radians(90 + half_fov)
-        self.FRUSTUM_RIGHT = math.radians(90 - half_fov)
+        self.FRUSTUM_LEFT = math.radians(self.HEADING_DEG) + half_fov
+        self.FRUSTUM_RIGHT = math.radians(self.HEADING_DEG) - half_fov
+        
+        # Workload model (created on first use)
+        self.CAM_ALT = 100.0 # m, matches lod_expert_optimizer Camera_Z
+        self.LOD0_SPACING = 2.0 # m between posts at LOD 0 -> 1024m tile at LOD 4 = 33x33 verts
+        self._lod_config = None
+        
+        # Earth curvature (lod_expert_optimizer [PHYSICS CHECK])
+        self.R_EARTH = 6371000.0 # m
+        self.MAX_TERRAIN_H = max_terrain_h # m, tallest terrain above the datum (conservative horizon)
+
+    def curvature_drop(self, ground_dist):
+        # Drop of the earth surface below the camera's tangent plane: d^2 / 2R (floats or arrays)
+        return ground_dist * ground_dist / (2.0 * self.R_EARTH)
+
+    def horizon_reach(self):
+        """
+        Farthest ground distance at which terrain up to MAX_TERRAIN_H can
+        still rise above the geometric horizon seen from the camera:
+        sqrt(2Rh + h^2) for the camera plus the same for the terrain top.
+        CAM_ALT is above ground level and the ground under the camera may be
+        as high as MAX_TERRAIN_H, so the camera is taken at CAM_ALT +
+        MAX_TERRAIN_H above the datum (the largest, i.e. conservative, reach).
+        """
+        r = self.R_EARTH
+        h_top = max(self.MAX_TERRAIN_H, 0.0)
+        h_cam = max(self.CAM_ALT, 0.0) + h_top
+        return math.sqrt(2 * r * h_cam + h_cam**2) + math.sqrt(2 * r * h_top + h_top**2)
 
     def is_tile_visible(self, tx, ty, t_size):
+        reason = self._cull_reason_pose(tx, ty, t_size, self.CAM_POS, self.HEADING_DEG)
+        if instrumentation.ACTIVE is not None:
+            instrumentation.ACTIVE.count_cull(reason)
+        return reason == CULL_VISIBLE
+
+    def _is_tile_visible_pose(self, tx, ty, t_size, cam_pos, heading):
+        return self._cull_reason_pose(tx, ty, t_size, cam_pos, heading) == CULL_VISIBLE
+
+    def _cull_reason_pose(self, tx, ty, t_size, cam_pos, heading):
         # Function to check if a square tile intersects with the 2D frustum triangle
         # Simplified: Check if any corner is in frustum? Or frustum in tile?
         # For this sim, conservative "Center in Frustum or close" is enough.
@@ -26,45 +154,135 @@ class CullingSim:
         cx = tx + t_size/2
         cy = ty + t_size/2
         
-        dx = cx - self.CAM_POS[0]
-        dy = cy - self.CAM_POS[1]
+        dx = cx - cam_pos[0]
+        dy = cy - cam_pos[1]
         dist = math.sqrt(dx*dx + dy*dy)
         
-        if dist > self.VISIBILITY + t_size: return False # Distance Cull
-        if dist < t_size: return True # Too close to miss
+        if dist > self.VISIBILITY + t_size: return CULL_DISTANCE # Distance Cull
+        if self.CURVATURE and dist - t_size * HALF_DIAGONAL > self.horizon_reach():
+            return CULL_HORIZON # Whole tile below the geometric horizon
+        if dist < t_size: return CULL_VISIBLE # Too close to miss
         
         angle = math.atan2(dy, dx) # -pi to pi
         angle_deg = math.degrees(angle)
         
-        # Camera is looking North (90 deg)
+        # Unwrap into [heading - 180, heading + 180) so the wedge never straddles the seam.
+        # For the default North camera (90 deg) this leaves every in-wedge angle untouched.
+        if angle_deg < heading - 180.0:
+            angle_deg += 360.0
+        elif angle_deg >= heading + 180.0:
+            angle_deg -= 360.0
+        
+        # Default camera is looking North (90 deg)
         # FOV is 12 deg (+/- 6 deg) -> [84, 96]
         fov_half = self.FOV_DEG / 2.0
         
-        # Check angle against 90 +/- fov (with some padding for tile width)
+        # Check angle against heading +/- fov (with some padding for tile width)
         # At distance D, tile covers angle Alpha = atan(Size/D)
         angular_width_deg = math.degrees(math.atan(t_size / dist))
         
-        if (90 - fov_half - angular_width_deg) <= angle_deg <= (90 + fov_half + angular_width_deg):
-            return True
+        if (heading - fov_half - angular_width_deg) <= angle_deg <= (heading + fov_half + angular_width_deg):
+            return CULL_VISIBLE
+            
+        return CULL_ANGLE
+
+    def is_tile_visible_batch(self, tx, ty, t_size, cam_pos=None, cam_dir=None, count=True):
+        """
+        Vectorized is_tile_visible over whole tile-origin arrays.
+        tx, ty: tile origins, shape (N,).
+        cam_pos / cam_dir: a single pose (2,) or a stack of poses (P, 2).
+        Defaults to this sim's CAM_POS / CAM_DIR.
+        Returns a bool mask of shape (N,) for one pose or (P, N) for P poses,
+        identical to calling is_tile_visible per tile and pose.
+        count=False keeps the call out of the instrumentation cull counters
+        (for internal re-culls such as estimate_workload).
+        """
+        tx = np.asarray(tx, dtype=np.float64)
+        ty = np.asarray(ty, dtype=np.float64)
+        cam_pos = np.asarray(self.CAM_POS if cam_pos is None else cam_pos, dtype=np.float64)
+        cam_dir = np.asarray(self.CAM_DIR if cam_dir is None else cam_dir, dtype=np.float64)
+        single_pose = cam_pos.ndim == 1 and cam_dir.ndim == 1
+        cam_pos, cam_dir = np.broadcast_arrays(np.atleast_2d(cam_pos), np.atleast_2d(cam_dir))
+        
+        # Headings go through math.atan2 so they match the scalar path exactly (one call per pose)
+        heading = np.array([heading_deg(d) for d in cam_dir])[:, None]
+        
+        # Tile Center
+        cx = tx + t_size/2
+        cy = ty + t_size/2
+        
+        with instrumentation.stage('cull.distance'):
+            dx = cx[None, :] - cam_pos[:, 0:1]
+            dy = cy[None, :] - cam_pos[:, 1:2]
+            dist = np.sqrt(dx*dx + dy*dy)
+            
+            far = dist > self.VISIBILITY + t_size # Distance Cull
+            if self.CURVATURE:
+                hidden = ~far & (dist - t_size * HALF_DIAGONAL > self.horizon_reach())
+                far |= hidden
+            near = dist < t_size # Too close to miss
+        
+        with instrumentation.stage('cull.angle'), np.errstate(divide='ignore', invalid='ignore'):
+            angle_deg = np.degrees(np.arctan2(dy, dx))
+            angle_deg = np.where(angle_deg < heading - 180.0, angle_deg + 360.0, angle_deg)
+            angle_deg = np.where(angle_deg >= heading + 180.0, angle_deg - 360.0, angle_deg)
             
-        return False
+            fov_half = self.FOV_DEG / 2.0
+            angular_width_deg = np.degrees(np.arctan(t_size / dist))
+            lo = heading - fov_half - angular_width_deg
+            hi = heading + fov_half + angular_width_deg
+        
+            in_wedge = (lo <= angle_deg) & (angle_deg <= hi)
+            visible = ~far & (near | in_wedge)
+            
+            # Re-check wedge-edge ties with the scalar path (bit-compatible result)
+            margin = np.minimum(np.abs(angle_deg - lo), np.abs(hi - angle_deg))
+            ties = np.nonzero(~far & ~near & (margin <= ANGLE_TIE_EPS_DEG))
+            for p, i in zip(*ties):
+                visible[p, i] = self._is_tile_visible_pose(
+                    tx[i], ty[i], t_size, cam_pos[p], heading[p, 0])
+        
+        prof = instrumentation.ACTIVE
+        if prof is not None and count:
+            n_far = int(np.count_nonzero(far))
+            n_visible = int(np.count_nonzero(visible))
+            prof.count_cull(CULL_VISIBLE, n_visible)
+            if self.CURVATURE:
+                n_hidden = int(np.count_nonzero(hidden))
+                prof.count_cull(CULL_HORIZON, n_hidden)
+                prof.count_cull(CULL_DISTANCE, n_far - n_hidden)
+            else:
+                prof.count_cull(CULL_DISTANCE, n_far)
+            prof.count_cull(CULL_ANGLE, visible.size - n_visible - n_far)
+        
+        return visible[0] if single_pose else visible
 
-    def run_benchmark(self, tile_size):
+    def tile_grid(self, tile_size):
+        # Tile origins in the same order as the run_benchmark loops (x outer, y inner)
+        range_max = int(self.VISIBILITY) # 20km radius -> 40km box
+        range_min = -range_max
+        xs = np.arange(range_min, range_max, tile_size, dtype=np.float64)
+        ys = np.arange(0, range_max, tile_size, dtype=np.float64) # Only simulate front hemisphere
+        gx, gy = np.meshgrid(xs, ys, indexing='ij')
+        return gx.ravel(), gy.ravel()
+
+    def run_benchmark(self, tile_size, workload=False):
+        # workload=True also prints estimate_workload (untimed, after the culling stage)
         print(f"\n--- Testing Tile Size: {tile_size}m ---")
         
         # Grid Size
-        # 20km radius -> 40km box
-        range_min = -20000
-        range_max = 20000
+        range_max = int(self.VISIBILITY) # 20km radius -> 40km box
+        range_min = -range_max
         
         total_tiles = 0
         visible_tiles = 0
         
-        for x in range(range_min, range_max, tile_size):
-            for y in range(0, range_max, tile_size): # Only simulate front hemisphere
-                total_tiles += 1
-                if self.is_tile_visible(x, y, tile_size):
-                    visible_tiles += 1
+        with instrumentation.stage('cull.scalar'):
+            for x in range(range_min, range_max, tile_size):
+                for y in range(0, range_max, tile_size): # Only simulate front hemisphere
+                    total_tiles += 1
+                    if self.is_tile_visible(x, y, tile_size):
+                        visible_tiles += 1
                     
         print(f"Total Tiles in Horizon: {total_tiles}")
         print(f"Visible Tiles (Draw Calls): {visible_tiles}")
@@ -72,27 +290,681 @@ class CullingSim:
         # Draw Call Overhead metric (Abstract Cost)
         # Using typical modern cost: 1 DC = 0.01ms CPU time?
         cost_cpu = visible_tiles * 1.0 
+        print(f"Draw Call Score (Lower is better): {cost_cpu}")
         
-        # GPU Vertex Cost
-        # Assume 1024m tile has 256x256 verts (65k)
-        # 512m tile has 128x128 verts (16k)
-        # Wait, if we keep density constant (0.5m spacing), then:
-        # 1024m -> 2048x2048 grid? No, that's insane.
-        # Let's assume constant screen density.
-        # Usually, 1024m tile is one DrawCall.
-        # If we split it into 4x 512m tiles, we have 4 DrawCalls.
-        # But we might cull 1 or 2 of them.
+        if self.CURVATURE:
+            self.horizon_savings(tile_size)
         
-        print(f"Draw Call Score (Lower is better): {cost_cpu}")
+        # Vertex / triangle load of the visible set at its SSE-selected LODs
+        if workload:
+            with instrumentation.stage('workload'):
+                self.estimate_workload(tile_size)
         return visible_tiles
 
+    def run_benchmark_batch(self, tile_size):
+        # Same experiment as run_benchmark, one vectorized culling pass
+        print(f"\n--- Testing Tile Size: {tile_size}m (Batched) ---")
+        
+        tx, ty = self.tile_grid(tile_size)
+        with instrumentation.stage('cull.batch'):
+            mask = self.is_tile_visible_batch(tx, ty, tile_size)
+        
+        total_tiles = int(mask.size)
+        visible_tiles = int(np.count_nonzero(mask))
+        
+        print(f"Total Tiles in Horizon: {total_tiles}")
+        print(f"Visible Tiles (Draw Calls): {visible_tiles}")
+        print(f"Draw Call Score (Lower is better): {visible_tiles * 1.0}")
+        return visible_tiles
+
+    def horizon_savings(self, tile_size, verbose=True):
+        """
+        Tiles the flat test keeps but the curvature test rejects (wholly below
+        the geometric horizon), for the current CAM_ALT, VISIBILITY and
+        MAX_TERRAIN_H (the savings are only as safe as that terrain maximum).
+        """
+        tx, ty = self.tile_grid(tile_size)
+        curvature = self.CURVATURE
+        try:
+            self.CURVATURE = False
+            flat = int(np.count_nonzero(self.is_tile_visible_batch(tx, ty, tile_size, count=False)))
+            self.CURVATURE = True
+            curved = int(np.count_nonzero(self.is_tile_visible_batch(tx, ty, tile_size, count=False)))
+        finally:
+            self.CURVATURE = curvature
+        
+        result = {
+            "tile_size": tile_size,
+            "max_terrain_h": self.MAX_TERRAIN_H,
+            "horizon_reach": self.horizon_reach(),
+            "visible_flat": flat,
+            "visible_curved": curved,
+            "saved": flat - curved,
+            "saved_fraction": (flat - curved) / flat if flat else 0.0,
+        }
+        if verbose:
+            print(f"Horizon @ {self.CAM_ALT:.0f}m AGL, terrain max {self.MAX_TERRAIN_H:.0f}m: "
+                  f"{result['horizon_reach'] / 1000.0:.1f} km | "
+                  f"Flat: {flat} | Curved: {curved} | Saved: {result['saved']} ({result['saved_fraction'] * 100.0:.1f}%)")
+        return result
+
+    def _azimuth_footprint(self, x0, y0, size):
+        # Ground distance range and heading-relative azimuth span of square cells
+        cam_x, cam_y = self.CAM_POS
+        x1 = x0 + size
+        y1 = y0 + size
+        dmin = np.hypot(np.clip(cam_x, x0, x1) - cam_x, np.clip(cam_y, y0, y1) - cam_y)
+        cdx = np.stack([x0, x1, x0, x1], axis=-1) - cam_x
+        cdy = np.stack([y0, y0, y1, y1], axis=-1) - cam_y
+        dmax = np.hypot(cdx, cdy).max(axis=-1)
+        rel = np.degrees(np.arctan2(cdy, cdx)) - self.HEADING_DEG
+        rel = (rel + 180.0) % 360.0 - 180.0
+        a_min = rel.min(axis=-1)
+        a_max = rel.max(axis=-1)
+        # Cells under the camera or straddling the rear seam take no part
+        valid = (dmin > 0.0) & (a_max - a_min < 180.0)
+        return dmin, dmax, a_min, a_max, valid
+
+    def occlusion_cull(self, tx, ty, tile_size, z_max, occluders, cam_z=None, n_buckets=OCCLUSION_BUCKETS):
+        """
+        Conservative terrain self-occlusion (horizon-line) culling.
+        tx, ty, z_max: tile origins and per-tile max heights (the tested bounds).
+        occluders: (ox, oy, cell_size, oz_min) terrain cells with per-cell min
+        heights that build the horizon (e.g. the tiles themselves with their
+        z_min, or a finer grid for a tighter line).
+        cam_z: camera height on the same datum (default CAM_ALT).
+        Sweeps tiles front to back in distance bands, keeping the highest
+        guaranteed elevation slope (dz / d) per azimuth bucket across the FOV:
+          - a cell raises every bucket its footprint fully spans to the lowest
+            slope any of its points can have (z_min at its worst distance),
+          - a tile is hidden if the highest slope any of its points can reach
+            (z_max at its best distance) stays below the horizon in every
+            bucket it touches, and all those occluders are strictly nearer.
+        Returns a bool mask, True = tile provably hidden.
+        """
+        cam_z = self.CAM_ALT if cam_z is None else cam_z
+        half = self.FOV_DEG / 2.0
+        width = 2.0 * half / n_buckets
+        
+        # Occluders: fully spanned buckets [full0, full1), lowest possible slope
+        ox, oy, cell_size, oz_min = (np.asarray(a, dtype=np.float64) for a in occluders)
+        o_dmin, o_dmax, o_amin, o_amax, o_valid = self._azimuth_footprint(ox, oy, cell_size)
+        full0 = np.clip(np.ceil((o_amin + half) / width), 0, n_buckets).astype(np.int64)
+        full1 = np.clip(np.floor((o_amax + half) / width), 0, n_buckets).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dz = oz_min - cam_z
+            occluder_slope = np.where(dz >= 0.0, dz / o_dmax, dz / o_dmin)
+        order = np.nonzero(o_valid & (full1 > full0))[0]
+        order = order[np.argsort(o_dmax[order], kind='stable')]
+        occ_dmax = o_dmax[order]
+        
+        # Tested tiles: touched buckets [part0, part1], highest possible slope
+        tx = np.asarray(tx, dtype=np.float64)
+        ty = np.asarray(ty, dtype=np.float64)
+        dmin, dmax, a_min, a_max, valid = self._azimuth_footprint(tx, ty, tile_size)
+        u0 = (a_min + half) / width
+        u1 = (a_max + half) / width
+        part0 = np.clip(np.floor(u0), 0, n_buckets - 1).astype(np.int64)
+        part1 = np.clip(np.floor(u1), 0, n_buckets - 1).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dz = np.asarray(z_max, dtype=np.float64) - cam_z
+            top_slope = np.where(dz >= 0.0, dz / dmin, dz / dmax)
+        tested = np.nonzero(valid & (u1 >= 0.0) & (u0 < n_buckets))[0]
+        tested = tested[np.argsort(dmin[tested], kind='stable')]
+        test_dmin = dmin[tested]
+        
+        horizon = np.full(n_buckets, -np.inf)
+        hidden = np.zeros(tx.shape, dtype=bool)
+        inserted = 0
+        start = 0
+        while start < tested.size:
+            # Band of tiles tested against occluders that end before it begins
+            band_near = test_dmin[start]
+            end = int(np.searchsorted(test_dmin, band_near + tile_size, side='left'))
+            end = max(end, start + 1)
+            
+            ready = int(np.searchsorted(occ_dmax, band_near, side='right'))
+            if ready > inserted:
+                idx = order[inserted:ready]
+                counts = full1[idx] - full0[idx]
+                offsets = np.cumsum(counts) - counts
+                buckets = np.repeat(full0[idx] - offsets, counts) + np.arange(int(counts.sum()))
+                np.maximum.at(horizon, buckets, np.repeat(occluder_slope[idx], counts))
+                inserted = ready
+            
+            idx = tested[start:end]
+            counts = part1[idx] - part0[idx] + 1
+            offsets = np.cumsum(counts) - counts
+            buckets = np.repeat(part0[idx] - offsets, counts) + np.arange(int(counts.sum()))
+            lowest = np.minimum.reduceat(horizon[buckets], offsets)
+            hidden[idx] = top_slope[idx] < lowest
+            start = end
+        
+        return hidden
+
+    def run_occlusion_benchmark(self, tile_size, occluder_size=128, n_buckets=OCCLUSION_BUCKETS, **terrain):
+        """
+        Frustum culling followed by occlusion_cull on synthetic_terrain_height,
+        with the camera CAM_ALT above the terrain under it. The horizon is
+        built from occluder_size cells covering the frustum-visible tiles
+        (the per-cell min-height pyramid level a streamer would keep resident).
+        Reports culled-tile and culled-triangle ratios and the pass cost.
+        """
+        print(f"\n--- Occlusion Culling: {tile_size}m tiles, {occluder_size}m occluders, synthetic mountains ---")
+        tx, ty = self.tile_grid(tile_size)
+        visible = self.is_tile_visible_batch(tx, ty, tile_size, count=False)
+        tx, ty = tx[visible], ty[visible]
+        _, z_max = synthetic_tile_bounds(tx, ty, tile_size, **terrain)
+        
+        sub = np.arange(0.0, tile_size, occluder_size)
+        gx, gy = np.meshgrid(sub, sub, indexing='ij')
+        ox = (tx[:, None] + gx.ravel()[None, :]).ravel()
+        oy = (ty[:, None] + gy.ravel()[None, :]).ravel()
+        oz_min, _ = synthetic_tile_bounds(ox, oy, occluder_size, **terrain)
+        
+        ground, _ = synthetic_terrain_height(self.CAM_POS[0], self.CAM_POS[1], **terrain)
+        cam_z = float(ground) + self.CAM_ALT
+        
+        t0 = time.perf_counter()
+        with instrumentation.stage('cull.occlusion'):
+            hidden = self.occlusion_cull(tx, ty, tile_size, z_max, (ox, oy, occluder_size, oz_min), cam_z, n_buckets)
+        wall_time = time.perf_counter() - t0
+        instrumentation.count('rejected_occlusion', int(np.count_nonzero(hidden)))
+        
+        _, side = self.tile_lods(tx, ty, tile_size)
+        tris = 2 * (side - 1) * (side - 1)
+        tris_total = int(tris.sum())
+        tris_culled = int(tris[hidden].sum())
+        n_hidden = int(np.count_nonzero(hidden))
+        
+        print(f"Frustum-Visible Tiles: {tx.size} | Occluded: {n_hidden} ({n_hidden / max(tx.size, 1) * 100.0:.1f}%)")
+        print(f"Triangles: {tris_total:,} | Occluded: {tris_culled:,} ({tris_culled / max(tris_total, 1) * 100.0:.1f}%)")
+        print(f"Occlusion Pass: {wall_time * 1000.0:.3f} ms ({n_buckets} azimuth buckets)")
+        return {
+            "frustum_visible": int(tx.size),
+            "occluded": n_hidden,
+            "occluded_fraction": n_hidden / max(tx.size, 1),
+            "triangles": tris_total,
+            "triangles_occluded": tris_culled,
+            "triangles_occluded_fraction": tris_culled / max(tris_total, 1),
+            "wall_time_s": wall_time,
+        }
+
+    def view_sim(self, view):
+        # Single-view CullingSim for a CullView, sharing this sim's altitude / curvature model
+        sim = CullingSim(view.cam_pos, view.cam_dir, view.fov_deg, view.far, self.CURVATURE, self.MAX_TERRAIN_H)
+        sim.CAM_ALT = self.CAM_ALT
+        sim.R_EARTH = self.R_EARTH
+        return sim
+
+    def _view_bounds(self, view, t_size):
+        """
+        Axis-aligned box holding every tile center view can accept: the
+        wedge sector out to far + t_size (apex, arc ends and any axis
+        extreme inside the FOV), padded by t_size for the angular padding.
+        """
+        px, py = view.cam_pos
+        heading = heading_deg(view.cam_dir)
+        half = view.fov_deg / 2.0
+        r = view.far + t_size
+        xs, ys = [px], [py]
+        for a in (heading - half, heading + half, 0.0, 90.0, 180.0, 270.0):
+            if a in (heading - half, heading + half) or abs((a - heading + 180.0) % 360.0 - 180.0) <= half:
+                xs.append(px + r * math.cos(math.radians(a)))
+                ys.append(py + r * math.sin(math.radians(a)))
+        return min(xs) - t_size, max(xs) + t_size, min(ys) - t_size, max(ys) + t_size
+
+    def cull_views(self, tx, ty, t_size, views):
+        """
+        Single-pass culling of one tile set against several views.
+        Each tile is fetched once; tiles outside every view's bounding box
+        are rejected before any per-view test, and each view only runs its
+        distance / angle / horizon tests (is_tile_visible_batch semantics,
+        plus the near band) on tiles inside its own box.
+        Returns (bits, stats): bits[i] has bit v set when view v sees tile i;
+        stats has per-view visible base tiles and draws (distinct
+        view.tile_size tiles covering them).
+        """
+        if len(views) > 64:
+            raise ValueError(f"At most 64 views per pass, got {len(views)}")
+        tx = np.asarray(tx, dtype=np.float64)
+        ty = np.asarray(ty, dtype=np.float64)
+        bit_dtype = next(dt for dt in (np.uint8, np.uint16, np.uint32, np.uint64)
+                         if np.iinfo(dt).bits >= len(views))
+        bits = np.zeros(tx.size, dtype=bit_dtype)
+        
+        with instrumentation.stage('cull.multiview'):
+            cx = tx + t_size/2
+            cy = ty + t_size/2
+            boxes = [self._view_bounds(view, t_size) for view in views]
+            in_box = [(cx >= x0) & (cx <= x1) & (cy >= y0) & (cy <= y1) for x0, x1, y0, y1 in boxes]
+            candidates = np.flatnonzero(np.logical_or.reduce(in_box))
+            instrumentation.count('multiview_early_rejects', tx.size - candidates.size)
+            
+            ctx, cty = tx[candidates], ty[candidates]
+            stats = []
+            for v, (view, box_mask) in enumerate(zip(views, in_box)):
+                sel = np.flatnonzero(box_mask[candidates])
+                vis = self.view_sim(view).is_tile_visible_batch(ctx[sel], cty[sel], t_size, count=False)
+                if view.near > 0.0:
+                    dist = np.hypot(cx[candidates[sel]] - view.cam_pos[0], cy[candidates[sel]] - view.cam_pos[1])
+                    vis &= dist + t_size * HALF_DIAGONAL >= view.near
+                hit = candidates[sel[vis]]
+                bits[hit] |= bit_dtype(1 << v)
+                
+                size = view.tile_size or t_size
+                if size == t_size:
+                    draws = hit.size
+                else:
+                    px = np.floor(tx[hit] / size).astype(np.int64)
+                    py = np.floor(ty[hit] / size).astype(np.int64)
+                    draws = np.unique((px << 32) + py).size
+                stats.append({"name": view.name, "tile_size": size, "tested": int(sel.size),
+                              "visible": int(hit.size), "draws": int(draws)})
+        return bits, stats
+
+    def run_multiview_benchmark(self, base_tile_size=512, views=None, repeats=5):
+        """
+        Main view, four shadow cascades and a rear mirror over one tile box
+        around the camera: cull_views in one pass vs one is_tile_visible_batch
+        pass per view over the same base tiles. Draws (Own Grid) culls each
+        view directly on its tile_size grid, for reference.
+        """
+        if views is None:
+            splits = [0.0, 1000.0, 3000.0, 8000.0, self.VISIBILITY]
+            cascade_sizes = [512, 512, 1024, 2048]
+            views = [CullView('main', self.CAM_POS, self.CAM_DIR, self.FOV_DEG, 0.0, self.VISIBILITY, 512)]
+            views += [CullView(f'cascade{i}', self.CAM_POS, self.CAM_DIR, self.FOV_DEG + 4.0,
+                               splits[i], splits[i + 1], cascade_sizes[i]) for i in range(4)]
+            views.append(CullView('mirror', self.CAM_POS, (-self.CAM_DIR[0], -self.CAM_DIR[1]), 40.0,
+                                  0.0, 3000.0, 1024))
+        print(f"\n--- Multi-View Culling: {len(views)} views, {base_tile_size}m base tiles ---")
+        
+        def box(size):
+            r = int(self.VISIBILITY)
+            gx, gy = np.meshgrid(np.arange(-r, r, size, dtype=np.float64),
+                                 np.arange(-r, r, size, dtype=np.float64), indexing='ij')
+            return gx.ravel(), gy.ravel()
+        
+        tx, ty = box(base_tile_size)
+        grids = {view.tile_size or base_tile_size: None for view in views}
+        grids = {size: box(size) for size in grids}
+        sims = [self.view_sim(view) for view in views]
+        
+        single = float('inf')
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            bits, stats = self.cull_views(tx, ty, base_tile_size, views)
+            single = min(single, time.perf_counter() - t0)
+        
+        def independent_pass(view, sim, vx, vy, size):
+            vis = sim.is_tile_visible_batch(vx, vy, size, count=False)
+            if view.near > 0.0:
+                dist = np.hypot(vx + size/2 - view.cam_pos[0], vy + size/2 - view.cam_pos[1])
+                vis &= dist + size * HALF_DIAGONAL >= view.near
+            return vis
+        
+        independent = float('inf')
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            for view, sim in zip(views, sims):
+                independent_pass(view, sim, tx, ty, base_tile_size)
+            independent = min(independent, time.perf_counter() - t0)
+        
+        draws = []
+        for view, sim in zip(views, sims):
+            size = view.tile_size or base_tile_size
+            draws.append(int(np.count_nonzero(independent_pass(view, sim, *grids[size], size))))
+        
+        print(f"{'View':<10} | {'Tile(m)':<7} | {'Tested':<7} | {'Visible':<7} | {'Draws':<6} | {'Draws (Own Grid)':<16}")
+        print("-" * 68)
+        for s, own in zip(stats, draws):
+            s["draws_independent"] = own
+            print(f"{s['name']:<10} | {s['tile_size']:<7} | {s['tested']:<7} | {s['visible']:<7} | {s['draws']:<6} | {own:<16}")
+        rejected = int(np.count_nonzero(bits == 0))
+        print(f"Base Tiles: {tx.size} | Outside Every View: {rejected} ({rejected / tx.size * 100.0:.1f}%)")
+        print(f"Single Pass: {single * 1000.0:.3f} ms | {len(views)} Independent Passes: {independent * 1000.0:.3f} ms "
+              f"| Saved: {(1.0 - single / independent) * 100.0:.1f}%")
+        return {
+            "views": stats,
+            "base_tiles": int(tx.size),
+            "rejected_all_views": rejected,
+            "single_pass_s": single,
+            "independent_s": independent,
+        }
+
+    def lod_grid_sizes(self, tile_size, n_levels):
+        # Vertices per tile side at each LOD: post spacing doubles per level, at least 2 posts
+        spacing = self.LOD0_SPACING * 2.0 ** np.arange(n_levels)
+        return np.maximum(np.floor(tile_size / spacing).astype(np.int64), 1) + 1
+
+    def tile_lods(self, tx, ty, tile_size):
+        """
+        LOD and vertices per side for tiles at origins (tx, ty): the LOD the
+        tile's nearest point needs under the LODConfig switch distances.
+        """
+        if self._lod_config is None:
+            self._lod_config = LODCore()
+        switch = np.asarray(self._lod_config.SWITCH_DISTANCES)
+        
+        # Nearest point of each tile to the camera (3D, flat ground, or
+        # curved ground: the tile drops by d^2 / 2R below the tangent plane)
+        gx = np.maximum(np.maximum(tx - self.CAM_POS[0], self.CAM_POS[0] - (tx + tile_size)), 0.0)
+        gy = np.maximum(np.maximum(ty - self.CAM_POS[1], self.CAM_POS[1] - (ty + tile_size)), 0.0)
+        ground2 = gx * gx + gy * gy
+        dz = self.CAM_ALT + self.curvature_drop(np.sqrt(ground2)) if self.CURVATURE else self.CAM_ALT
+        dist = np.sqrt(ground2 + dz * dz)
+        with instrumentation.stage('lod.lookup'):
+            lod = np.searchsorted(switch[:-1], dist, side='right')
+        return lod, self.lod_grid_sizes(tile_size, len(switch))[lod]
+
+    def estimate_workload(self, tile_size, verbose=True):
+        """
+        Workload of one frame at this tile size.
+        Each visible tile gets the LOD its nearest point needs under the LODConfig
+        switch distances (LOD i valid up to D_i) and a regular grid for that LOD.
+        One draw call per tile; multi-draw-indirect batches = distinct LOD meshes.
+        """
+        tx, ty = self.tile_grid(tile_size)
+        mask = self.is_tile_visible_batch(tx, ty, tile_size, count=False)
+        lod, side = self.tile_lods(tx[mask], ty[mask], tile_size)
+        n_levels = len(self._lod_config.SWITCH_DISTANCES)
+        verts = side * side
+        tris = 2 * (side - 1) * (side - 1)
+        
+        draws = int(mask.sum())
+        result = {
+            "tile_size": tile_size,
+            "draw_calls": draws,
+            "mdi_batches": int(np.unique(lod).size),
+            "vertices": int(verts.sum()),
+            "triangles": int(tris.sum()),
+            "draws_per_lod": np.bincount(lod, minlength=n_levels).tolist(),
+            "tris_per_draw_min": int(tris.min()) if draws else 0,
+            "tris_per_draw_median": float(np.median(tris)) if draws else 0.0,
+            "tris_per_draw_max": int(tris.max()) if draws else 0,
+            "draws_below_500": int(np.count_nonzero(tris < TRI_FLOOR_LOW)),
+            "draws_below_1000": int(np.count_nonzero(tris < TRI_FLOOR_HIGH)),
+        }
+        
+        if verbose:
+            print(f"Workload @ {self.CAM_ALT:.0f}m AGL, {self.LOD0_SPACING}m LOD0 posts:")
+            print(f"  Draws per LOD: {result['draws_per_lod']} -> {result['mdi_batches']} MDI batch(es)")
+            print(f"  Vertices: {result['vertices']:,} | Triangles: {result['triangles']:,}")
+            print(f"  Tris/Draw: min {result['tris_per_draw_min']} | median {result['tris_per_draw_median']:.0f} | max {result['tris_per_draw_max']}")
+            print(f"  Draws under floor: {result['draws_below_500']} < {TRI_FLOOR_LOW} tris, "
+                  f"{result['draws_below_1000']} < {TRI_FLOOR_HIGH} tris")
+        return result
+
+    def classify_nodes(self, x0, y0, size):
+        """
+        Conservative node-vs-wedge test for square nodes (x0, y0, size).
+        Returns (outside, inside, dmin): outside = whole node can be rejected,
+        inside = whole node lies in the wedge and within VISIBILITY
+        (and, with CURVATURE, within the horizon reach),
+        dmin = nearest distance from the camera to the node.
+        Anything neither outside nor inside straddles a frustum edge.
+        """
+        cam_x, cam_y = self.CAM_POS
+        x1 = x0 + size
+        y1 = y0 + size
+        
+        # Nearest point of the node to the camera (0 if the camera is inside)
+        nx = np.clip(cam_x, x0, x1)
+        ny = np.clip(cam_y, y0, y1)
+        dmin = np.hypot(nx - cam_x, ny - cam_y)
+        cam_inside = (nx == cam_x) & (ny == cam_y)
+        
+        # Corners: (N, 4)
+        cdx = np.stack([x0, x1, x0, x1], axis=-1) - cam_x
+        cdy = np.stack([y0, y0, y1, y1], axis=-1) - cam_y
+        dmax = np.hypot(cdx, cdy).max(axis=-1)
+        
+        # Corner angles relative to the heading, wrapped to [-180, 180)
+        rel = np.degrees(np.arctan2(cdy, cdx)) - self.HEADING_DEG
+        rel = (rel + 180.0) % 360.0 - 180.0
+        a_min = rel.min(axis=-1)
+        a_max = rel.max(axis=-1)
+        
+        # A node behind the camera can straddle the +/-180 seam: unwrap it to (0, 360)
+        seam = (a_max - a_min) > 180.0
+        rel_unwrapped = np.where(rel < 0.0, rel + 360.0, rel)
+        a_min = np.where(seam, rel_unwrapped.min(axis=-1), a_min)
+        a_max = np.where(seam, rel_unwrapped.max(axis=-1), a_max)
+        
+        fov_half = self.FOV_DEG / 2.0
+        hits_wedge = ((a_min <= fov_half) & (a_max >= -fov_half)) | \
+                     ((a_min <= 360.0 + fov_half) & (a_max >= 360.0 - fov_half))
+        
+        reach = min(self.VISIBILITY, self.horizon_reach()) if self.CURVATURE else self.VISIBILITY
+        outside = (dmin > reach) | (~cam_inside & ~hits_wedge)
+        inside = ~cam_inside & ~seam & (dmax <= reach) & \
+                 (a_min >= -fov_half) & (a_max <= fov_half)
+        return outside, inside, dmin
+
+    def run_quadtree(self, min_tile_size=512, max_tile_size=4096, near_field_radius=2000.0):
+        """
+        Hierarchical alternative to run_benchmark.
+        Root nodes of max_tile_size cover the same 40km box. Each level:
+          1. Test every node's bounds against the frustum wedge.
+          2. Reject fully-outside subtrees, emit fully-inside far-field nodes whole.
+          3. Subdivide only straddling nodes and nodes inside near_field_radius.
+        Nodes at min_tile_size that are not rejected are emitted as leaves.
+        Children whose origin falls outside the box are dropped, so the leaves
+        are exactly run_benchmark's min_tile_size cells (the last root of a
+        max_tile_size grid would otherwise overhang the box).
+        Cost scales with nodes near the wedge, not with the flat grid cell count.
+        """
+        print(f"\n--- Quadtree: {max_tile_size}m -> {min_tile_size}m (near field {near_field_radius:.0f}m) ---")
+        t_start = time.perf_counter()
+        
+        range_max = int(self.VISIBILITY) # 20km radius -> 40km box
+        range_min = -range_max
+        xs = np.arange(range_min, range_max, max_tile_size, dtype=np.float64)
+        ys = np.arange(0, range_max, max_tile_size, dtype=np.float64) # Only simulate front hemisphere
+        gx, gy = np.meshgrid(xs, ys, indexing='ij')
+        x0, y0 = gx.ravel(), gy.ravel()
+        
+        size = float(max_tile_size)
+        nodes_visited = 0
+        emitted = {}
+        while x0.size:
+            nodes_visited += x0.size
+            outside, inside, dmin = self.classify_nodes(x0, y0, size)
+            near = dmin < near_field_radius
+            
+            if size <= min_tile_size:
+                emit = ~outside
+                split = np.zeros_like(emit)
+            else:
+                emit = inside & ~near
+                split = ~outside & ~emit
+            emitted[int(size)] = int(np.count_nonzero(emit))
+            
+            # Children of split nodes (4 quadrants each)
+            half = size / 2.0
+            px, py = x0[split], y0[split]
+            x0 = np.concatenate([px, px + half, px, px + half])
+            y0 = np.concatenate([py, py, py + half, py + half])
+            in_box = (x0 < range_max) & (y0 < range_max)
+            x0, y0 = x0[in_box], y0[in_box]
+            size = half
+        
+        wall_time = time.perf_counter() - t_start
+        flat_cells = len(range(range_min, range_max, min_tile_size)) * len(range(0, range_max, min_tile_size))
+        
+        print(f"{'Level(m)':<10} | {'Emitted':<8}")
+        print("-" * 21)
+        for level_size, count in emitted.items():
+            print(f"{level_size:<10} | {count:<8}")
+        print(f"Nodes Visited: {nodes_visited} (flat {min_tile_size}m grid: {flat_cells} cells)")
+        print(f"Draw Calls (Emitted Nodes): {sum(emitted.values())}")
+        print(f"Wall Time: {wall_time * 1000.0:.3f} ms")
+        
+        return {
+            "nodes_visited": nodes_visited,
+            "emitted_per_level": emitted,
+            "draw_calls": sum(emitted.values()),
+            "wall_time_s": wall_time,
+        }
+
+class IncrementalCuller:
+    """
+    Temporal-coherence culling + LOD assignment for a tile set over a
+    sequence of camera poses.
+    Keeps the last visibility and CullingSim.tile_lods result per tile plus a
+    certificate from the frame the tile was last evaluated: how far the
+    camera may move before the tile's center or nearest-point distance can
+    reach a decision threshold (visibility range, near radius, horizon,
+    switch distances), and how much it may turn (plus the angular drift of
+    moving, at most (pi/2 + 1) * move / distance rad) before the tile can
+    reach a frustum edge. Camera odometers make each frame's test a few
+    vectorized compares; only tiles whose certificate expired are
+    re-evaluated. Steps over max_step, turns over max_turn_deg, altitude
+    or horizon changes with curvature on, or more than full_fraction
+    expired tiles fall back to a full pass.
+    """
+
+    # Bound on the heading-relative angle change of a tile (deg) per metre of
+    # camera travel, times the tile's center distance (valid for travel <= d / 2)
+    ANGLE_DRIFT_DEG = math.degrees(math.pi / 2.0 + 1.0)
+
+    def __init__(self, sim, tx, ty, tile_size, max_step=None, max_turn_deg=5.0, full_fraction=0.5):
+        self.sim = sim
+        self.tile_size = tile_size
+        self.max_step = tile_size if max_step is None else max_step
+        self.max_turn_deg = max_turn_deg
+        self.full_fraction = full_fraction
+        self._pose = None # (x, y, alt, heading, fov) of the last update
+        self._horizon = None # sim.horizon_reach() of the last update (curvature on)
+        self._odo_move = 0.0 # m travelled (3D)
+        self._odo_turn = 0.0 # deg turned + half FOV changes
+        self.set_tiles(tx, ty)
+
+    def set_tiles(self, tx, ty):
+        # Replaces the tile set; every tile is evaluated on the next update
+        self.tx = np.ascontiguousarray(tx, dtype=np.float64)
+        self.ty = np.ascontiguousarray(ty, dtype=np.float64)
+        n = self.tx.size
+        self.visible = np.zeros(n, dtype=bool)
+        self.lod = np.zeros(n, dtype=np.int64)
+        self._move_expire = np.full(n, -np.inf)
+        self._turn_expire = np.full(n, -np.inf)
+        self._drift = np.zeros(n) # ANGLE_DRIFT_DEG / center distance
+
+    def remap_tiles(self, tx, ty, src_index):
+        """
+        Replaces the tile set, carrying state for tiles that persist
+        (src_index[i] = old slot of new tile i, or -1 for a new tile).
+        """
+        src_index = np.asarray(src_index)
+        keep = src_index >= 0
+        src = src_index[keep]
+        state = [(a, a[src]) for a in (self.visible, self.lod, self._move_expire, self._turn_expire, self._drift)]
+        self.set_tiles(tx, ty)
+        for (_, old), new in zip(state, (self.visible, self.lod, self._move_expire, self._turn_expire, self._drift)):
+            new[keep] = old
+
+    def _evaluate(self, idx, cam_pos, heading):
+        sim = self.sim
+        t = self.tile_size
+        tx, ty = self.tx[idx], self.ty[idx]
+        h = math.radians(heading)
+        self.visible[idx] = sim.is_tile_visible_batch(tx, ty, t, cam_pos=cam_pos, cam_dir=(math.cos(h), math.sin(h)),
+                                                      count=False)
+        lod, _ = sim.tile_lods(tx, ty, t)
+        self.lod[idx] = lod
+        
+        # Center-distance thresholds of the visibility decision
+        dx = tx + t/2 - cam_pos[0]
+        dy = ty + t/2 - cam_pos[1]
+        dist = np.sqrt(dx*dx + dy*dy)
+        far = dist > sim.VISIBILITY + t
+        move = np.minimum(np.abs(dist - (sim.VISIBILITY + t)), np.abs(dist - t))
+        if sim.CURVATURE:
+            hz = sim.horizon_reach() + t * HALF_DIAGONAL # Same camera-over-terrain-max reach as the cull
+            far |= dist > hz
+            np.minimum(move, np.abs(dist - hz), out=move)
+        
+        # Nearest-point 3D distance vs the switch distances (as tile_lods)
+        gx = np.maximum(np.maximum(tx - cam_pos[0], cam_pos[0] - (tx + t)), 0.0)
+        gy = np.maximum(np.maximum(ty - cam_pos[1], cam_pos[1] - (ty + t)), 0.0)
+        ground2 = gx * gx + gy * gy
+        if sim.CURVATURE:
+            dz = sim.CAM_ALT + sim.curvature_drop(np.sqrt(ground2))
+            lipschitz = 1.0 + (sim.CAM_ALT + sim.curvature_drop(sim.VISIBILITY + 2 * t)) / sim.R_EARTH
+        else:
+            dz, lipschitz = sim.CAM_ALT, 1.0
+        d3 = np.sqrt(ground2 + dz * dz)
+        switch = np.asarray(sim._lod_config.SWITCH_DISTANCES[:-1])
+        if switch.size:
+            np.minimum(move, np.abs(d3[:, None] - switch[None, :]).min(axis=1) / lipschitz, out=move)
+        
+        # Angular margin to the padded wedge edge, only where the angle test decides
+        wedge = ~far & (dist >= t)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel = (np.degrees(np.arctan2(dy, dx)) - heading + 180.0) % 360.0 - 180.0
+            edge = sim.FOV_DEG / 2.0 + np.degrees(np.arctan(t / dist))
+            turn = np.where(wedge, np.abs(np.abs(rel) - edge), np.inf)
+            drift = np.where(wedge, self.ANGLE_DRIFT_DEG / dist, 0.0)
+        np.minimum(move, np.where(wedge, dist / 2.0, np.inf), out=move)
+        
+        self._move_expire[idx] = self._odo_move + move
+        self._drift[idx] = drift
+        self._turn_expire[idx] = self._odo_turn + self._odo_move * drift + turn
+
+    def update(self, cam_pos, heading, cam_alt=None):
+        """
+        Visibility and LOD of every tile for one pose (x, y), heading (deg,
+        CullingSim convention) and altitude (default sim.CAM_ALT), with
+        sim.FOV_DEG as the current FOV. Returns (visible, lod, n_evaluated);
+        the arrays are this object's state, updated in place.
+        Side effect: sim.CAM_POS / CAM_ALT are moved to the pose and left
+        there (tile_lods reads them); give the culler its own CullingSim if
+        the caller's camera must not move.
+        """
+        sim = self.sim
+        alt = sim.CAM_ALT if cam_alt is None else cam_alt
+        pose = (float(cam_pos[0]), float(cam_pos[1]), float(alt), float(heading), float(sim.FOV_DEG))
+        sim.CAM_POS = pose[:2]
+        sim.CAM_ALT = alt
+        if sim._lod_config is None:
+            sim._lod_config = LODCore()
+        
+        full = self._pose is None
+        if not full:
+            x, y, z, h, fov = self._pose
+            step = math.sqrt((pose[0] - x)**2 + (pose[1] - y)**2 + (pose[2] - z)**2)
+            turn = abs((pose[3] - h + 180.0) % 360.0 - 180.0) + abs(pose[4] - fov) / 2.0
+            self._odo_move += step
+            self._odo_turn += turn
+            full = step > self.max_step or turn > self.max_turn_deg or (sim.CURVATURE and pose[2] != z)
+        horizon = sim.horizon_reach() if sim.CURVATURE else None
+        full = full or horizon != self._horizon # Altitude or MAX_TERRAIN_H moved the horizon
+        self._pose = pose
+        self._horizon = horizon
+        
+        with instrumentation.stage('cull.incremental'):
+            if full:
+                idx = np.arange(self.tx.size)
+            else:
+                expired = (self._move_expire <= self._odo_move) | \
+                          (self._odo_turn + self._odo_move * self._drift >= self._turn_expire)
+                idx = np.flatnonzero(expired)
+                if idx.size > self.full_fraction * self.tx.size:
+                    idx = np.arange(self.tx.size)
+            if idx.size:
+                self._evaluate(idx, pose[:2], pose[3])
+        instrumentation.count('tiles_reevaluated', int(idx.size))
+        return self.visible, self.lod, int(idx.size)
+
 if __name__ == "__main__":
     sim = CullingSim()
     
     # Test 512m vs 1024m
-    dc_512 = sim.run_benchmark(512)
-    dc_1024 = sim.run_benchmark(1024) # Expect fewer calls
-    dc_2048 = sim.run_benchmark(2048) # Expect fewest
+    dc_512 = sim.run_benchmark(512, workload=True)
+    dc_1024 = sim.run_benchmark(1024, workload=True) # Expect fewer calls
+    dc_2048 = sim.run_benchmark(2048, workload=True) # Expect fewest
     
     print("\n--- COMPARISON ---")
     print(f"512m -> 1024m: {(dc_512/dc_1024):.2f}x more draw calls")
@@ -104,6 +976,24 @@ if __name__ == "__main__":
     else:
         print("Using 512m tiles is efficient.")
     
-    print("Recommendation: Use Hybrid.")
+    sim.run_quadtree(min_tile_size=512, max_tile_size=4096, near_field_radius=2000.0)
+    
+    # Main view + shadow cascades + mirror in one pass
+    sim.run_multiview_benchmark(512)
+    
+    # Terrain self-occlusion: 100m AGL looking up a valley
+    sim.run_occlusion_benchmark(512)
+    sim.run_occlusion_benchmark(1024)
+    
+    # Earth curvature: long-range visibility at cruise altitudes
+    # Terrain max: sea-level coast, rolling hills, the synthetic ridges' range, default (Everest)
+    print("\n--- HORIZON CULLING (150km visibility, 2048m tiles) ---")
+    for terrain_max in (0.0, 300.0, 1200.0, DEFAULT_MAX_TERRAIN_H):
+        for alt in (100.0, 300.0, 1000.0, 3000.0):
+            cruise = CullingSim(visibility=150000.0, curvature=True, max_terrain_h=terrain_max)
+            cruise.CAM_ALT = alt
+            cruise.horizon_savings(2048)
+    
+    print("\nRecommendation: Use Hybrid.")
     print("Near the camera (0-2km): Use 512m for culling.")
     print("Far field (2km+): Use 1024m or 2048m to batch draw calls.")
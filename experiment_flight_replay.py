@@ -0,0 +1,392 @@
+import argparse
+import collections
+import csv
+import math
+import random
+import time
+
+import numpy as np
+
+import instrumentation
+from experiment_culling_sim import CullingSim, IncrementalCuller
+from lod_expert_implementation import LODCore
+from lod_expert_selector import TileLODSelector
+
+# ==============================================================================
+# EXPERIMENT C: FLIGHT-PATH REPLAY
+# Streams a trajectory frame by frame through CullingSim culling and the
+# LODConfig switch distances (via TileLODSelector) and measures LOD stability
+# (transitions, pops) and the CPU cost of the pipeline itself.
+# ==============================================================================
+
+# Heading uses the CullingSim convention: 0 = East (+x), 90 = North (+y).
+# Pitch: 0 = horizon, negative = looking down. z = altitude (m).
+TrajectoryFrame = collections.namedtuple('TrajectoryFrame', 't x y z heading_deg pitch_deg roll_deg')
+
+# A transition counts as a pop if the geometry jump it leaves on screen,
+# (1 - coarse-side morph) * projected error of the boundary, exceeds this (px)
+POP_THRESHOLD_PX = 0.25
+
+
+def synthetic_trajectory(duration_s=600.0, dt=1.0 / 60.0, speed=250.0, altitude=100.0,
+                         heading_deg=90.0, pitch_deg=-12.0, turn_rate_deg_s=0.0,
+                         turbulence_deg=2.0, turbulence_tau_s=1.5, seed=0):
+    """
+    Generator of TrajectoryFrame. Pitch and roll get Ornstein-Uhlenbeck
+    turbulence (std turbulence_deg, correlation time turbulence_tau_s).
+    Frames are produced lazily, so any duration costs O(1) memory.
+    """
+    rng = random.Random(seed)
+    n_frames = int(duration_s / dt)
+    decay = math.exp(-dt / turbulence_tau_s)
+    kick = turbulence_deg * math.sqrt(1.0 - decay * decay)
+
+    x, y = 0.0, 0.0
+    heading = heading_deg
+    d_pitch = 0.0
+    d_roll = 0.0
+    for i in range(n_frames):
+        yield TrajectoryFrame(i * dt, x, y, altitude, heading, pitch_deg + d_pitch, d_roll)
+
+        d_pitch = d_pitch * decay + rng.gauss(0.0, kick)
+        d_roll = d_roll * decay + rng.gauss(0.0, kick)
+        heading += turn_rate_deg_s * dt
+        h = math.radians(heading)
+        x += speed * dt * math.cos(h)
+        y += speed * dt * math.sin(h)
+
+
+def read_trajectory_csv(path):
+    # Generator over a recorded trajectory with TrajectoryFrame columns (header row required)
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield TrajectoryFrame(*(float(row[name]) for name in TrajectoryFrame._fields))
+
+
+def rolled_fov_deg(fov_deg, roll_deg):
+    """
+    Horizontal FOV of a square frustum (CullingSim: same FOV both axes) rolled
+    by roll_deg: its ground-plane half-extent grows by |cos r| + |sin r|.
+    """
+    r = math.radians(roll_deg)
+    half = math.atan(math.tan(math.radians(fov_deg / 2.0)) * (abs(math.cos(r)) + abs(math.sin(r))))
+    return 2.0 * math.degrees(half)
+
+
+class TileWindow:
+    """
+    World-aligned square window of tiles that follows the camera.
+    When the camera crosses a tile boundary the window shifts and the LOD
+    selector state is carried over for every tile that stays in the window.
+    """
+
+    def __init__(self, tile_size, radius, config):
+        self.tile_size = tile_size
+        self.half = int(math.ceil(radius / tile_size))
+        self.width = 2 * self.half
+        self.origin = None
+        self.selector = None
+        self.src = None # Old slot per tile after the last move (None: fresh window)
+        self.config = config
+
+        a, b = np.meshgrid(np.arange(self.width), np.arange(self.width), indexing='ij')
+        self._a = a.ravel()
+        self._b = b.ravel()
+
+    def _bounds(self):
+        ts = self.tile_size
+        x0 = (self.origin[0] + self._a) * ts
+        y0 = (self.origin[1] + self._b) * ts
+        return np.stack([x0, y0, x0 + ts, y0 + ts], axis=-1).astype(np.float64)
+
+    def follow(self, x, y):
+        # Returns True if the window moved
+        origin = (math.floor(x / self.tile_size) - self.half, math.floor(y / self.tile_size) - self.half)
+        if origin == self.origin:
+            return False
+
+        if self.origin is None:
+            self.origin = origin
+            self.selector = TileLODSelector(self._bounds(), config=self.config)
+            self.src = None
+            return True
+
+        # New slot (a, b) held tile (a + dx, b + dy) in the old window
+        dx = origin[0] - self.origin[0]
+        dy = origin[1] - self.origin[1]
+        oa = self._a + dx
+        ob = self._b + dy
+        inside = (oa >= 0) & (oa < self.width) & (ob >= 0) & (ob < self.width)
+        src = np.where(inside, oa * self.width + ob, -1)
+
+        self.origin = origin
+        self.src = src
+        self.selector.remap_tiles(self._bounds(), src)
+        return True
+
+
+def replay(trajectory, tile_size=512, pitch_mode='locked', sim=None, config=None):
+    """
+    Generator: consumes trajectory frames one at a time and yields one
+    per-frame record (dict). Nothing is accumulated across frames.
+    pitch_mode 'locked' uses LODConfig.PITCH_SCALAR; 'raw' uses |cos(pitch)| per frame.
+    """
+    if pitch_mode not in ('locked', 'raw'):
+        raise ValueError(f"Unknown pitch_mode: {pitch_mode!r}")
+    sim = sim or CullingSim()
+    config = config or LODCore()
+    base_fov = sim.FOV_DEG
+    window = TileWindow(tile_size, sim.VISIBILITY + tile_size, config)
+
+    try:
+        for i, frame in enumerate(trajectory):
+            t0 = time.perf_counter()
+
+            window.follow(frame.x, frame.y)
+            selector = window.selector
+            bounds_x0 = selector.x0
+            bounds_y0 = selector.y0
+
+            # 1. Culling (2D wedge, widened by roll)
+            h = math.radians(frame.heading_deg)
+            sim.FOV_DEG = rolled_fov_deg(base_fov, frame.roll_deg)
+            visible = sim.is_tile_visible_batch(bounds_x0, bounds_y0, tile_size,
+                                                cam_pos=(frame.x, frame.y),
+                                                cam_dir=(math.cos(h), math.sin(h)))
+
+            # 2. LOD selection with hysteresis
+            if pitch_mode == 'raw':
+                error_scale = abs(math.cos(math.radians(frame.pitch_deg))) / config.PITCH_SCALAR
+            else:
+                error_scale = 1.0
+            prev_lod = selector.lod.copy()
+            prev_morph = selector.morph.copy()
+            lod, morph, changed = selector.update((frame.x, frame.y, frame.z), error_scale)
+
+            # 3. Transitions & pops (only what is on screen counts)
+            seen = np.nonzero(changed & visible)[0]
+            old = prev_lod[seen]
+            new = lod[seen]
+            # Coarse-side morph: LOD i's factor toward i+1 on the finer side of the boundary
+            mu = np.where(new > old, prev_morph[seen], morph[seen])
+            boundary = np.minimum(old, new)
+            rho = selector.switch_dist[boundary] * config.SSE_THRESHOLD / selector.dist[seen]
+            pops = (1.0 - mu) * rho > POP_THRESHOLD_PX
+
+            t1 = time.perf_counter()
+            frame_s = t1 - t0
+            if instrumentation.ACTIVE is not None:
+                instrumentation.ACTIVE.record('replay.frame', t0, t1)
+                instrumentation.ACTIVE.count('pops', int(np.count_nonzero(pops)))
+            yield {
+                "frame": i,
+                "t": frame.t,
+                "visible_tiles": int(np.count_nonzero(visible)),
+                "lod_transitions": int(seen.size),
+                "pops": int(np.count_nonzero(pops)),
+                "frame_ms": frame_s * 1000.0,
+            }
+    finally:
+        # Generator: also runs on close() / errors mid-replay
+        sim.FOV_DEG = base_fov
+
+
+def run_replay(trajectory, tile_size=512, pitch_mode='locked', csv_path=None, label=None):
+    """
+    Drives replay() to completion, optionally streaming per-frame rows to CSV,
+    and prints/returns a summary.
+    """
+    print(f"\n--- FLIGHT REPLAY: {label or pitch_mode} ({tile_size}m tiles, {pitch_mode} pitch) ---")
+    frames = 0
+    transitions = 0
+    pops = 0
+    visible_sum = 0
+    visible_max = 0
+    pipeline_s = 0.0
+    worst_ms = 0.0
+
+    out = open(csv_path, 'w', newline='') if csv_path else None
+    writer = None
+    try:
+        for rec in replay(trajectory, tile_size, pitch_mode):
+            if out:
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(rec))
+                    writer.writeheader()
+                writer.writerow(rec)
+            frames += 1
+            transitions += rec["lod_transitions"]
+            pops += rec["pops"]
+            visible_sum += rec["visible_tiles"]
+            visible_max = max(visible_max, rec["visible_tiles"])
+            pipeline_s += rec["frame_ms"] / 1000.0
+            worst_ms = max(worst_ms, rec["frame_ms"])
+    finally:
+        if out:
+            out.close()
+
+    fps = frames / pipeline_s if pipeline_s else 0.0
+    print(f"Frames: {frames}")
+    print(f"Visible Tiles: mean {visible_sum / max(frames, 1):.1f} | max {visible_max}")
+    print(f"LOD Transitions (visible): {transitions}")
+    print(f"Pop Events (unmorphed transitions): {pops}")
+    print(f"Pipeline: {fps:.0f} frames/s | worst frame {worst_ms:.3f} ms")
+    return {
+        "frames": frames,
+        "lod_transitions": transitions,
+        "pops": pops,
+        "visible_mean": visible_sum / max(frames, 1),
+        "visible_max": visible_max,
+        "pipeline_fps": fps,
+        "worst_frame_ms": worst_ms,
+    }
+
+
+def incremental_replay(trajectory, tile_size=512, sim=None, config=None, verify=True):
+    """
+    Generator: per frame, culls and assigns LODs (CullingSim.tile_lods) for
+    the tile window both with a full recomputation and with an
+    IncrementalCuller carried across frames, and yields the re-evaluated
+    fraction, both timings and (verify=True) the tiles where they disagree.
+    sim's FOV_DEG, CAM_POS and CAM_ALT follow the flight and are restored
+    when the generator finishes or is closed.
+    """
+    sim = sim or CullingSim()
+    config = config or LODCore()
+    base_fov = sim.FOV_DEG
+    base_pos, base_alt = sim.CAM_POS, sim.CAM_ALT
+    window = TileWindow(tile_size, sim.VISIBILITY + tile_size, config)
+    culler = None
+
+    try:
+        for i, frame in enumerate(trajectory):
+            sim.FOV_DEG = rolled_fov_deg(base_fov, frame.roll_deg)
+            h = math.radians(frame.heading_deg)
+
+            # Incremental: carry state across window shifts, re-evaluate expired tiles
+            t0 = time.perf_counter()
+            if window.follow(frame.x, frame.y):
+                tx = window.selector.x0.astype(np.float64)
+                ty = window.selector.y0.astype(np.float64)
+                if culler is None:
+                    culler = IncrementalCuller(sim, tx, ty, tile_size)
+                elif window.src is None:
+                    culler.set_tiles(tx, ty)
+                else:
+                    culler.remap_tiles(tx, ty, window.src)
+            visible, lod, evaluated = culler.update((frame.x, frame.y), frame.heading_deg, frame.z)
+            t1 = time.perf_counter()
+
+            # Full recomputation of the same frame
+            sim.CAM_POS = (frame.x, frame.y)
+            sim.CAM_ALT = frame.z
+            full_visible = sim.is_tile_visible_batch(culler.tx, culler.ty, tile_size,
+                                                     cam_pos=(frame.x, frame.y), cam_dir=(math.cos(h), math.sin(h)),
+                                                     count=False)
+            full_lod, _ = sim.tile_lods(culler.tx, culler.ty, tile_size)
+            t2 = time.perf_counter()
+
+            mismatches = int(np.count_nonzero((visible != full_visible) | (lod != full_lod))) if verify else 0
+            yield {
+                "frame": i,
+                "t": frame.t,
+                "tiles": int(culler.tx.size),
+                "reevaluated": evaluated,
+                "reevaluated_fraction": evaluated / culler.tx.size,
+                "incremental_ms": (t1 - t0) * 1000.0,
+                "full_ms": (t2 - t1) * 1000.0,
+                "mismatches": mismatches,
+            }
+    finally:
+        # Generator: also runs on close() / errors mid-replay
+        sim.FOV_DEG = base_fov
+        sim.CAM_POS, sim.CAM_ALT = base_pos, base_alt
+
+
+def run_incremental_replay(trajectory, tile_size=512, csv_path=None, label=None):
+    """
+    Drives incremental_replay() to completion, optionally streaming per-frame
+    rows to CSV, and prints/returns the re-evaluated fraction and speed-up.
+    """
+    print(f"\n--- INCREMENTAL CULLING REPLAY: {label or 'synthetic'} ({tile_size}m tiles) ---")
+    fractions = []
+    inc_ms = 0.0
+    full_ms = 0.0
+    full_passes = 0
+    mismatches = 0
+
+    out = open(csv_path, 'w', newline='') if csv_path else None
+    writer = None
+    try:
+        for rec in incremental_replay(trajectory, tile_size):
+            if out:
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(rec))
+                    writer.writeheader()
+                writer.writerow(rec)
+            fractions.append(rec["reevaluated_fraction"])
+            inc_ms += rec["incremental_ms"]
+            full_ms += rec["full_ms"]
+            full_passes += rec["reevaluated"] == rec["tiles"]
+            mismatches += rec["mismatches"]
+    finally:
+        if out:
+            out.close()
+
+    fractions = np.asarray(fractions)
+    frames = max(fractions.size, 1)
+    print(f"Frames: {fractions.size} | Full Passes: {full_passes}")
+    print(f"Re-evaluated: mean {fractions.mean() * 100.0:.2f}% | p50 {np.percentile(fractions, 50) * 100.0:.2f}% | "
+          f"p99 {np.percentile(fractions, 99) * 100.0:.2f}%")
+    print(f"Frame Cost: full {full_ms / frames:.3f} ms | incremental {inc_ms / frames:.3f} ms | "
+          f"speed-up {full_ms / inc_ms:.2f}x")
+    print(f"Mismatches vs Full Recompute: {mismatches}")
+    return {
+        "frames": int(fractions.size),
+        "full_passes": full_passes,
+        "reevaluated_mean": float(fractions.mean()),
+        "full_ms_mean": full_ms / frames,
+        "incremental_ms_mean": inc_ms / frames,
+        "speedup": full_ms / inc_ms,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a trajectory through culling and LOD selection.")
+    parser.add_argument('trajectory', nargs='?', help="Recorded trajectory CSV (default: synthetic turbulent flight)")
+    parser.add_argument('--tile-size', type=int, default=512)
+    parser.add_argument('--pitch-mode', choices=['locked', 'raw', 'both'], default='both')
+    parser.add_argument('--duration', type=float, default=120.0, help="Synthetic flight length (s)")
+    parser.add_argument('--csv', help="Per-frame output CSV (single pitch mode only)")
+    parser.add_argument('--trace', help="Enable instrumentation and write a Chrome trace JSON here")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Also compare incremental (temporal-coherence) culling with full recomputation")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        instrumentation.enable()
+
+    modes = ['locked', 'raw'] if args.pitch_mode == 'both' else [args.pitch_mode]
+    for mode in modes:
+        if args.trajectory:
+            traj = read_trajectory_csv(args.trajectory)
+        else:
+            traj = synthetic_trajectory(duration_s=args.duration, turn_rate_deg_s=0.5)
+        run_replay(traj, args.tile_size, mode, csv_path=args.csv if len(modes) == 1 else None)
+
+    if args.incremental:
+        if args.trajectory:
+            traj = read_trajectory_csv(args.trajectory)
+        else:
+            traj = synthetic_trajectory(duration_s=args.duration, turn_rate_deg_s=0.5)
+        run_incremental_replay(traj, args.tile_size, label=args.trajectory)
+
+    if args.trace:
+        prof = instrumentation.disable()
+        prof.print_summary()
+        print(f"Chrome trace written: {prof.write_chrome_trace(args.trace)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
+import argparse
+import concurrent.futures
 import math
 import random
 
+import numpy as np
+
 # ==============================================================================
 # EXPERIMENT A: ROTATION INVARIANCE
 # Comparing "Locked Pitch" vs "Bounding Sphere" Approaches
 # ==============================================================================
 
+# Monte Carlo: log2(estimate / true) histogram range and resolution
+MC_LOG2_RANGE = (-8.0, 8.0)
+MC_BINS = 4096
+MC_CHUNK = 1 << 20
+MC_LOCK_CANDIDATES = [0.0, -5.0, -10.0, -15.0, -20.0, -30.0, -45.0]
+# Over-estimation counted as "OVER (Wasteful)" past this factor, as in run_simulation
+MC_OVER_FACTOR = 1.5
+
 class ExperimentConfig:
     def __init__(self):
         self.SCREEN_H = 1024.0
@@ -55,6 +67,115 @@ class ExperimentConfig:
         view_scale = 1.0 
         return (self.GEOM_ERROR * view_scale * self.K_PERSPECTIVE) / self.DISTANCE
 
+    def projected_errors(self, pitch_deg, geom_error, distance, lock_pitches=(-15.0,)):
+        """
+        Vectorized get_true_projected_error / get_locked_pitch_error /
+        get_bounding_sphere_error over sample arrays (pitch already including
+        turbulence). Returns (true, locked, sphere) in pixels, locked as
+        {lock pitch (deg): array} for each of lock_pitches.
+        """
+        base = np.asarray(geom_error, dtype=np.float64) * self.K_PERSPECTIVE / np.asarray(distance, dtype=np.float64)
+        true = base * np.abs(np.cos(np.radians(pitch_deg)))
+        locked = {lock: base * abs(math.cos(math.radians(lock))) for lock in lock_pitches}
+        return true, locked, base
+
+def _mc_chunk(seed_seq, n, pitch_range, turbulence_deg, distance_range, error_range, lock_candidates):
+    """
+    One Monte Carlo chunk (process pool worker). Samples pitch (uniform +
+    Gaussian turbulence), distance and geometric error (log-uniform) and
+    returns per-strategy histograms of log2(estimate / true) plus pixel sums.
+    Strategies: 'sphere' and one 'locked' entry per lock candidate.
+    """
+    rng = np.random.default_rng(seed_seq)
+    sim = ExperimentConfig()
+    pitch = rng.uniform(*pitch_range, n) + rng.normal(0.0, turbulence_deg, n)
+    distance = np.exp(rng.uniform(*np.log(distance_range), n))
+    geom_error = np.exp(rng.uniform(*np.log(error_range), n))
+
+    true, locked, sphere = sim.projected_errors(pitch, geom_error, distance, lock_candidates)
+    estimates = {'sphere': sphere, **locked}
+
+    out = {}
+    with np.errstate(divide='ignore'):
+        for name, est in estimates.items():
+            log_ratio = np.clip(np.log2(est / true), *MC_LOG2_RANGE)
+            under = est < true
+            over = est > true * MC_OVER_FACTOR
+            out[name] = {
+                "hist": np.histogram(log_ratio, bins=MC_BINS, range=MC_LOG2_RANGE)[0],
+                "under": int(np.count_nonzero(under)),
+                "over": int(np.count_nonzero(over)),
+                "clipped": int(np.count_nonzero(log_ratio >= MC_LOG2_RANGE[1])),
+                "shortfall_px": float((true - est)[under].sum()),
+                "excess_px": float((est - true)[~under].sum()),
+            }
+    return out
+
+def run_monte_carlo(n_samples=4_000_000, seed=0, workers=1, pitch_range=(-90.0, 0.0), turbulence_deg=2.0,
+                    distance_range=(500.0, 20000.0), error_range=(0.1, 10.0),
+                    lock_candidates=MC_LOCK_CANDIDATES, chunk=MC_CHUNK):
+    """
+    Seeded, vectorized Monte Carlo over (pitch, turbulence, distance,
+    geometric error). Chunks get independent SeedSequence children, so the
+    result is identical for any worker count.
+    Under-estimation (estimate < true) is pop risk; over-estimation wastes
+    triangles: switch distance scales with the estimate, so tile area and
+    triangle load grow with (estimate / true)^2.
+    Returns {strategy: stats} with strategy 'sphere' or a lock pitch (deg).
+    """
+    n_chunks = (n_samples + chunk - 1) // chunk
+    sizes = [min(chunk, n_samples - i * chunk) for i in range(n_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    jobs = [(seeds[i], sizes[i], pitch_range, turbulence_deg, distance_range, error_range, list(lock_candidates))
+            for i in range(n_chunks)]
+
+    if workers == 1:
+        parts = [_mc_chunk(*job) for job in jobs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_mc_chunk, *zip(*jobs)))
+
+    edges = np.linspace(*MC_LOG2_RANGE, MC_BINS + 1)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+    results = {}
+    for name in parts[0]:
+        hist = sum(part[name]["hist"] for part in parts)
+        cdf = np.cumsum(hist) / n_samples
+        ratio = 2.0 ** centers
+        results[name] = {
+            "samples": n_samples,
+            "under_fraction": sum(part[name]["under"] for part in parts) / n_samples,
+            "over_fraction": sum(part[name]["over"] for part in parts) / n_samples,
+            "mean_shortfall_px": sum(part[name]["shortfall_px"] for part in parts) / n_samples,
+            "mean_excess_px": sum(part[name]["excess_px"] for part in parts) / n_samples,
+            # (estimate / true) percentiles, resolution (MC_LOG2_RANGE width / MC_BINS) in log2
+            "ratio_p01": float(2.0 ** centers[np.searchsorted(cdf, 0.01)]),
+            "ratio_p50": float(2.0 ** centers[np.searchsorted(cdf, 0.50)]),
+            "ratio_p99": float(2.0 ** centers[min(np.searchsorted(cdf, 0.99), MC_BINS - 1)]),
+            # Mean over all samples of the triangle factor max(estimate / true, 1)^2, ratio clipped at
+            # 2^MC_LOG2_RANGE[1] (near-nadir samples with true ~ 0 pile up there and dominate the mean)
+            "clipped_fraction": sum(part[name]["clipped"] for part in parts) / n_samples,
+            "triangle_factor": float((hist * np.where(ratio > 1.0, ratio * ratio, 1.0)).sum() / n_samples),
+        }
+    return results
+
+def print_monte_carlo(results, n_samples, pitch_range, turbulence_deg):
+    print(f"\n--- MONTE CARLO: {n_samples:,} samples, pitch {pitch_range[0]:.0f}..{pitch_range[1]:.0f} deg "
+          f"+ N(0, {turbulence_deg} deg) turbulence ---")
+    print(f"{'Strategy':<14} | {'Under%':>7} | {'Over>1.5x%':>10} | {'Short(px)':>9} | {'Excess(px)':>10} | "
+          f"{'Ratio p1/p50/p99':>20} | {'Tri Factor':>10} | {'Clipped%':>8}")
+    print("-" * 111)
+    for name, r in results.items():
+        label = name if isinstance(name, str) else f"lock {name:.0f} deg"
+        ratios = f"{r['ratio_p01']:.2f}/{r['ratio_p50']:.2f}/{r['ratio_p99']:.2f}"
+        print(f"{label:<14} | {r['under_fraction'] * 100.0:>7.2f} | {r['over_fraction'] * 100.0:>10.2f} | "
+              f"{r['mean_shortfall_px']:>9.3f} | {r['mean_excess_px']:>10.3f} | {ratios:>20} | {r['triangle_factor']:>9.2f}x | "
+              f"{r['clipped_fraction'] * 100.0:>8.2f}")
+    print("Under = estimate < true (pop risk). Tri Factor = mean over all samples of max(estimate / true, 1)^2, "
+          "the triangle load vs ideal.")
+    print(f"Ratios are clipped at 2^{MC_LOG2_RANGE[1]:.0f} = {2.0 ** MC_LOG2_RANGE[1]:.0f}x; Clipped% = samples at "
+          f"that bound (Tri Factor is a lower bound there).")
+
 def run_simulation():
     sim = ExperimentConfig()
     
@@ -101,5 +222,19 @@ def run_simulation():
     print("   -> Safe: Never pops.")
     print("   -> Wasteful: When looking down (-90), we calculate 10px error when True is 0px.")
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rotation invariance: locked pitch vs bounding sphere.")
+    parser.add_argument('--samples', type=int, default=4_000_000, help="Monte Carlo samples (0 = skip)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="Process pool size for the Monte Carlo")
+    parser.add_argument('--pitch-range', type=float, nargs=2, default=[-90.0, 0.0])
+    parser.add_argument('--turbulence', type=float, default=2.0, help="Turbulence std (deg)")
+    args = parser.parse_args(argv)
+
     run_simulation()
+    if args.samples > 0:
+        results = run_monte_carlo(args.samples, args.seed, args.workers, tuple(args.pitch_range), args.turbulence)
+        print_monte_carlo(results, args.samples, args.pitch_range, args.turbulence)
+
+if __name__ == "__main__":
+    main()
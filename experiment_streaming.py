@@ -0,0 +1,316 @@
+import argparse
+import collections
+import math
+
+import numpy as np
+
+from experiment_culling_sim import CullingSim
+from experiment_flight_replay import read_trajectory_csv, synthetic_trajectory
+from lod_expert_implementation import LODCore
+
+# ==============================================================================
+# EXPERIMENT D: PREDICTIVE TILE STREAMING
+# Which tiles (and at which LOD) must be resident ahead of the aircraft?
+# Replays a trajectory, predicts the tile set N seconds ahead by dead
+# reckoning, orders load requests by projected screen-space error and keeps
+# a byte-budgeted LRU cache fed by a simulated (latency + bandwidth) store.
+# ==============================================================================
+
+LOD0_SPACING = 2.0   # m between heightmap posts at LOD 0 (CullingSim.LOD0_SPACING)
+BYTES_PER_SAMPLE = 4 # float32 heights
+
+
+def tile_bytes(level, tile_size, lod0_spacing=LOD0_SPACING, bytes_per_sample=BYTES_PER_SAMPLE):
+    # Payload of one (tile_size x tile_size) tile at LOD level: (n + 1)^2 posts
+    side = max(int(tile_size / (lod0_spacing * 2**level)), 1) + 1
+    return side * side * bytes_per_sample
+
+
+class LocalTileStore:
+    """
+    Local stand-in for a disk / network tile store. Nothing is read: each
+    request occupies one of `channels` transfer slots for
+    latency_s + bytes / bandwidth and completes at a simulated time.
+    """
+
+    def __init__(self, tile_size=512, latency_s=0.030, bandwidth=100e6, channels=4,
+                 bytes_per_sample=BYTES_PER_SAMPLE):
+        self.tile_size = tile_size
+        self.latency_s = latency_s
+        self.bandwidth = bandwidth # bytes/s per channel
+        self.bytes_per_sample = bytes_per_sample
+        self._busy_until = [0.0] * channels
+        self.bytes_served = 0
+
+    def tile_bytes(self, key):
+        return tile_bytes(key[0], self.tile_size, bytes_per_sample=self.bytes_per_sample)
+
+    def submit(self, key, now):
+        # Queues one tile load, returns (ready_time, nbytes)
+        nbytes = self.tile_bytes(key)
+        slot = min(range(len(self._busy_until)), key=self._busy_until.__getitem__)
+        start = max(now, self._busy_until[slot])
+        ready = start + self.latency_s + nbytes / self.bandwidth
+        self._busy_until[slot] = ready
+        self.bytes_served += nbytes
+        return ready, nbytes
+
+
+class TileCache:
+    """
+    Byte-budgeted LRU cache of resident tiles, keyed by (level, ix, iy).
+    Tiles needed by the current frame or its prediction are touched every
+    step, so eviction always takes the tile unused for longest.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = collections.OrderedDict() # key -> nbytes, LRU first
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def touch(self, key):
+        self.entries.move_to_end(key)
+
+    def insert(self, key, nbytes):
+        # Returns False if the tile alone exceeds the budget
+        if nbytes > self.budget_bytes:
+            return False
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True
+        while self.bytes + nbytes > self.budget_bytes:
+            _, freed = self.entries.popitem(last=False)
+            self.bytes -= freed
+            self.evictions += 1
+        self.entries[key] = nbytes
+        self.bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+        return True
+
+
+class StreamingScheduler:
+    """
+    Per-step tile residency planning for one camera.
+    Needed tiles = CullingSim-visible tiles at the LOD their nearest point
+    needs under the LODCore switch distances. Requests are ranked by the
+    screen-space error the tile would leave if missing, errors[lod] * K *
+    PitchScalar / distance, current misses first, then predicted ones.
+    """
+
+    def __init__(self, store, cache, config=None, tile_size=512, visibility=20000.0, fov_deg=12.0,
+                 lookahead_s=5.0, lookahead_steps=5, max_in_flight=64):
+        config = config or LODCore()
+        self.store = store
+        self.cache = cache
+        self.tile_size = tile_size
+        self.lookahead_s = lookahead_s
+        self.lookahead_steps = lookahead_steps
+        self.max_in_flight = max_in_flight
+        self.sim = CullingSim(fov_deg=fov_deg, visibility=visibility)
+
+        self.switch = np.asarray(config.SWITCH_DISTANCES, dtype=np.float64)
+        self.sse_numerator = np.asarray(config.ERRORS, dtype=np.float64) * config.K_PERSPECTIVE * config.PITCH_SCALAR
+
+        # Candidate window around the camera: (2h)^2 tile offsets
+        half = int(math.ceil((visibility + tile_size) / tile_size))
+        a, b = np.meshgrid(np.arange(-half, half), np.arange(-half, half), indexing='ij')
+        self._da = a.ravel()
+        self._db = b.ravel()
+
+        self.in_flight = {} # key -> (ready_time, nbytes)
+        self.oversize = set() # Loaded tiles larger than the whole cache budget (never re-requested)
+        self._prev = None
+
+        # The finest tile is the largest: a budget below it could never hold the near field
+        if store is not None and cache is not None and store.tile_bytes((0, 0, 0)) > cache.budget_bytes:
+            raise ValueError(f"Cache budget {cache.budget_bytes} B is below one LOD 0 tile "
+                             f"({store.tile_bytes((0, 0, 0))} B at {tile_size} m)")
+
+    def needed_tiles(self, x, y, z, heading_deg):
+        """
+        Tiles needed for one pose: dict {(level, ix, iy): projected_sse}.
+        """
+        ts = self.tile_size
+        ix = math.floor(x / ts) + self._da
+        iy = math.floor(y / ts) + self._db
+        tx = ix * float(ts)
+        ty = iy * float(ts)
+        h = math.radians(heading_deg)
+        visible = self.sim.is_tile_visible_batch(tx, ty, ts, cam_pos=(x, y), cam_dir=(math.cos(h), math.sin(h)),
+                                                 count=False)
+        ix, iy, tx, ty = ix[visible], iy[visible], tx[visible], ty[visible]
+
+        gx = np.maximum(np.maximum(tx - x, x - (tx + ts)), 0.0)
+        gy = np.maximum(np.maximum(ty - y, y - (ty + ts)), 0.0)
+        dist = np.sqrt(gx * gx + gy * gy + z * z)
+        lod = np.searchsorted(self.switch[:-1], dist, side='right')
+        sse = self.sse_numerator[lod] / np.maximum(dist, 1.0)
+        return dict(zip(zip(lod.tolist(), ix.tolist(), iy.tolist()), sse.tolist()))
+
+    def step(self, now, frame):
+        """
+        Advances the scheduler to frame (TrajectoryFrame at time now):
+        lands finished loads, checks residency of the current tile set,
+        predicts ahead and submits new requests. Returns a per-step record.
+        """
+        # 1. Land loads that finished by now
+        landed = [key for key, (ready, _) in self.in_flight.items() if ready <= now]
+        for key in landed:
+            _, nbytes = self.in_flight.pop(key)
+            if not self.cache.insert(key, nbytes):
+                self.oversize.add(key)
+
+        # 2. Residency of what this frame draws
+        current = self.needed_tiles(frame.x, frame.y, frame.z, frame.heading_deg)
+        late = []
+        for key in current:
+            if key in self.cache:
+                self.cache.touch(key)
+            else:
+                late.append(key)
+
+        # 3. Dead-reckoned prediction from the last two frames
+        predicted = {}
+        if self._prev is not None and self.lookahead_s > 0.0:
+            dt = frame.t - self._prev.t
+            if dt > 0.0:
+                vx = (frame.x - self._prev.x) / dt
+                vy = (frame.y - self._prev.y) / dt
+                vz = (frame.z - self._prev.z) / dt
+                turn = ((frame.heading_deg - self._prev.heading_deg + 180.0) % 360.0 - 180.0) / dt
+                for ahead in np.linspace(self.lookahead_s / self.lookahead_steps, self.lookahead_s,
+                                         self.lookahead_steps):
+                    tiles = self.needed_tiles(frame.x + vx * ahead, frame.y + vy * ahead,
+                                              max(frame.z + vz * ahead, 1.0), frame.heading_deg + turn * ahead)
+                    for key, sse in tiles.items():
+                        if sse > predicted.get(key, 0.0):
+                            predicted[key] = sse
+        self._prev = frame
+        for key in predicted:
+            if key in self.cache:
+                self.cache.touch(key)
+
+        # 4. Requests: current misses, then predicted misses, each by projected SSE
+        late_oversize = sum(1 for k in late if k in self.oversize)
+        requests = sorted((k for k in late if k not in self.in_flight and k not in self.oversize),
+                          key=current.__getitem__, reverse=True)
+        requests += sorted((k for k in predicted if k not in current and k not in self.cache and k not in self.in_flight
+                            and k not in self.oversize), key=predicted.__getitem__, reverse=True)
+        submitted = 0
+        loaded_bytes = 0
+        for key in requests[:max(self.max_in_flight - len(self.in_flight), 0)]:
+            ready, nbytes = self.store.submit(key, now)
+            self.in_flight[key] = (ready, nbytes)
+            submitted += 1
+            loaded_bytes += nbytes
+
+        return {
+            "t": frame.t,
+            "needed": len(current),
+            "hits": len(current) - len(late),
+            "late": len(late),
+            "late_oversize": late_oversize,
+            "predicted": len(predicted),
+            "requests": submitted,
+            "bytes_requested": loaded_bytes,
+            "cache_bytes": self.cache.bytes,
+            "in_flight": len(self.in_flight),
+        }
+
+
+def run_streaming(trajectory, tile_size=512, lookahead_s=5.0, budget_mb=128.0, latency_ms=30.0,
+                  bandwidth_mbps=100.0, channels=4, warmup_s=5.0, label=None):
+    """
+    Drives a StreamingScheduler over a trajectory and prints/returns a summary:
+    cache hit rate, late tiles (needed but not resident) and bytes loaded per second.
+    The first warmup_s seconds (cold cache fill) are simulated but not scored.
+    """
+    print(f"\n--- STREAMING: {label or f'{lookahead_s:.0f}s lookahead'} "
+          f"({tile_size}m tiles, {budget_mb:.0f} MB cache, {latency_ms:.0f} ms, {bandwidth_mbps:.0f} MB/s x {channels}) ---")
+    store = LocalTileStore(tile_size, latency_ms / 1000.0, bandwidth_mbps * 1e6, channels)
+    cache = TileCache(int(budget_mb * 1e6))
+    scheduler = StreamingScheduler(store, cache, tile_size=tile_size, lookahead_s=lookahead_s)
+
+    steps = 0
+    needed = 0
+    hits = 0
+    late = 0
+    late_steps = 0
+    oversize = 0
+    t_first = None
+    t_last = 0.0
+    bytes_first = 0
+    for frame in trajectory:
+        rec = scheduler.step(frame.t, frame)
+        if t_first is None:
+            t_first = frame.t
+        if frame.t - t_first < warmup_s:
+            bytes_first = store.bytes_served
+            continue
+        t_last = frame.t
+        steps += 1
+        needed += rec["needed"]
+        hits += rec["hits"]
+        late += rec["late"]
+        late_steps += rec["late"] > 0
+        oversize += rec["late_oversize"]
+
+    duration = max(t_last - (t_first or 0.0) - warmup_s, 1e-9)
+    hit_rate = hits / needed if needed else 1.0
+    scored_bytes = store.bytes_served - bytes_first
+    mb_per_s = scored_bytes / duration / 1e6
+    print(f"Steps: {steps} | Scored Time: {duration:.1f} s (after {warmup_s:.0f} s warm-up)")
+    print(f"Cache Hit Rate: {hit_rate * 100.0:.2f}% ({hits}/{needed} tile-frames)")
+    print(f"Late Tiles: {late} tile-frames over {late_steps} steps")
+    if scheduler.oversize:
+        print(f"WARNING: {len(scheduler.oversize)} tiles exceed the {budget_mb:.0f} MB cache and are skipped "
+              f"({oversize} late tile-frames)")
+    print(f"Loaded: {scored_bytes / 1e6:.1f} MB -> {mb_per_s:.2f} MB/s (cold fill {bytes_first / 1e6:.1f} MB)")
+    print(f"Cache: peak {cache.peak_bytes / 1e6:.1f} MB | {cache.evictions} evictions")
+    return {
+        "steps": steps,
+        "hit_rate": hit_rate,
+        "late_tiles": late,
+        "late_steps": late_steps,
+        "oversize_tiles": len(scheduler.oversize),
+        "bytes_loaded": scored_bytes,
+        "mb_per_s": mb_per_s,
+        "peak_cache_bytes": cache.peak_bytes,
+        "evictions": cache.evictions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predictive tile streaming with an LRU byte-budgeted cache.")
+    parser.add_argument('trajectory', nargs='?', help="Recorded trajectory CSV (default: synthetic flight)")
+    parser.add_argument('--speed', type=float, default=340.0, help="Synthetic ground speed (m/s, default Mach 1)")
+    parser.add_argument('--duration', type=float, default=60.0, help="Synthetic flight length (s)")
+    parser.add_argument('--dt', type=float, default=0.1, help="Scheduler step (s)")
+    parser.add_argument('--tile-size', type=int, default=512)
+    parser.add_argument('--lookahead', type=float, nargs='+', default=[0.0, 2.0, 5.0])
+    parser.add_argument('--budget-mb', type=float, default=128.0)
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--bandwidth-mbps', type=float, default=100.0, help="Per channel (MB/s)")
+    parser.add_argument('--channels', type=int, default=4)
+    parser.add_argument('--warmup', type=float, default=5.0, help="Unscored cold-start time (s)")
+    args = parser.parse_args(argv)
+
+    for lookahead in args.lookahead:
+        if args.trajectory:
+            traj = read_trajectory_csv(args.trajectory)
+        else:
+            traj = synthetic_trajectory(duration_s=args.duration, dt=args.dt, speed=args.speed, turn_rate_deg_s=1.0)
+        run_streaming(traj, args.tile_size, lookahead, args.budget_mb, args.latency_ms,
+                      args.bandwidth_mbps, args.channels, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
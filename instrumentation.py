@@ -0,0 +1,186 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# ==============================================================================
+# OPT-IN HOT-PATH INSTRUMENTATION
+# Per-stage timers and counters for culling / LOD code, exportable as Chrome
+# trace-event JSON (chrome://tracing, Perfetto) and as a flat summary.
+#
+# Disabled by default: ACTIVE is None and every hook is a single global check
+# (stage() hands back a shared no-op context manager).
+#
+#   with instrumentation.profiling() as prof:
+#       sim.run_benchmark(512)
+#   prof.print_summary()
+#   prof.write_chrome_trace('trace.json')
+# ==============================================================================
+
+# The enabled Profiler, or None. Hot paths test this directly.
+ACTIVE = None
+
+# Culling outcome codes shared by the scalar and batch culling paths
+CULL_VISIBLE = 0
+CULL_DISTANCE = 1
+CULL_ANGLE = 2
+CULL_HORIZON = 3
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Profiler:
+    """
+    Collects per-stage wall time (complete 'X' trace events plus running
+    totals) and named counters. Stages nest; counters are sampled into the
+    trace whenever an outermost stage closes.
+    max_events bounds trace memory on long runs; totals keep accumulating
+    after the cap is reached.
+    """
+
+    def __init__(self, max_events=1_000_000):
+        self.max_events = max_events
+        self.events = []
+        self.dropped_events = 0
+        self.counters = {}
+        self.stage_totals = {} # name -> [calls, total_s, max_s]
+        self._depth = 0
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _us(self, t):
+        return (t - self._t0) * 1e6
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._depth -= 1
+            self.record(name, start, end)
+            if self._depth == 0:
+                self._sample_counters(end)
+
+    def record(self, name, start, end):
+        # Adds one completed stage [start, end) in perf_counter seconds
+        elapsed = end - start
+        total = self.stage_totals.get(name)
+        if total is None:
+            self.stage_totals[name] = [1, elapsed, elapsed]
+        else:
+            total[0] += 1
+            total[1] += elapsed
+            if elapsed > total[2]:
+                total[2] = elapsed
+        self._append({"name": name, "cat": "stage", "ph": "X", "ts": self._us(start),
+                      "dur": elapsed * 1e6, "pid": self._pid, "tid": threading.get_ident()})
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_cull(self, reason, n=1):
+        # One culling outcome (CULL_VISIBLE / CULL_DISTANCE / CULL_ANGLE / CULL_HORIZON)
+        counters = self.counters
+        counters['tiles_tested'] = counters.get('tiles_tested', 0) + n
+        if reason == CULL_DISTANCE:
+            counters['rejected_distance'] = counters.get('rejected_distance', 0) + n
+        elif reason == CULL_ANGLE:
+            counters['rejected_angle'] = counters.get('rejected_angle', 0) + n
+        elif reason == CULL_HORIZON:
+            counters['rejected_horizon'] = counters.get('rejected_horizon', 0) + n
+
+    def _sample_counters(self, t):
+        if self.counters:
+            self._append({"name": "counters", "cat": "counter", "ph": "C", "ts": self._us(t),
+                          "pid": self._pid, "tid": 0, "args": dict(self.counters)})
+
+    def _append(self, event):
+        if len(self.events) < self.max_events:
+            self.events.append(event)
+        else:
+            self.dropped_events += 1
+
+    def summary(self):
+        """
+        Flat {key: number} summary: 'stage.<name>.calls|total_ms|mean_ms|max_ms'
+        per stage and 'counter.<name>' per counter.
+        """
+        flat = {}
+        for name, (calls, total, worst) in self.stage_totals.items():
+            flat[f"stage.{name}.calls"] = calls
+            flat[f"stage.{name}.total_ms"] = total * 1000.0
+            flat[f"stage.{name}.mean_ms"] = total * 1000.0 / calls
+            flat[f"stage.{name}.max_ms"] = worst * 1000.0
+        for name, value in self.counters.items():
+            flat[f"counter.{name}"] = value
+        return flat
+
+    def print_summary(self):
+        print("\n--- INSTRUMENTATION SUMMARY ---")
+        print(f"{'Stage':<28} | {'Calls':>8} | {'Total(ms)':>10} | {'Mean(ms)':>9} | {'Max(ms)':>9}")
+        print("-" * 76)
+        for name, (calls, total, worst) in sorted(self.stage_totals.items(), key=lambda kv: -kv[1][1]):
+            print(f"{name:<28} | {calls:>8} | {total * 1000.0:>10.3f} | {total * 1000.0 / calls:>9.4f} | {worst * 1000.0:>9.4f}")
+        for name, value in sorted(self.counters.items()):
+            print(f"{name:<28} | {value:>8}")
+        if self.dropped_events:
+            print(f"(trace capped: {self.dropped_events} events dropped)")
+
+    def chrome_trace(self):
+        # Chrome trace-event JSON object format
+        return {
+            "traceEvents": self.events + [
+                {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+                 "args": {"name": "LOD / culling"}},
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"summary": self.summary(), "dropped_events": self.dropped_events},
+        }
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+def enable(profiler=None):
+    # Installs (and returns) a Profiler as ACTIVE
+    global ACTIVE
+    ACTIVE = profiler or Profiler()
+    return ACTIVE
+
+
+def disable():
+    # Uninstalls and returns the ACTIVE Profiler (or None)
+    global ACTIVE
+    profiler, ACTIVE = ACTIVE, None
+    return profiler
+
+
+@contextlib.contextmanager
+def profiling(profiler=None):
+    previous = ACTIVE
+    profiler = enable(profiler)
+    try:
+        yield profiler
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+
+def stage(name):
+    # Context manager timing one stage; a shared no-op when disabled
+    if ACTIVE is None:
+        return _NULL_STAGE
+    return ACTIVE.stage(name)
+
+
+def count(name, n=1):
+    if ACTIVE is not None:
+        ACTIVE.count(name, n)
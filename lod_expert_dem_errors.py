@@ -0,0 +1,179 @@
+import argparse
+import concurrent.futures
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from lod_expert_implementation import LOD_GEOMETRIC_ERRORS, LODCore
+
+# ==============================================================================
+# DEM-DRIVEN PER-TILE GEOMETRIC ERROR
+# Replaces the hard-coded LOD_GEOMETRIC_ERRORS progression with measured
+# errors: for every tile and LOD stride, the max vertical deviation between
+# the decimated mesh and the full-resolution heightmap.
+# The DEM is memory-mapped and processed in blocks of tiles across a process
+# pool, so it never has to fit in RAM.
+# ==============================================================================
+
+# Output row i matches LOD_GEOMETRIC_ERRORS row i: the error of LOD i+1
+# (stride 2^(i+1)), i.e. the error that sets the LOD i -> i+1 switch distance.
+N_LEVELS = len(LOD_GEOMETRIC_ERRORS)
+
+
+def decimation_error(block, stride):
+    """
+    |full - decimated| for a (R*stride + 1, C*stride + 1) height block.
+    The decimated mesh keeps every stride-th post and splits each cell along
+    the (0,0)-(1,1) diagonal, so values are what the rasterizer would draw.
+    """
+    rows, cols = block.shape
+    coarse = block[::stride, ::stride]
+
+    i = np.arange(rows)
+    j = np.arange(cols)
+    ci = np.minimum(i // stride, coarse.shape[0] - 2)
+    cj = np.minimum(j // stride, coarse.shape[1] - 2)
+    v = ((i - ci * stride) / stride)[:, None] # along rows
+    u = ((j - cj * stride) / stride)[None, :] # along cols
+
+    z00 = coarse[ci][:, cj]
+    z01 = coarse[ci][:, cj + 1]
+    z10 = coarse[ci + 1][:, cj]
+    z11 = coarse[ci + 1][:, cj + 1]
+
+    upper = u >= v
+    approx = np.where(upper,
+                      z00 + u * (z01 - z00) + v * (z11 - z01),
+                      z00 + v * (z10 - z00) + u * (z11 - z10))
+    return np.abs(block - approx)
+
+
+def _process_block(dem_path, dem_shape, dem_dtype, out_path, tile_samples, ty0, ty1, tx0, tx1):
+    # Worker: one block of tiles [ty0, ty1) x [tx0, tx1), reads and writes via memmap
+    dem = np.memmap(dem_path, dtype=dem_dtype, mode='r', shape=dem_shape)
+    out = np.load(out_path, mmap_mode='r+')
+    t = tile_samples
+
+    block = np.asarray(dem[ty0 * t: ty1 * t + 1, tx0 * t: tx1 * t + 1], dtype=np.float64)
+    result = np.zeros((ty1 - ty0, tx1 - tx0, out.shape[-1]), dtype=np.float32)
+    for level in range(out.shape[-1]):
+        err = decimation_error(block, 2**(level + 1))
+        for a in range(ty1 - ty0):
+            for b in range(tx1 - tx0):
+                result[a, b, level] = err[a * t: a * t + t + 1, b * t: b * t + t + 1].max()
+
+    # A coarser LOD can never be better than a finer one for switching purposes
+    np.maximum.accumulate(result, axis=-1, out=result)
+    out[ty0:ty1, tx0:tx1] = result
+    out.flush()
+    return (ty1 - ty0) * (tx1 - tx0)
+
+
+def compute_tile_errors(dem_path, dem_shape, out_path, dem_dtype='<f4', tile_samples=256,
+                        n_levels=N_LEVELS, block_tiles=8, workers=None):
+    """
+    Computes per-tile geometric errors for a raw row-major heightmap.
+    Tiles share their edge posts, so a DEM of (n * tile_samples + 1) posts per
+    side holds n tiles; trailing partial tiles are ignored.
+    Writes a (tiles_y, tiles_x, n_levels) float32 .npy to out_path and returns
+    it memory-mapped (read-only).
+    """
+    if tile_samples % 2**n_levels:
+        raise ValueError(f"tile_samples={tile_samples} must be a multiple of the coarsest stride {2**n_levels}")
+    rows, cols = dem_shape
+    tiles_y = (rows - 1) // tile_samples
+    tiles_x = (cols - 1) // tile_samples
+    if tiles_y < 1 or tiles_x < 1:
+        raise ValueError(f"DEM {dem_shape} is smaller than one tile of {tile_samples} samples")
+
+    out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=(tiles_y, tiles_x, n_levels))
+    del out # Workers reopen it r+
+
+    jobs = [
+        (dem_path, dem_shape, dem_dtype, out_path, tile_samples,
+         ty, min(ty + block_tiles, tiles_y), tx, min(tx + block_tiles, tiles_x))
+        for ty in range(0, tiles_y, block_tiles)
+        for tx in range(0, tiles_x, block_tiles)
+    ]
+    if workers == 1:
+        for job in jobs:
+            _process_block(*job)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            for f in concurrent.futures.as_completed([pool.submit(_process_block, *job) for job in jobs]):
+                f.result()
+
+    return np.load(out_path, mmap_mode='r')
+
+
+def tile_switch_distances(tile_errors, config):
+    # Per-tile get_lod_table switch distances: (tiles_y, tiles_x, n_levels)
+    return config.calculate_switch_distance(np.asarray(tile_errors, dtype=np.float64))
+
+
+def write_synthetic_dem(path, size, rows_per_chunk=512, seed=0):
+    """
+    Writes a size x size float32 ridge/valley heightmap row-chunk by row-chunk
+    (never holds the full DEM in memory). Heights in meters, 1 m posts.
+    """
+    rng = np.random.default_rng(seed)
+    waves = [(rng.uniform(200.0, 4000.0), rng.uniform(0, 2 * np.pi), rng.uniform(0, np.pi)) for _ in range(12)]
+    x = np.arange(size, dtype=np.float64)
+
+    dem = np.memmap(path, dtype='<f4', mode='w+', shape=(size, size))
+    for r0 in range(0, size, rows_per_chunk):
+        y = np.arange(r0, min(r0 + rows_per_chunk, size), dtype=np.float64)[:, None]
+        h = np.zeros((y.shape[0], size))
+        for wavelength, phase, angle in waves:
+            proj = x[None, :] * np.cos(angle) + y * np.sin(angle)
+            h += (wavelength / 40.0) * np.abs(np.sin(2 * np.pi * proj / wavelength + phase))
+        h += rng.normal(0.0, 0.05, h.shape) # Sensor noise / micro relief
+        dem[r0:r0 + h.shape[0]] = h
+    dem.flush()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-tile LOD geometric errors from a raw DEM.")
+    parser.add_argument('dem', nargs='?', help="Raw row-major heightmap (default: synthetic 4097^2)")
+    parser.add_argument('--shape', nargs=2, type=int, metavar=('ROWS', 'COLS'))
+    parser.add_argument('--dtype', default='<f4')
+    parser.add_argument('--tile-samples', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('-o', '--output', default=None, help="Output .npy (default: next to the DEM)")
+    args = parser.parse_args(argv)
+
+    tmp = None
+    if args.dem:
+        if not args.shape:
+            parser.error("--shape is required for a raw DEM")
+        dem_path, shape = args.dem, tuple(args.shape)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        dem_path, shape = os.path.join(tmp.name, 'synthetic.raw'), (4097, 4097)
+        write_synthetic_dem(dem_path, shape[0])
+    out_path = args.output or os.path.splitext(dem_path)[0] + '_tile_errors.npy'
+
+    print(f"--- DEM TILE ERRORS: {dem_path} {shape} ---")
+    t0 = time.perf_counter()
+    errors = compute_tile_errors(dem_path, shape, out_path, args.dtype, args.tile_samples, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+    print(f"Tiles: {errors.shape[0]}x{errors.shape[1]} | {elapsed:.2f} s")
+
+    config = LODCore()
+    dists = tile_switch_distances(errors, config)
+    print(f"\n{'LOD':<5} | {'Table Err(m)':<12} | {'DEM Err p50/max(m)':<20} | {'Switch p50/max(m)':<20}")
+    print("-" * 66)
+    for i, table_err in enumerate(LOD_GEOMETRIC_ERRORS):
+        e = errors[..., i]
+        d = dists[..., i]
+        print(f"{i:<5} | {table_err:<12} | {np.median(e):>8.3f} / {e.max():<9.3f} | {np.median(d):>8.1f} / {d.max():<9.1f}")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import collections
+import struct
+import time
+
+import numpy as np
+
+from experiment_culling_sim import CullingSim
+from lod_expert_implementation import LODCore
+from lod_expert_mesh import StitchedIndexCache, tile_masks
+
+# ==============================================================================
+# GPU DRAW BUFFERS
+# Turns visible tiles and their LOD parameters into a std140 per-instance
+# buffer and a DrawElementsIndirectCommand array grouped by LOD mesh
+# (lod_expert_mesh (level, edge mask) index ranges), built with structured
+# dtypes in one bulk pass and exposed zero-copy as memoryviews: one
+# glMultiDrawElementsIndirect replaces per-tile uniform updates.
+#
+# Shader side (terrain.vert uniforms moved into an instance array):
+#   struct TileInstance {
+#       vec4  u_Tile;           // origin x, 0, origin z, tile size
+#       float u_GeometricError;
+#       float u_LodSwitchDist;
+#       float u_MorphBuffer;
+#       uint  u_LodMask;        // LOD | edge mask << 8
+#   };
+#   layout(std140, binding = 0) uniform/buffer Tiles { TileInstance tiles[]; };
+#   TileInstance t = tiles[gl_BaseInstance + gl_InstanceID];
+# ==============================================================================
+
+# std140: struct alignment 16, vec4 at 0, scalars packed after it, size rounded to 16
+INSTANCE_DTYPE = np.dtype({
+    'names': ['u_Tile', 'u_GeometricError', 'u_LodSwitchDist', 'u_MorphBuffer', 'u_LodMask'],
+    'formats': [('<f4', 4), '<f4', '<f4', '<f4', '<u4'],
+    'offsets': [0, 16, 20, 24, 28],
+    'itemsize': 32,
+})
+
+# GL DrawElementsIndirectCommand, tightly packed (stride 20)
+COMMAND_DTYPE = np.dtype([('count', '<u4'), ('instanceCount', '<u4'), ('firstIndex', '<u4'),
+                          ('baseVertex', '<i4'), ('baseInstance', '<u4')])
+
+# Byte layouts as struct formats, for checking the dtypes above
+INSTANCE_STRUCT = struct.Struct('<4ffffI')
+COMMAND_STRUCT = struct.Struct('<IIIiI')
+
+# One draw batch per LOD mesh: commands [first_command, first_command + n_commands)
+DrawBuffers = collections.namedtuple('DrawBuffers', 'instances commands groups')
+GROUP_DTYPE = np.dtype([('level', '<i4'), ('mask', '<i4'), ('first_command', '<i8'), ('n_commands', '<i8')])
+
+
+def as_bytes(arr):
+    # Zero-copy byte view of a contiguous array (for glBufferSubData / mmap writes)
+    return memoryview(np.ascontiguousarray(arr).view(np.uint8))
+
+
+def build_draw_buffers(tx, ty, tile_size, levels, masks, cache, config=None, base_vertex=None):
+    """
+    Instance and indirect command buffers for tiles at origins (tx, ty).
+    levels / masks: per-tile LOD and edge mask (lod_expert_mesh.tile_masks).
+    cache: StitchedIndexCache for the tile resolution (firstIndex / count).
+    Instances are sorted by (level, mask). With base_vertex=None every tile
+    of a mesh shares one vertex grid and each mesh is a single instanced
+    command; the grids of all LODs live in one vertex buffer (the per-LOD
+    build_vertex_buffers outputs concatenated in level order) and
+    baseVertex = cache.level_base_vertex[level], so one multi-draw can mix
+    levels. With per-tile base_vertex offsets into a pooled vertex buffer
+    (each tile's grid at its own LOD) each tile gets its own command
+    (instanceCount 1, baseInstance = its instance).
+    """
+    config = config or LODCore()
+    levels = np.asarray(levels, dtype=np.int64)
+    masks = np.asarray(masks, dtype=np.int64)
+    n = levels.size
+
+    order = np.lexsort((masks, levels))
+    lv = levels[order]
+    mk = masks[order]
+
+    instances = np.zeros(n, dtype=INSTANCE_DTYPE)
+    tile = instances['u_Tile']
+    tile[:, 0] = np.asarray(tx, dtype=np.float64)[order]
+    tile[:, 2] = np.asarray(ty, dtype=np.float64)[order]
+    tile[:, 3] = tile_size
+    instances['u_GeometricError'] = np.asarray(config.ERRORS)[lv]
+    instances['u_LodSwitchDist'] = np.asarray(config.SWITCH_DISTANCES)[lv]
+    instances['u_MorphBuffer'] = config.MORPH_BUFFER
+    instances['u_LodMask'] = lv | (mk << 8)
+
+    # Mesh groups: runs of equal (level, mask) in the sorted instances
+    starts = np.flatnonzero(np.r_[True, (lv[1:] != lv[:-1]) | (mk[1:] != mk[:-1])]) if n else np.zeros(0, np.int64)
+    sizes = np.diff(np.r_[starts, n])
+    first, count = cache.lookup_many(lv[starts], mk[starts])
+
+    if base_vertex is None:
+        commands = np.zeros(starts.size, dtype=COMMAND_DTYPE)
+        commands['count'] = count
+        commands['instanceCount'] = sizes
+        commands['firstIndex'] = first
+        commands['baseVertex'] = cache.level_base_vertex[lv[starts]]
+        commands['baseInstance'] = starts
+        first_command, n_commands = np.arange(starts.size), np.ones(starts.size, dtype=np.int64)
+    else:
+        group = np.repeat(np.arange(starts.size), sizes)
+        commands = np.zeros(n, dtype=COMMAND_DTYPE)
+        commands['count'] = count[group]
+        commands['instanceCount'] = 1
+        commands['firstIndex'] = first[group]
+        commands['baseVertex'] = np.asarray(base_vertex)[order]
+        commands['baseInstance'] = np.arange(n)
+        first_command, n_commands = starts, sizes
+
+    groups = np.zeros(starts.size, dtype=GROUP_DTYPE)
+    groups['level'] = lv[starts]
+    groups['mask'] = mk[starts]
+    groups['first_command'] = first_command
+    groups['n_commands'] = n_commands
+    return DrawBuffers(instances, commands, groups)
+
+
+def check_layout(buffers):
+    """
+    Decodes the first instance and command through INSTANCE_STRUCT /
+    COMMAND_STRUCT and raises ValueError if they disagree with the arrays.
+    """
+    if INSTANCE_DTYPE.itemsize != INSTANCE_STRUCT.size or INSTANCE_DTYPE.itemsize % 16:
+        raise ValueError(f"TileInstance is {INSTANCE_DTYPE.itemsize} B, std140 needs {INSTANCE_STRUCT.size} B")
+    if COMMAND_DTYPE.itemsize != COMMAND_STRUCT.size:
+        raise ValueError(f"DrawElementsIndirectCommand is {COMMAND_DTYPE.itemsize} B, expected {COMMAND_STRUCT.size} B")
+    if buffers.instances.size:
+        decoded = INSTANCE_STRUCT.unpack_from(as_bytes(buffers.instances), 0)
+        ref = buffers.instances[0]
+        expected = (*ref['u_Tile'], ref['u_GeometricError'], ref['u_LodSwitchDist'], ref['u_MorphBuffer'], ref['u_LodMask'])
+        if decoded != tuple(float(v) if i < 7 else int(v) for i, v in enumerate(expected)):
+            raise ValueError(f"Instance bytes decode to {decoded}, expected {expected}")
+    if buffers.commands.size:
+        decoded = COMMAND_STRUCT.unpack_from(as_bytes(buffers.commands), 0)
+        if decoded != buffers.commands[0].item():
+            raise ValueError(f"Command bytes decode to {decoded}, expected {buffers.commands[0].item()}")
+    return True
+
+
+def benchmark_draws(tile_sizes=(512, 1024), n_synthetic=100_000, repeats=5, seed=0):
+    """
+    Builds draw buffers for CullingSim's visible tiles (SSE LODs, stitched
+    edge masks) and for a large synthetic tile set; reports draws per ms for
+    the bulk build vs packing one TileInstance per tile with struct.
+    """
+    print("\n--- GPU DRAW BUFFER BENCHMARK ---")
+    sim = CullingSim()
+    config = LODCore()
+    print(f"{'Tiles':<12} | {'Draws':>7} | {'Cmds (inst/tile)':>16} | {'Build(ms)':>9} | {'Draws/ms':>9} | "
+          f"{'struct Loop/ms':>14} | {'Bytes':>9}")
+    print("-" * 96)
+    results = {}
+    rng = np.random.default_rng(seed)
+    for label, tile_size in [(f'{ts}m frame', ts) for ts in tile_sizes] + [('synthetic', 1024)]:
+        quads = int(tile_size / sim.LOD0_SPACING)
+        cache = StitchedIndexCache(quads)
+        if label == 'synthetic':
+            n = n_synthetic
+            tx = rng.uniform(-20000.0, 20000.0, n)
+            ty = rng.uniform(0.0, 20000.0, n)
+            levels = rng.integers(0, cache.n_levels, n)
+            masks = rng.integers(0, 16, n)
+        else:
+            gx, gy = sim.tile_grid(tile_size)
+            lods, _ = sim.tile_lods(gx, gy, tile_size)
+            grid_masks, _ = tile_masks(lods.reshape(len(np.unique(gx)), -1))
+            visible = sim.is_tile_visible_batch(gx, gy, tile_size, count=False)
+            tx, ty = gx[visible], gy[visible]
+            levels, masks = lods[visible], grid_masks.ravel()[visible]
+            n = tx.size
+        base_vertex = np.arange(n) * (quads + 1) ** 2
+
+        build_s = per_tile_s = float('inf')
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            instanced = build_draw_buffers(tx, ty, tile_size, levels, masks, cache, config)
+            per_tile = build_draw_buffers(tx, ty, tile_size, levels, masks, cache, config, base_vertex)
+            build_s = min(build_s, (time.perf_counter() - t0) / 2.0)
+
+            t0 = time.perf_counter()
+            out = bytearray(n * INSTANCE_STRUCT.size)
+            for i in range(n):
+                lod = int(levels[i])
+                INSTANCE_STRUCT.pack_into(out, i * INSTANCE_STRUCT.size, tx[i], 0.0, ty[i], tile_size,
+                                          config.ERRORS[lod], config.SWITCH_DISTANCES[lod], config.MORPH_BUFFER,
+                                          lod | int(masks[i]) << 8)
+            per_tile_s = min(per_tile_s, time.perf_counter() - t0)
+        check_layout(instanced)
+        check_layout(per_tile)
+
+        nbytes = per_tile.instances.nbytes + per_tile.commands.nbytes
+        cmds = f"{instanced.commands.size}/{per_tile.commands.size}"
+        print(f"{label:<12} | {n:>7} | {cmds:>16} | {build_s * 1000.0:>9.3f} | {n / (build_s * 1000.0):>9.0f} | "
+              f"{n / (per_tile_s * 1000.0):>14.0f} | {nbytes:>9}")
+        results[label] = {"draws": n, "mesh_groups": int(instanced.groups.size), "build_s": build_s,
+                          "draws_per_ms": n / (build_s * 1000.0), "struct_draws_per_ms": n / (per_tile_s * 1000.0)}
+    print("Layout: TileInstance 32 B (std140), DrawElementsIndirectCommand 20 B - checked against struct")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="std140 instance + indirect draw command buffer builder.")
+    parser.add_argument('--tile-sizes', type=int, nargs='+', default=[512, 1024])
+    parser.add_argument('--synthetic', type=int, default=100_000, help="Synthetic tile count")
+    args = parser.parse_args(argv)
+    benchmark_draws(tuple(args.tile_sizes), args.synthetic)
+
+
+if __name__ == "__main__":
+    main()
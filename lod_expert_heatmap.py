@@ -0,0 +1,207 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from lod_expert_implementation import LODCore
+from lod_expert_optimizer import CONSTANTS
+
+# ==============================================================================
+# PER-PIXEL SCREEN-SPACE ERROR HEATMAPS
+# Casts every pixel ray of a square frame (CONSTANTS['ScreenRes_Y'] rows, same
+# FOV both axes as CullingSim) onto flat or curved ground and evaluates the
+# three SSE formulas in the project per pixel:
+#   'locked'    LODCore / CullingSim.tile_lods: err * K * PitchScalar / D,
+#               D = nearest point of the pixel's tile (tile-granular selection)
+#   'optimizer' lod_expert_optimizer: err / (slant * rad_per_pixel)
+#   'shader'    terrain.vert: err * K * PitchScalar / max(|camera - vertex|, 1)
+# Each formula picks an LOD per pixel; the true on-screen size of that LOD's
+# vertical error (exact pinhole projection of a vertical displacement at the
+# hit point) is then checked against SSE_Threshold.
+# LOD l renders with geometric error errors[l - 1] (errors[i] drives the
+# l -> l + 1 switch, terrain.vert u_GeometricError), LOD 0 is exact.
+# ==============================================================================
+
+FORMULAS = ('locked', 'optimizer', 'shader')
+
+
+def cast_frame(pitch_deg, altitude, constants=CONSTANTS, curved=False, r_earth=None):
+    """
+    Ray-casts all pixels. Returns a dict of (H, W) arrays: hit (H, W, 3)
+    world point, normal (H, W, 3) ground up-vector at the hit, slant (NaN
+    where the ray misses the ground or lands beyond Max_Vis), ground (ground
+    distance), px_per_m (pixels a 1 m displacement along the normal moves
+    the hit point on screen) and k (focal length in pixels).
+    Camera at (0, 0, altitude) looking along +x, pitched by pitch_deg.
+    """
+    res = int(constants['ScreenRes_Y'])
+    k = res / (2.0 * math.tan(math.radians(constants['FOV_V_deg']) / 2.0))
+    p = math.radians(pitch_deg)
+    fwd = np.array([math.cos(p), 0.0, math.sin(p)])
+    up = np.array([-math.sin(p), 0.0, math.cos(p)])
+    right = np.array([0.0, -1.0, 0.0])
+
+    # Pixel centres, row 0 = top, column 0 = left
+    c = np.arange(res, dtype=np.float64) - res / 2.0 + 0.5
+    sy = -c[:, None]
+    sx = c[None, :]
+    d = fwd * k + sx[..., None] * right + sy[..., None] * up
+    d /= np.linalg.norm(d, axis=-1, keepdims=True)
+    origin = np.array([0.0, 0.0, altitude])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if curved:
+            r = r_earth or constants['R_earth']
+            center = np.array([0.0, 0.0, -r])
+            oc = origin - center
+            b = d @ oc
+            disc = b * b - (oc @ oc - r * r)
+            t = np.where(disc >= 0.0, -b - np.sqrt(disc), np.nan)
+            t = np.where(t > 0.0, t, np.nan)
+            hit = origin + t[..., None] * d
+            normal = (hit - center) / r
+            ground = r * np.arctan2(np.hypot(hit[..., 0], hit[..., 1]), hit[..., 2] + r)
+        else:
+            t = np.where(d[..., 2] < 0.0, -altitude / d[..., 2], np.nan)
+            hit = origin + t[..., None] * d
+            normal = np.broadcast_to(np.array([0.0, 0.0, 1.0]), hit.shape)
+            ground = np.hypot(hit[..., 0], hit[..., 1])
+    t = np.where(ground <= constants['Max_Vis'], t, np.nan)
+
+    # Screen motion of the hit point per metre along the normal:
+    # x_px = K * (q . right) / (q . fwd), y_px = K * (q . up) / (q . fwd), q = hit - camera
+    q = hit - origin
+    qf = q @ fwd
+    nf = normal @ fwd
+    dx = k * ((normal @ right) * qf - (q @ right) * nf) / (qf * qf)
+    dy = k * ((normal @ up) * qf - (q @ up) * nf) / (qf * qf)
+    return {
+        "hit": hit,
+        "normal": normal,
+        "slant": t,
+        "ground": ground,
+        "px_per_m": np.hypot(dx, dy),
+        "k": k,
+    }
+
+
+def tile_distance(hit, altitude, tile_size, curved=False, r_earth=CONSTANTS['R_earth']):
+    # CullingSim.tile_lods distance: camera (0, 0, altitude) to the nearest point of the hit's tile
+    tx = np.floor(hit[..., 0] / tile_size) * tile_size
+    ty = np.floor(hit[..., 1] / tile_size) * tile_size
+    gx = np.maximum(np.maximum(tx, -(tx + tile_size)), 0.0)
+    gy = np.maximum(np.maximum(ty, -(ty + tile_size)), 0.0)
+    ground2 = gx * gx + gy * gy
+    dz = altitude + ground2 / (2.0 * r_earth) if curved else altitude
+    return np.sqrt(ground2 + dz * dz)
+
+
+def sse_heatmaps(pitch_deg=None, altitude=None, constants=CONSTANTS, config=None, tile_size=None, curved=False):
+    """
+    Per-pixel LOD, estimated error and true projected error (px) of the
+    selected LOD under each formula, plus stats.
+    Returns {'frame': cast_frame(...) dict, formula: {'lod', 'estimate_px',
+    'true_px', 'over_budget', 'over_refined', 'stats'}}; heatmaps are (H, W)
+    arrays, NaN / -1 off the ground.
+    Over budget: true error > SSE_Threshold. Over-refined: the next coarser
+    LOD would still be within SSE_Threshold.
+    """
+    pitch_deg = constants['Pitch_deg'] if pitch_deg is None else pitch_deg
+    altitude = constants['Camera_Z'] if altitude is None else altitude
+    tile_size = constants['Tile_Size'] if tile_size is None else tile_size
+    tau = constants['SSE_Threshold']
+    config = config or LODCore(screen_h=constants['ScreenRes_Y'], fov_v_deg=constants['FOV_V_deg'],
+                               sse_threshold=tau)
+
+    frame = cast_frame(pitch_deg, altitude, constants, curved)
+    on_ground = ~np.isnan(frame["slant"])
+    slant = frame["slant"][on_ground]
+    px_per_m = frame["px_per_m"][on_ground]
+    errors = np.asarray(config.ERRORS, dtype=np.float64)
+    rendered = np.r_[0.0, errors] # Geometric error while drawing LOD l
+
+    # Per formula: distance metric and numerator c with estimate = err * c / distance
+    rad_per_pixel = math.radians(constants['FOV_V_deg']) / constants['ScreenRes_Y']
+    locked_c = config.K_PERSPECTIVE * config.PITCH_SCALAR
+    metrics = {
+        'locked': (tile_distance(frame["hit"], altitude, tile_size, curved, constants['R_earth'])[on_ground], locked_c),
+        'optimizer': (slant, 1.0 / rad_per_pixel),
+        'shader': (np.maximum(slant, 1.0), locked_c),
+    }
+
+    out = {"frame": frame}
+    n = max(int(on_ground.sum()), 1)
+    for name in FORMULAS:
+        dist, c = metrics[name]
+        switch = errors * c / tau
+        lod = np.searchsorted(switch[:-1], dist, side='right')
+        estimate = rendered[lod] * c / dist
+        true = rendered[lod] * px_per_m
+        coarser = np.minimum(lod + 1, errors.size - 1)
+        over_budget = true > tau
+        over_refined = (lod < errors.size - 1) & (rendered[coarser] * px_per_m <= tau)
+
+        maps = {}
+        for key, values, fill in (('lod', lod, -1), ('estimate_px', estimate, np.nan), ('true_px', true, np.nan),
+                                  ('over_budget', over_budget, False), ('over_refined', over_refined, False)):
+            full = np.full(on_ground.shape, fill, dtype=np.asarray(values).dtype)
+            full[on_ground] = values
+            maps[key] = full
+        maps["stats"] = {
+            "ground_pixels": int(on_ground.sum()),
+            "over_budget": float(over_budget.sum()) / n,
+            "over_refined": float(over_refined.sum()) / n,
+            "true_px_max": float(true.max()) if true.size else 0.0,
+            "true_px_mean": float(true.mean()) if true.size else 0.0,
+            "estimate_ratio_p50": float(np.median(estimate[lod > 0] / true[lod > 0])) if (lod > 0).any() else 1.0,
+        }
+        out[name] = maps
+    return out
+
+
+def run_heatmaps(poses=((-12.0, 100.0), (-2.0, 100.0), (-45.0, 100.0), (-12.0, 1000.0), (-89.0, 3000.0)),
+                 curved=False, save=None):
+    """
+    Evaluates sse_heatmaps at several (pitch, altitude) poses and prints
+    per-formula over-budget / over-refined pixel fractions and frame cost.
+    save: optional .npz path for the last pose's heatmaps.
+    """
+    res = CONSTANTS['ScreenRes_Y']
+    print(f"\n--- PER-PIXEL SSE HEATMAPS ({res}x{res}, {'curved' if curved else 'flat'} ground, "
+          f"{CONSTANTS['Tile_Size']:.0f}m tiles, SSE {CONSTANTS['SSE_Threshold']} px) ---")
+    print(f"{'Pitch':>6} | {'Alt(m)':>6} | {'Ground%':>7} | {'Formula':<9} | {'Over Budget%':>12} | "
+          f"{'Over-Refined%':>13} | {'Max px':>7} | {'Est/True':>8} | {'Frame(ms)':>9}")
+    print("-" * 104)
+    results = []
+    for pitch, alt in poses:
+        t0 = time.perf_counter()
+        maps = sse_heatmaps(pitch, alt, curved=curved)
+        frame_ms = (time.perf_counter() - t0) * 1000.0
+        for name in FORMULAS:
+            s = maps[name]["stats"]
+            print(f"{pitch:>6.0f} | {alt:>6.0f} | {s['ground_pixels'] / res**2 * 100.0:>7.1f} | {name:<9} | "
+                  f"{s['over_budget'] * 100.0:>12.2f} | {s['over_refined'] * 100.0:>13.2f} | {s['true_px_max']:>7.2f} | "
+                  f"{s['estimate_ratio_p50']:>8.2f} | {frame_ms:>9.1f}")
+        results.append({"pitch": pitch, "altitude": alt, "frame_ms": frame_ms,
+                        **{name: maps[name]["stats"] for name in FORMULAS}})
+    if save:
+        np.savez_compressed(save, **{f"{name}_{key}": maps[name][key] for name in FORMULAS
+                                     for key in ('lod', 'estimate_px', 'true_px')})
+        print(f"Heatmaps written: {save}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-pixel SSE heatmaps for the three SSE formulas.")
+    parser.add_argument('--pose', type=float, nargs=2, action='append', metavar=('PITCH', 'ALT'),
+                        help="Camera pitch (deg) and altitude (m); repeatable")
+    parser.add_argument('--curved', action='store_true', help="Spherical earth instead of a flat ground plane")
+    parser.add_argument('--save', help="Write the last pose's heatmaps to this .npz")
+    args = parser.parse_args(argv)
+    kwargs = {"poses": [tuple(p) for p in args.pose]} if args.pose else {}
+    run_heatmaps(curved=args.curved, save=args.save, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
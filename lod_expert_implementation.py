@@ -1,38 +1,149 @@
 import math
+import timeit
+
+import numpy as np
+
+import instrumentation
 
 # ==============================================================================
 # EXPERT TERRAIN LOD IMPLEMENTATION
 # Based on "Master Design Document" & "Implementation Checklist"
 # ==============================================================================
 
+# Geometric errors for each LOD (Standard Quadtree progression)
+LOD_GEOMETRIC_ERRORS = [0.1, 0.2, 0.4, 0.8, 1.6]
+
+# Morph zone as a fraction of the switch distance (20% hysteresis/morph zone)
+MORPH_BUFFER = 0.2
+
+class LODCore:
+    """
+    Quiet, immutable LOD configuration for per-frame code.
+    Derived constants (K, pitch scalar, switch / morph distances) are computed
+    once at construction; queries do no I/O and return cached tuples/arrays.
+    Attribute names match LODConfig so either can be passed as a 'config'.
+    """
+    __slots__ = ('R_EARTH', 'SCREEN_H', 'FOV_V_DEG', 'SSE_THRESHOLD', 'PITCH_LOCK_DEG',
+                 'K_PERSPECTIVE', 'PITCH_SCALAR', 'ERRORS', 'MORPH_BUFFER',
+                 'SWITCH_DISTANCES', 'MORPH_STARTS', '_table', '_table_array')
+
+    def __init__(self, screen_h=1024.0, fov_v_deg=12.0, sse_threshold=1.0, pitch_lock_deg=-15.0,
+                 errors=LOD_GEOMETRIC_ERRORS, morph_buffer=MORPH_BUFFER):
+        init = object.__setattr__
+        init(self, 'R_EARTH', 6371000.0)
+        init(self, 'SCREEN_H', screen_h)
+        init(self, 'FOV_V_DEG', fov_v_deg)
+        init(self, 'SSE_THRESHOLD', sse_threshold)
+        init(self, 'PITCH_LOCK_DEG', pitch_lock_deg)
+
+        # K = S_h / (2 * tan(fov/2)), PitchScalar = |cos(pitch_lock)|
+        init(self, 'K_PERSPECTIVE', screen_h / (2.0 * math.tan(math.radians(fov_v_deg) / 2.0)))
+        init(self, 'PITCH_SCALAR', abs(math.cos(math.radians(pitch_lock_deg))))
+
+        # LOD i is valid up to SWITCH_DISTANCES[i]; morphing toward LOD i+1
+        # starts MORPH_BUFFER (20%) before that ("Transition Buffer" approach).
+        init(self, 'ERRORS', tuple(errors))
+        init(self, 'MORPH_BUFFER', morph_buffer)
+        dists = tuple(self.calculate_switch_distance(err) for err in self.ERRORS)
+        starts = tuple(d - d * morph_buffer for d in dists)
+        init(self, 'SWITCH_DISTANCES', dists)
+        init(self, 'MORPH_STARTS', starts)
+        init(self, '_table', tuple(zip(range(len(dists)), self.ERRORS, dists, starts)))
+        init(self, '_table_array', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def calculate_switch_distance(self, geometric_error):
+        # D = (delta * K * PitchScalar) / tau  (works on floats and NumPy arrays)
+        return geometric_error * self.PITCH_SCALAR * self.K_PERSPECTIVE / self.SSE_THRESHOLD
+
+    def lod_table(self):
+        # Cached ((level, error, switch_dist, morph_start), ...) rows
+        return self._table
+
+    def lod_table_array(self):
+        # Cached read-only (n_levels, 4) float64 array of the same rows
+        if self._table_array is None:
+            arr = np.array(self._table, dtype=np.float64)
+            arr.flags.writeable = False
+            object.__setattr__(self, '_table_array', arr)
+        return self._table_array
+
+
+def _core_input(name, arg):
+    # LODConfig attribute read from self.core; assigning it rebuilds the core
+    def fget(self):
+        return getattr(self.core, name)
+
+    def fset(self, value):
+        core = self.core
+        args = dict(screen_h=core.SCREEN_H, fov_v_deg=core.FOV_V_DEG, sse_threshold=core.SSE_THRESHOLD,
+                    pitch_lock_deg=core.PITCH_LOCK_DEG, errors=core.ERRORS, morph_buffer=core.MORPH_BUFFER)
+        args[arg] = value
+        self.core = LODCore(**args)
+    return property(fget, fset)
+
+
+def _core_derived(name, inputs=None):
+    # Read-only LODConfig attribute derived by LODCore
+    def fget(self):
+        return getattr(self.core, name)
+
+    def fset(self, value):
+        hint = f"; set {inputs} instead" if inputs else ""
+        raise AttributeError(f"LODConfig.{name} is read-only{hint}")
+    return property(fget, fset)
+
+
 class LODConfig:
+    """
+    Report wrapper around LODCore: same constants and formulas, plus the
+    [DEBUG] / table printouts. Use LODCore directly in per-frame code.
+    The constants are views of self.core: assigning SCREEN_H, FOV_V_DEG,
+    SSE_THRESHOLD, PITCH_LOCK_DEG, ERRORS or MORPH_BUFFER rebuilds it
+    (K_PERSPECTIVE, PITCH_SCALAR and the switch distances follow); the
+    derived constants are read-only.
+    """
+
+    # ----------------------------------------------------------------------
+    # 1. PHYSICS CONSTANTS (From Checklist)
+    # ----------------------------------------------------------------------
+    R_EARTH = _core_derived('R_EARTH')                              # Meters
+    SCREEN_H = _core_input('SCREEN_H', 'screen_h')                  # Pixels
+    FOV_V_DEG = _core_input('FOV_V_DEG', 'fov_v_deg')               # Degrees
+    SSE_THRESHOLD = _core_input('SSE_THRESHOLD', 'sse_threshold')   # Pixels (Target)
+
+    # ----------------------------------------------------------------------
+    # 2. OPTICAL DERIVATION
+    # ----------------------------------------------------------------------
+    # K = S_h / (2 * tan(fov/2))
+    K_PERSPECTIVE = _core_derived('K_PERSPECTIVE', 'SCREEN_H / FOV_V_DEG')
+
+    # ----------------------------------------------------------------------
+    # 3. STABILITY LOGIC (The "Pitch Lock")
+    # ----------------------------------------------------------------------
+    # We DO NOT use real-time pitch. We use a "Worst Case" constant.
+    # Checklist: -15 degrees (-0.2617 rad)
+    PITCH_LOCK_DEG = _core_input('PITCH_LOCK_DEG', 'pitch_lock_deg')
+    PITCH_SCALAR = _core_derived('PITCH_SCALAR', 'PITCH_LOCK_DEG')
+
+    # ----------------------------------------------------------------------
+    # 4. LOD TABLE (errors per LOD, switch / morph distances)
+    # ----------------------------------------------------------------------
+    ERRORS = _core_input('ERRORS', 'errors')
+    MORPH_BUFFER = _core_input('MORPH_BUFFER', 'morph_buffer')
+    SWITCH_DISTANCES = _core_derived('SWITCH_DISTANCES', 'ERRORS / SSE_THRESHOLD')
+    MORPH_STARTS = _core_derived('MORPH_STARTS', 'MORPH_BUFFER')
+
     def __init__(self):
-        # ----------------------------------------------------------------------
-        # 1. PHYSICS CONSTANTS (From Checklist)
-        # ----------------------------------------------------------------------
-        self.R_EARTH = 6371000.0        # Meters
-        self.SCREEN_H = 1024.0          # Pixels
-        self.FOV_V_DEG = 12.0           # Degrees
-        self.SSE_THRESHOLD = 1.0        # Pixels (Target)
-
-        # ----------------------------------------------------------------------
-        # 2. OPTICAL DERIVATION
-        # ----------------------------------------------------------------------
-        # K = S_h / (2 * tan(fov/2))
-        fov_rad = math.radians(self.FOV_V_DEG)
-        self.K_PERSPECTIVE = self.SCREEN_H / (2.0 * math.tan(fov_rad / 2.0))
+        self.core = LODCore()
         
         # Verify K against checklist (should be ~4889.2)
         print(f"[DEBUG] Calculated K: {self.K_PERSPECTIVE:.4f}")
-
-        # ----------------------------------------------------------------------
-        # 3. STABILITY LOGIC (The "Pitch Lock")
-        # ----------------------------------------------------------------------
-        # We DO NOT use real-time pitch. We use a "Worst Case" constant.
-        # Checklist: -15 degrees (-0.2617 rad)
-        self.PITCH_LOCK_DEG = -15.0
-        self.PITCH_SCALAR = abs(math.cos(math.radians(self.PITCH_LOCK_DEG)))
-        
         print(f"[DEBUG] Pitch Lock: {self.PITCH_LOCK_DEG} deg")
         print(f"[DEBUG] Pitch Scalar (cos): {self.PITCH_SCALAR:.4f}")
 
@@ -41,97 +152,26 @@ class LODConfig:
         Solves D for a given Geometric Error (delta) and SSE Threshold (tau).
         Formula: D = (delta * K * PitchScalar) / tau
         """
-        # Note: The original formula was Error_Proj = (Error_World * cos) / D * K
-        # Solving for D where Error_Proj = 1.0:
-        # 1.0 = (delta * cos * K) / D  =>  D = delta * cos * K
-        
-        return geometric_error * self.PITCH_SCALAR * self.K_PERSPECTIVE
+        instrumentation.count('switch_distance_queries')
+        return self.core.calculate_switch_distance(geometric_error)
 
     def get_lod_table(self):
-        # Geometric errors for each LOD (Standard Quadtree progression)
-        # LOD 0: 0.1m error
-        # LOD 1: 0.2m error 
-        # LOD 2: 0.4m error
-        # LOD 3: 0.8m error
-        # LOD 4: 1.6m error
-        errors = [0.1, 0.2, 0.4, 0.8, 1.6]
-        
+        # Rows come from LODCore: switch distance per LOD error, morph start
+        # 20% before it (see LODCore / terrain.vert u_MorphBuffer).
         print("\n--- LOD TRANSITION TABLE (Generated) ---")
         print(f"{'LOD':<5} | {'Error(m)':<10} | {'Switch Dist(m)':<15} | {'Morph Start(m)':<15}")
         print("-" * 55)
         
         results = []
-        for i, err in enumerate(errors):
-            dist = self.calculate_switch_distance(err)
-            
-            # Geomorphing Logic: Start morphing when error > 0.5px
-            # If D_switch is where error=1.0px, then D_start is where error=0.5px?
-            # Actually, error grows as we get closer? No, error grows as distance increases?
-            # Wait. Projected Error = World / Dist. Error decreases with distance.
-            # NO. We switch LODs as we get FURTHER away to lower detail.
-            # Low LOD has high WorldError.
-            # At close range, High WorldError projects to Huge ScreenError.
-            # We push it far away until ProjectedError < 1.0.
-            # So dist is the MINIMUM distance this LOD is valid for?
-            # Or the MAXIMUM distance the PREVIOUS LOD is valid for?
-            
-            # Let's clarify:
-            # LOD 0 (Fine) has 0.1m error.
-            # At 100m, 0.1m projects to (0.1 * 4889 / 100) = 4.8 pixels. Too high.
-            # At 500m, 0.1m projects to (0.1 * 4889 / 500) = 0.9 pixels. OK.
-            # So 'dist' is the MINIMUM distance required to switch TO this level?
-            # No, standard LOD systems work by "Switch Distance" being the boundary.
-            # LOD 0 (0.1m) is valid up to 478m.
-            # LOD 1 (0.2m) is valid from 478m to 972m.
-            
-            # Morphing: We want to blend FROM LOD N TO LOD N+1.
-            # This happens BEFORE the switch distance of LOD N.
-            # If LOD 0 ends at 478m (Error=1.0px), we start morphing when Error=0.5px?
-            # No, if Error=0.5px, that's closer or further?
-            # 1.0 = C / D_end  => D_end = C
-            # 0.5 = C / D_start => D_start = 2 * C = 2 * D_end.
-            # Wait. If distance increases, projected error decreases.
-            # We want to morph as the error *grows* to 1.0? 
-            # No, we assume we are using LOD 0. It is perfect.
-            # As we get further, its error is small? No, projected error of a FIXED world error decreases with distance.
-            # But the 'World Error' we talk about is the Error of the *Approximation*.
-            # LOD 1 has 0.2m error. We can't use it until 972m.
-            # If we use it at 500m, it has (0.2 * 4889 / 500) = 2.0 pixels. Visible popping!
-            
-            # Standard Geomorph Logic:
-            # You are rendering LOD N. You approach the distance where you MUST switch to LOD N-1 (Higher Detail).
-            # OR you recede to the distance where you CAN switch to LOD N+1 (Lower Detail).
-            
-            # Let's assume standard "Moving Away" scenario.
-            # We are at 100m. We use LOD 0.
-            # We reach 478m. We switch to LOD 1.
-            # To avoid pop, we morph LOD 0 vertices *towards* LOD 1 positions just before 478m.
-            # We want the morph to complete exactly at 478m.
-            # Start position? Typically a fixed range, e.g. 10% buffering.
-            # Checklist says: Morph Start 0.5px, Morph End 1.0px.
-            # This refers to the SSE metric controlling the morph.
-            
-            morph_dist_end = dist
-            # If at dist, error = 1.0.
-            # We want to know where error = 0.5 (Projected).
-            # 0.5 = (Delta * K) / D_start  --> D_start = (Delta * K) / 0.5 = 2.0 * D_end.
-            # This implies we morph *after* the switch distance? 
-            # No, this means for a fixed geometric error, it is smaller (0.5) further away (2x dist).
-            # This implies we morph *into* a lower LOD as we recede?
-            # Correct. At 478m, LOD 0 error is 1.0px. At 956m, LOD 0 error is 0.5px.
-            # But we want to switch TO LOD 1.
-            
-            # Let's stick to the "Transition Buffer" approach from the report.
-            # "Start morphing 100m before the switch point."
-            morph_buffer = dist * 0.2 # 20% hysteresis/morph zone
-            
-            results.append({
-                "level": i,
-                "error": err,
-                "dist": dist,
-                "morph_start": dist - morph_buffer
-            })
-            print(f"{i:<5} | {err:<10} | {dist:<15.2f} | {dist - morph_buffer:<15.2f}")
+        with instrumentation.stage('lod.table'):
+            for i, err, dist, morph_start in self.core.lod_table():
+                results.append({
+                    "level": i,
+                    "error": err,
+                    "dist": dist,
+                    "morph_start": morph_start
+                })
+                print(f"{i:<5} | {err:<10} | {dist:<15.2f} | {morph_start:<15.2f}")
             
         return results
 
@@ -164,7 +204,27 @@ class LODConfig:
         else:
             print(">> FAILURE: System is UNSTABLE.")
 
+def benchmark_core(n_construct=100000, n_queries=1000000):
+    """
+    Micro-benchmark of the quiet core: LODCore constructions per second and
+    switch-distance / table queries per second.
+    """
+    print("\n--- LODCore MICRO-BENCHMARK ---")
+    core = LODCore()
+    t_new = timeit.timeit(LODCore, number=n_construct)
+    t_switch = timeit.timeit(lambda: core.calculate_switch_distance(0.4), number=n_queries)
+    t_table = timeit.timeit(core.lod_table, number=n_queries)
+    print(f"Construction:             {n_construct / t_new:>12,.0f} /s")
+    print(f"calculate_switch_distance: {n_queries / t_switch:>12,.0f} /s")
+    print(f"lod_table:                 {n_queries / t_table:>12,.0f} /s")
+    return {
+        "construct_per_s": n_construct / t_new,
+        "switch_distance_per_s": n_queries / t_switch,
+        "lod_table_per_s": n_queries / t_table,
+    }
+
 if __name__ == "__main__":
     config = LODConfig()
     config.get_lod_table()
     config.verify_stability_simulation()
+    benchmark_core()
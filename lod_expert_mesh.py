@@ -0,0 +1,258 @@
+import argparse
+import time
+
+import numpy as np
+
+from experiment_culling_sim import CullingSim, synthetic_terrain_height
+from lod_expert_implementation import LOD_GEOMETRIC_ERRORS
+
+# ==============================================================================
+# TILE MESH GENERATOR
+# Morph-target vertex buffers (shaders/terrain.vert a_PosHigh / a_PosLow) for
+# every LOD of a tile, plus a cache of stitched index buffers for all 16
+# coarser-neighbour edge masks per LOD, so picking a tile's index buffer at
+# runtime is a table lookup.
+#
+# Tile-local posts: column i along x, row j along z (map y, as CullingSim),
+# heights[j, i]. Triangles are wound counter-clockwise seen from +y (up),
+# every quad split along its (i, j) -> (i + 1, j + 1) diagonal so each LOD
+# contains the coarser LOD's diagonals and a_PosLow is exactly the coarser
+# surface.
+# ==============================================================================
+
+N_LEVELS = len(LOD_GEOMETRIC_ERRORS)
+
+# Edge mask bits: set when the neighbour across that edge is coarser (LOD + 1)
+EDGE_S = 1 # j = 0, neighbour (tx, ty - 1)
+EDGE_E = 2 # i = m, neighbour (tx + 1, ty)
+EDGE_N = 4 # j = m, neighbour (tx, ty + 1)
+EDGE_W = 8 # i = 0, neighbour (tx - 1, ty)
+N_MASKS = 16
+
+# Interleaved vertex layout matching terrain.vert locations 0 and 1
+VERTEX_DTYPE = np.dtype([('a_PosHigh', '<f4', 3), ('a_PosLow', '<f4', 3)])
+
+
+def _check_levels(quads_per_side, n_levels):
+    # Every LOD needs an even quad count so LOD + 1 (the morph target) exists
+    if quads_per_side % (1 << n_levels):
+        raise ValueError(f"quads_per_side={quads_per_side} must be a multiple of 2^{n_levels} for {n_levels} LODs")
+
+
+def morph_target_heights(h):
+    """
+    Heights of the next-coarser LOD surface at every post of h (m+1, m+1):
+    even posts keep their height, odd posts take the mean of the coarse edge
+    (row, column or diagonal) they lie on.
+    """
+    low = h.copy()
+    low[0::2, 1::2] = 0.5 * (h[0::2, 0:-1:2] + h[0::2, 2::2])
+    low[1::2, 0::2] = 0.5 * (h[0:-1:2, 0::2] + h[2::2, 0::2])
+    low[1::2, 1::2] = 0.5 * (h[0:-1:2, 0:-1:2] + h[2::2, 2::2])
+    return low
+
+
+def build_vertex_buffers(heights, tile_size, n_levels=N_LEVELS, origin=(0.0, 0.0)):
+    """
+    Morph-target vertex buffers for one tile at every LOD.
+    heights: (n+1, n+1) LOD 0 posts; LOD l uses every 2^l-th post.
+    Returns a list of VERTEX_DTYPE arrays, (m+1)^2 vertices each, row-major
+    (j, i), world positions (x, height, z).
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    n = heights.shape[0] - 1
+    _check_levels(n, n_levels)
+    buffers = []
+    for level in range(n_levels):
+        h = heights[::1 << level, ::1 << level]
+        m = h.shape[0] - 1
+        coord = np.linspace(0.0, tile_size, m + 1)
+        vb = np.empty((m + 1, m + 1), dtype=VERTEX_DTYPE)
+        high = vb['a_PosHigh']
+        low = vb['a_PosLow']
+        high[..., 0] = origin[0] + coord[None, :]
+        high[..., 1] = h
+        high[..., 2] = origin[1] + coord[:, None]
+        low[..., 0] = high[..., 0]
+        low[..., 1] = morph_target_heights(h)
+        low[..., 2] = high[..., 2]
+        buffers.append(vb.ravel())
+    return buffers
+
+
+def grid_triangles(m):
+    # (2 m^2, 3) vertex indices of an (m+1)^2 post grid, CCW from +y
+    idx = np.arange((m + 1) * (m + 1)).reshape(m + 1, m + 1)
+    a = idx[:-1, :-1].ravel()
+    b = idx[:-1, 1:].ravel()
+    c = idx[1:, 1:].ravel()
+    d = idx[1:, :-1].ravel()
+    return np.concatenate([np.stack([a, c, b], axis=1), np.stack([a, d, c], axis=1)])
+
+
+def stitch_remap(m, mask):
+    """
+    Vertex remap for an edge mask: odd posts on every masked edge collapse
+    onto the preceding even post, so that edge only uses the coarser
+    neighbour's vertices. Triangles that become degenerate are dropped.
+    """
+    remap = np.arange((m + 1) * (m + 1)).reshape(m + 1, m + 1)
+    odd = np.arange(1, m, 2)
+    if mask & EDGE_S:
+        remap[0, odd] = remap[0, odd - 1]
+    if mask & EDGE_N:
+        remap[m, odd] = remap[m, odd - 1]
+    if mask & EDGE_W:
+        remap[odd, 0] = remap[odd - 1, 0]
+    if mask & EDGE_E:
+        remap[odd, m] = remap[odd - 1, m]
+    return remap.ravel()
+
+
+def stitched_indices(m, mask, triangles=None):
+    # Flat index list of the (m+1)^2 grid stitched for mask
+    tri = grid_triangles(m) if triangles is None else triangles
+    if mask:
+        tri = stitch_remap(m, mask)[tri]
+        keep = (tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 0] != tri[:, 2])
+        tri = tri[keep]
+    return tri.ravel()
+
+
+class StitchedIndexCache:
+    """
+    All stitched index buffers for one tile resolution: n_levels LODs x 16
+    edge masks packed into one index array (uint16 when every LOD fits,
+    else uint32). ranges[level, mask] = (first_index, index_count) into it;
+    indices are relative to that LOD's vertex buffer. level_base_vertex[level]
+    is where that LOD's grid starts when the per-LOD buffers of
+    build_vertex_buffers are concatenated in level order (the baseVertex for
+    a draw of that level from one shared vertex buffer).
+    """
+
+    def __init__(self, quads_per_side, n_levels=N_LEVELS):
+        _check_levels(quads_per_side, n_levels)
+        self.quads_per_side = quads_per_side
+        self.n_levels = n_levels
+        self.index_dtype = np.dtype('<u2') if (quads_per_side + 1) ** 2 <= 65536 else np.dtype('<u4')
+
+        parts = []
+        self.ranges = np.empty((n_levels, N_MASKS, 2), dtype=np.int64)
+        first = 0
+        for level in range(n_levels):
+            m = quads_per_side >> level
+            tri = grid_triangles(m)
+            for mask in range(N_MASKS):
+                idx = stitched_indices(m, mask, tri)
+                self.ranges[level, mask] = first, idx.size
+                parts.append(idx)
+                first += idx.size
+        self.indices = np.concatenate(parts).astype(self.index_dtype)
+        grid_vertices = [((quads_per_side >> level) + 1) ** 2 for level in range(n_levels)]
+        self.level_base_vertex = np.concatenate([[0], np.cumsum(grid_vertices)[:-1]]).astype(np.int64)
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes
+
+    def lookup(self, level, mask):
+        # Index buffer view for one tile
+        first, count = self.ranges[level, mask]
+        return self.indices[first:first + count]
+
+    def lookup_many(self, levels, masks):
+        # (first_index, index_count) arrays for many tiles at once
+        r = self.ranges[levels, masks]
+        return r[..., 0], r[..., 1]
+
+
+def tile_masks(lods):
+    """
+    Edge masks for a 2D grid of tile LODs indexed [ix, iy] (CullingSim.tile_grid
+    order reshaped): a bit is set where the neighbour is coarser. Tiles
+    outside the grid count as matching. Returns (masks, gaps) where gaps
+    flags tiles with a neighbour 2+ levels coarser (a 1-level stitch leaves
+    a crack there; the skirt has to cover it).
+    """
+    lods = np.asarray(lods)
+    masks = np.zeros(lods.shape, dtype=np.int64)
+    gaps = np.zeros(lods.shape, dtype=bool)
+    for bit, axis, step in ((EDGE_S, 1, -1), (EDGE_E, 0, 1), (EDGE_N, 1, 1), (EDGE_W, 0, -1)):
+        neighbour = np.roll(lods, -step, axis=axis)
+        edge = [slice(None)] * lods.ndim
+        edge[axis] = -1 if step > 0 else 0
+        neighbour[tuple(edge)] = lods[tuple(edge)]
+        diff = neighbour - lods
+        masks |= np.where(diff >= 1, bit, 0)
+        gaps |= diff >= 2
+    return masks, gaps
+
+
+def benchmark_mesh(resolutions=(64, 128, 256, 512), tile_size=1024.0, n_levels=N_LEVELS, repeats=3):
+    """
+    Build time and memory of the vertex buffers (all LODs, one tile) and of
+    the stitched index cache per grid resolution, then the per-frame cost of
+    selecting index buffers for a CullingSim frame by lookup vs rebuilding.
+    """
+    print(f"\n--- TILE MESH BENCHMARK ({tile_size:.0f} m tiles, {n_levels} LODs, {N_MASKS} edge masks) ---")
+    print(f"{'Quads':<6} | {'VB Build(ms)':>12} | {'VB (KiB)':>9} | {'IB Cache Build(ms)':>18} | "
+          f"{'IB Cache (KiB)':>14} | {'Index':>5} | {'Tris LOD0 m0/m15':>17}")
+    print("-" * 100)
+    results = {}
+    for n in resolutions:
+        coord = np.linspace(0.0, tile_size, n + 1)
+        heights, _ = synthetic_terrain_height(coord[None, :], coord[:, None])
+
+        vb_s = ib_s = float('inf')
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            buffers = build_vertex_buffers(heights, tile_size, n_levels)
+            vb_s = min(vb_s, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            cache = StitchedIndexCache(n, n_levels)
+            ib_s = min(ib_s, time.perf_counter() - t0)
+        vb_bytes = sum(vb.nbytes for vb in buffers)
+        tris = f"{cache.ranges[0, 0, 1] // 3}/{cache.ranges[0, N_MASKS - 1, 1] // 3}"
+        print(f"{n:<6} | {vb_s * 1000.0:>12.2f} | {vb_bytes / 1024:>9.1f} | {ib_s * 1000.0:>18.2f} | "
+              f"{cache.nbytes / 1024:>14.1f} | {cache.index_dtype.itemsize * 8:>4}b | {tris:>17}")
+        results[n] = {"vb_build_s": vb_s, "vb_bytes": vb_bytes, "ib_build_s": ib_s, "ib_bytes": cache.nbytes}
+
+    # Runtime: one frame of CullingSim tiles -> (level, mask) -> index range
+    sim = CullingSim()
+    tx, ty = sim.tile_grid(tile_size)
+    nx = len(np.unique(tx))
+    lods, _ = sim.tile_lods(tx, ty, tile_size)
+    lods = np.minimum(lods, n_levels - 1).reshape(nx, -1)
+    n = resolutions[-1]
+    cache = StitchedIndexCache(n, n_levels)
+
+    t0 = time.perf_counter()
+    masks, gaps = tile_masks(lods)
+    first, count = cache.lookup_many(lods, masks)
+    lookup_ms = (time.perf_counter() - t0) * 1000.0
+
+    pairs = sorted(set(zip(lods.ravel().tolist(), masks.ravel().tolist())))
+    t0 = time.perf_counter()
+    for level, mask in pairs:
+        stitched_indices(n >> level, mask)
+    rebuild_ms = (time.perf_counter() - t0) * 1000.0 / len(pairs) * lods.size # Whole frame: one rebuild per tile
+
+    print(f"\nFrame ({lods.size} tiles, {n} quads): lookup {lookup_ms:.3f} ms | "
+          f"rebuild frame ~{rebuild_ms:.0f} ms | stitched tiles: {np.count_nonzero(masks)} | "
+          f"2+ level gaps: {np.count_nonzero(gaps)}")
+    results["frame"] = {"lookup_ms": lookup_ms, "rebuild_ms": rebuild_ms, "indices": int(count.sum())}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Morph-target vertex buffers and stitched index buffer cache.")
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[64, 128, 256, 512],
+                        help="LOD 0 quads per tile side")
+    parser.add_argument('--tile-size', type=float, default=1024.0)
+    parser.add_argument('--levels', type=int, default=N_LEVELS)
+    args = parser.parse_args(argv)
+    benchmark_mesh(tuple(args.resolutions), args.tile_size, args.levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 # --- EXPERT PHYSICALLY BASED CONFIGURATION ---
 CONSTANTS = {
     'R_earth': 6371000.0,       # Earth Radius in meters
@@ -12,6 +14,12 @@ CONSTANTS = {
     'SSE_Threshold': 1.0        # Allowable Screen Space Error (pixels) - The "Holy Grail" constant
 }
 
+BASE_GEOMETRIC_ERROR = 0.05     # meters (Tunable 'quality' knob, see calculate_lod_strategy)
+LOD_LEVELS = 5                  # LOD 0 to 4
+GSD_CHECK_POINTS = [500, 5000, 20000] # Near, Mid, Far ground distances (m)
+PIXELS_PER_EDGE = 4.0           # Target on-screen triangle edge length (px) for tessellation budgets
+MIN_POST_SPACING = 2.0          # m, LOD 0 heightmap posts (finest possible vertex spacing)
+
 def calculate_lod_strategy():
     print("--- TRIPLE-A FLIGHT SIM LOD OPTIMIZER ---")
     print(f"Target SSE: {CONSTANTS['SSE_Threshold']} pixel(s) error")
@@ -72,7 +80,7 @@ def calculate_lod_strategy():
     # Let's estimate Base Error for LOD 1 as approximate 0.1m (10cm) deviation.
     # LOD 0 -> LOD 1 transition happens when LOD 1's error becomes less than 1px.
     
-    base_geometric_error = 0.05 # meters (This is a tunable 'quality' knob)
+    base_geometric_error = BASE_GEOMETRIC_ERROR # meters (This is a tunable 'quality' knob)
     # If the terrain is very rough, this needs to be higher.
     
     print(f"\n[LOD TRANSITION TABLE (SSE Method)]")
@@ -86,7 +94,7 @@ def calculate_lod_strategy():
     # Using small angle approx for individual pixels
     k_res = 1.0 / rad_per_pixel
     
-    for level in range(5): # LOD 0 to 4
+    for level in range(LOD_LEVELS): # LOD 0 to 4
         # The error introduced by switching TO this level from the previous one
         # effectively, we stick to the PREVIOUS level until the NEXT level's error is acceptable.
         # Wait, standard logic: Stick to LOD 0 until LOD 1's error is < 1px.
@@ -111,7 +119,7 @@ def calculate_lod_strategy():
         # LOD 2: stride 4m -> Max geometric error approx 0.20m
         # ...
         
-        if level == 4: # Cap
+        if level == LOD_LEVELS - 1: # Cap
              print(f"LOD 4+: Remaining distance up to {CONSTANTS['Max_Vis']}m")
              break
              
@@ -149,7 +157,7 @@ def calculate_lod_strategy():
     # "Calculate GSD specifically for a perspective view"
     print(f"\n[PERSPECTIVE GSD ANALYSIS]")
     # We calculate GSD at Near, Mid, and Far points
-    check_points = [500, 5000, 20000] 
+    check_points = GSD_CHECK_POINTS
     
     for d in check_points:
         # Slant Range
@@ -194,8 +202,118 @@ def calculate_lod_strategy():
     print(f"      Standard Trilinear filtering will blur significantly.")
     print(f"      Enable ANISOTROPIC FILTERING (16x) immediately.")
     
+def gsd_profile(constants=CONSTANTS, pitch_deg=None):
+    """
+    Per-screen-row ground sampling for the whole frame (flat ground, row 0 = top).
+    Returns a dict of (ScreenRes_Y,) arrays: depression_deg, ground_dist, slant,
+    gsd_lat, gsd_long, aniso. Rows at or above the horizon, or whose ground
+    point lies beyond Max_Vis, are NaN.
+    """
+    res_y = int(constants['ScreenRes_Y'])
+    z = constants['Camera_Z']
+    pitch = constants['Pitch_deg'] if pitch_deg is None else pitch_deg
+    # Focal length in pixels: K = S_h / (2 * tan(fov/2))
+    k = res_y / (2.0 * math.tan(math.radians(constants['FOV_V_deg']) / 2.0))
+
+    # Depression angle of every row edge (res_y + 1 edges), positive = below horizon
+    edge_px = np.arange(res_y + 1, dtype=np.float64) - res_y / 2.0
+    edge_dep = np.radians(-pitch) + np.arctan(edge_px / k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge_ground = np.where(edge_dep > 0.0, z / np.tan(edge_dep), np.inf)
+
+    center_px = edge_px[:-1] + 0.5
+    dep = np.radians(-pitch) + np.arctan(center_px / k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ground = z / np.tan(dep)
+        slant = z / np.sin(dep)
+        # Lateral: one column subtends 1 / sqrt(K^2 + y^2) rad at this row
+        gsd_lat = slant / np.sqrt(k * k + center_px * center_px)
+        # Longitudinal: ground distance between the row's top and bottom edges
+        gsd_long = edge_ground[:-1] - edge_ground[1:]
+        aniso = gsd_long / gsd_lat
+
+    off_ground = (dep <= 0.0) | (ground > constants['Max_Vis'])
+    profile = {
+        "depression_deg": np.degrees(dep),
+        "ground_dist": ground,
+        "slant": slant,
+        "gsd_lat": gsd_lat,
+        "gsd_long": gsd_long,
+        "aniso": aniso,
+    }
+    for key in ("ground_dist", "slant", "gsd_lat", "gsd_long", "aniso"):
+        profile[key] = np.where(off_ground, np.nan, profile[key])
+    return profile
+
+def tessellation_budget(profile, tile_size=None, pixels_per_edge=PIXELS_PER_EDGE, min_spacing=MIN_POST_SPACING):
+    """
+    Per-tile vertex counts along / across the view direction for world-aligned
+    tiles (tile_size, default CONSTANTS['Tile_Size']) covering the on-screen
+    ground range. Each tile gets the vertex spacing its finest on-screen row
+    needs (pixels_per_edge px per triangle edge), never below min_spacing.
+    The isotropic baseline uses the finer of the two spacings in both directions.
+    """
+    tile_size = CONSTANTS['Tile_Size'] if tile_size is None else tile_size
+    on_ground = ~np.isnan(profile["ground_dist"])
+    ground = profile["ground_dist"][on_ground]
+    order = np.argsort(ground, kind='stable')
+    ground = ground[order]
+    spacing_long = np.maximum(profile["gsd_long"][on_ground][order] * pixels_per_edge, min_spacing)
+    spacing_lat = np.maximum(profile["gsd_lat"][on_ground][order] * pixels_per_edge, min_spacing)
+
+    # Rows grouped by the tile ring (along the view) their ground point falls in
+    ring = np.floor(ground / tile_size).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, ring[1:] != ring[:-1]])
+    long_min = np.minimum.reduceat(spacing_long, starts)
+    lat_min = np.minimum.reduceat(spacing_lat, starts)
+
+    along = np.ceil(tile_size / long_min).astype(np.int64) + 1
+    across = np.ceil(tile_size / lat_min).astype(np.int64) + 1
+    iso = np.ceil(tile_size / np.minimum(long_min, lat_min)).astype(np.int64) + 1
+    tris = 2 * (along - 1) * (across - 1)
+    tris_iso = 2 * (iso - 1) * (iso - 1)
+    return {
+        "tile_start": ring[starts] * float(tile_size),
+        "rows": np.diff(np.r_[starts, ground.size]),
+        "verts_along": along,
+        "verts_across": across,
+        "verts_iso": iso,
+        "triangles": tris,
+        "triangles_iso": tris_iso,
+        "savings": 1.0 - tris.sum() / tris_iso.sum() if tris_iso.sum() else 0.0,
+    }
+
+def full_frame_gsd_analysis(pitches=(None, -2.0), sample_rows=8):
+    # Whole-frame companion to the [PERSPECTIVE GSD ANALYSIS] check points
+    for pitch in pitches:
+        pitch = CONSTANTS['Pitch_deg'] if pitch is None else pitch
+        profile = gsd_profile(pitch_deg=pitch)
+        on_ground = ~np.isnan(profile["ground_dist"])
+        print(f"\n[FULL-FRAME GSD PROFILE] Pitch {pitch} deg, {CONSTANTS['ScreenRes_Y']} rows")
+        if not on_ground.any():
+            print("  No ground rows within Max_Vis")
+            continue
+        print(f"  Ground rows: {int(on_ground.sum())} | "
+              f"Ground range: {np.nanmin(profile['ground_dist']):.0f} - {np.nanmax(profile['ground_dist']):.0f} m | "
+              f"Max anisotropy: {np.nanmax(profile['aniso']):.1f}x")
+        print(f"  {'Row':>5} | {'Ground(m)':>10} | {'Lat GSD':>9} | {'Long GSD':>9} | {'Aniso':>7}")
+        rows = np.flatnonzero(on_ground)
+        for r in rows[np.linspace(0, rows.size - 1, sample_rows).astype(int)]:
+            print(f"  {r:>5} | {profile['ground_dist'][r]:>10.1f} | {profile['gsd_lat'][r]:>9.3f} | "
+                  f"{profile['gsd_long'][r]:>9.3f} | {profile['aniso'][r]:>6.1f}x")
+
+        budget = tessellation_budget(profile)
+        print(f"  Tessellation ({CONSTANTS['Tile_Size']:.0f}m tiles, {PIXELS_PER_EDGE:.0f} px/edge):")
+        print(f"  {'Tile(m)':>8} | {'Rows':>5} | {'Along':>6} | {'Across':>6} | {'Iso':>6} | {'Tris':>9} | {'Tris Iso':>9}")
+        for i in range(budget["tile_start"].size):
+            print(f"  {budget['tile_start'][i]:>8.0f} | {budget['rows'][i]:>5} | {budget['verts_along'][i]:>6} | "
+                  f"{budget['verts_across'][i]:>6} | {budget['verts_iso'][i]:>6} | "
+                  f"{budget['triangles'][i]:>9,} | {budget['triangles_iso'][i]:>9,}")
+        print(f"  Triangle savings vs isotropic grids: {budget['savings'] * 100.0:.1f}%")
+
 def convertToIntegerList(floats):
     return [int(x) for x in floats]
 
 if __name__ == "__main__":
     calculate_lod_strategy()
+    full_frame_gsd_analysis()
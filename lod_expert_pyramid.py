@@ -0,0 +1,277 @@
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from lod_expert_dem_errors import write_synthetic_dem
+from lod_expert_implementation import LOD_GEOMETRIC_ERRORS
+
+# ==============================================================================
+# QUANTIZED HEIGHTMAP TILE PYRAMID
+# One file holds every LOD level of a DEM as int16 tiles (per-tile offset and
+# scale), page aligned, so any (level, tx, ty) resolves to a byte offset by
+# arithmetic and is read zero-copy through mmap as a NumPy view.
+# Defaults: 1024 m tiles (512 cells of 2 m posts), 5 levels -> 513..33 posts,
+# matching LOD_GEOMETRIC_ERRORS / CullingSim.lod_grid_sizes.
+# ==============================================================================
+
+# File layout (little endian):
+#   Header (HEADER_SIZE bytes, zero padded)
+#     magic 'LODP' | version u16 | n_levels u16
+#     tiles_x u32 | tiles_y u32 | tile_samples u32 | page_size u32
+#     post_spacing, origin_x, origin_y             f64
+#     per level: data_offset u64 | tile_stride u64 | side u32 | pad u32
+#   Quantization: float32[n_levels, tiles_y, tiles_x, 2] (offset, scale)
+#   Level data, page aligned: per level, tiles row-major (ty, tx), each tile
+#     int16[side, side] padded to tile_stride (a multiple of page_size)
+#   height = offset + q * scale
+MAGIC = b'LODP'
+VERSION = 1
+HEADER_SIZE = 4096
+PAGE_SIZE = 4096
+_HEADER = struct.Struct('<4sHHIIII3d')
+_LEVEL = struct.Struct('<QQII')
+
+N_LEVELS = len(LOD_GEOMETRIC_ERRORS)
+Q_RANGE = 65535.0 # int16 steps between tile min and max
+
+
+def _align(n, page=PAGE_SIZE):
+    return (n + page - 1) // page * page
+
+
+def quantize(heights):
+    """
+    int16 quantization of one tile: returns (q, offset, scale) with
+    heights ~= offset + q * scale and error <= scale / 2.
+    """
+    lo = float(heights.min())
+    hi = float(heights.max())
+    scale = (hi - lo) / Q_RANGE if hi > lo else 1.0
+    offset = lo + 32768.0 * scale
+    q = np.rint((heights - offset) / scale)
+    return np.clip(q, -32768, 32767).astype('<i2'), offset, scale
+
+
+def build_pyramid(dem_path, dem_shape, out_path, dem_dtype='<f4', tile_samples=512, n_levels=N_LEVELS,
+                  post_spacing=2.0, origin=(0.0, 0.0)):
+    """
+    Converts a raw row-major float DEM into a pyramid file. Tiles share edge
+    posts, so (n * tile_samples + 1) posts per side hold n tiles; trailing
+    partial tiles are ignored. The DEM is memory-mapped and read one tile row
+    at a time. Level l keeps every 2^l-th post of the full-resolution tile.
+    Returns the file size in bytes.
+    """
+    if tile_samples % 2**(n_levels - 1):
+        raise ValueError(f"tile_samples={tile_samples} must be a multiple of the coarsest stride {2**(n_levels - 1)}")
+    rows, cols = dem_shape
+    tiles_y = (rows - 1) // tile_samples
+    tiles_x = (cols - 1) // tile_samples
+    if tiles_y < 1 or tiles_x < 1:
+        raise ValueError(f"DEM {dem_shape} is smaller than one tile of {tile_samples} samples")
+
+    # Layout
+    sides = [tile_samples // 2**level + 1 for level in range(n_levels)]
+    strides = [_align(side * side * 2) for side in sides]
+    quant_offset = HEADER_SIZE
+    quant_shape = (n_levels, tiles_y, tiles_x, 2)
+    offset = _align(quant_offset + int(np.prod(quant_shape)) * 4)
+    level_offsets = []
+    for stride in strides:
+        level_offsets.append(offset)
+        offset += stride * tiles_x * tiles_y
+    total = offset
+
+    header = _HEADER.pack(MAGIC, VERSION, n_levels, tiles_x, tiles_y, tile_samples, PAGE_SIZE,
+                          post_spacing, origin[0], origin[1])
+    for level in range(n_levels):
+        header += _LEVEL.pack(level_offsets[level], strides[level], sides[level], 0)
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"Too many levels for a {HEADER_SIZE} byte header: {n_levels}")
+
+    with open(out_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.truncate(total)
+
+    dem = np.memmap(dem_path, dtype=dem_dtype, mode='r', shape=dem_shape)
+    out = np.memmap(out_path, dtype=np.uint8, mode='r+')
+    quant = np.ndarray(quant_shape, dtype='<f4', buffer=out, offset=quant_offset)
+    t = tile_samples
+    for ty in range(tiles_y):
+        block = np.asarray(dem[ty * t: ty * t + t + 1], dtype=np.float32)
+        for tx in range(tiles_x):
+            tile = block[:, tx * t: tx * t + t + 1]
+            for level in range(n_levels):
+                q, q_offset, q_scale = quantize(tile[::2**level, ::2**level])
+                start = level_offsets[level] + (ty * tiles_x + tx) * strides[level]
+                out[start: start + q.nbytes] = q.view(np.uint8).ravel()
+                quant[level, ty, tx] = (q_offset, q_scale)
+    out.flush()
+    del quant, out
+    return total
+
+
+class TilePyramid:
+    """
+    Read-only, memory-mapped tile pyramid. Opening parses only the header;
+    tile() returns a zero-copy int16 view whose pages fault in on first touch.
+    Thread safe for concurrent readers (e.g. as a TileLoader store).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER_SIZE or self._mm[:4] != MAGIC:
+            raise ValueError(f"Not a tile pyramid: {path}")
+        (_, version, self.n_levels, self.tiles_x, self.tiles_y, self.tile_samples, self.page_size,
+         self.post_spacing, origin_x, origin_y) = _HEADER.unpack_from(self._mm)
+        if version != VERSION:
+            raise ValueError(f"Unsupported tile pyramid version {version} (expected {VERSION})")
+        self.origin = (origin_x, origin_y)
+        self.tile_size = self.tile_samples * self.post_spacing # m
+
+        levels = [_LEVEL.unpack_from(self._mm, _HEADER.size + level * _LEVEL.size) for level in range(self.n_levels)]
+        self.level_offsets = [lv[0] for lv in levels]
+        self.tile_strides = [lv[1] for lv in levels]
+        self.sides = [lv[2] for lv in levels]
+        self.quant = np.frombuffer(self._mm, dtype='<f4', count=self.n_levels * self.tiles_y * self.tiles_x * 2,
+                                   offset=HEADER_SIZE).reshape(self.n_levels, self.tiles_y, self.tiles_x, 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Views handed out keep the mapping alive until they are released
+        self.quant = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+    def tile_offset(self, level, tx, ty):
+        # Byte offset of tile (tx, ty) at level: pure arithmetic, no index lookup
+        if not (0 <= level < self.n_levels and 0 <= tx < self.tiles_x and 0 <= ty < self.tiles_y):
+            raise IndexError(f"Tile (level={level}, tx={tx}, ty={ty}) outside the pyramid")
+        return self.level_offsets[level] + (ty * self.tiles_x + tx) * self.tile_strides[level]
+
+    def tile(self, level, tx, ty):
+        # Zero-copy int16 (side, side) view, rows along y
+        side = self.sides[level]
+        return np.frombuffer(self._mm, dtype='<i2', count=side * side,
+                             offset=self.tile_offset(level, tx, ty)).reshape(side, side)
+
+    def heights(self, level, tx, ty, out=None):
+        # Dequantized float32 heights (m)
+        q_offset, q_scale = self.quant[level, ty, tx]
+        out = np.multiply(self.tile(level, tx, ty), q_scale, out=out, dtype=np.float32)
+        out += q_offset
+        return out
+
+    def read(self, key):
+        # TileLoader store interface: key = (level, tx, ty) -> float32 heights
+        level, tx, ty = key
+        return self.heights(level, tx, ty)
+
+
+def benchmark_pyramid(size=4097, tile_samples=512, reads=2000, seed=0):
+    """
+    Builds a pyramid from a synthetic DEM and compares it with float32 .npy
+    tiles: file size, quantization error per level and random tile access cost.
+    """
+    print(f"\n--- TILE PYRAMID BENCHMARK ({size}^2 DEM, {tile_samples}-sample tiles) ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        dem_path = os.path.join(tmp, 'dem.raw')
+        pyr_path = os.path.join(tmp, 'dem.lodp')
+        write_synthetic_dem(dem_path, size, seed=seed)
+
+        t0 = time.perf_counter()
+        nbytes = build_pyramid(dem_path, (size, size), pyr_path, tile_samples=tile_samples)
+        build_s = time.perf_counter() - t0
+
+        dem = np.memmap(dem_path, dtype='<f4', mode='r', shape=(size, size))
+        pyramid = TilePyramid(pyr_path)
+        n_tiles = pyramid.tiles_x * pyramid.tiles_y
+        float_bytes = sum(side * side * 4 for side in pyramid.sides) * n_tiles
+        print(f"Build: {build_s:.2f} s | Tiles: {pyramid.tiles_x}x{pyramid.tiles_y} x {pyramid.n_levels} levels")
+        print(f"Pyramid: {nbytes / 1e6:.1f} MB | float32 tiles: {float_bytes / 1e6:.1f} MB "
+              f"({nbytes / float_bytes * 100.0:.1f}%)")
+
+        # Quantization error vs the LOD geometric error each level is allowed
+        t = tile_samples
+        print(f"\n{'Level':<6} | {'Posts':<6} | {'Max Quant Err(m)':<17} | {'LOD Err(m)':<10} | {'Pages/Tile':<10}")
+        print("-" * 62)
+        for level in range(pyramid.n_levels):
+            worst = 0.0
+            for ty in range(pyramid.tiles_y):
+                for tx in range(pyramid.tiles_x):
+                    ref = np.asarray(dem[ty * t: ty * t + t + 1: 2**level, tx * t: tx * t + t + 1: 2**level])
+                    worst = max(worst, float(np.abs(pyramid.heights(level, tx, ty) - ref).max()))
+            pages = pyramid.tile_strides[level] // pyramid.page_size
+            print(f"{level:<6} | {pyramid.sides[level]:<6} | {worst:<17.5f} | {LOD_GEOMETRIC_ERRORS[level]:<10} | {pages:<10}")
+
+        # Random access: zero-copy view vs dequantize vs np.load of a float32 .npy
+        rng = np.random.default_rng(seed)
+        picks = list(zip(rng.integers(0, pyramid.n_levels, reads), rng.integers(0, pyramid.tiles_x, reads),
+                         rng.integers(0, pyramid.tiles_y, reads)))
+        npy_dir = os.path.join(tmp, 'npy')
+        os.makedirs(npy_dir)
+        for level, tx, ty in set(picks):
+            np.save(os.path.join(npy_dir, f'{level}_{tx}_{ty}.npy'), pyramid.heights(level, tx, ty))
+
+        t0 = time.perf_counter()
+        for level, tx, ty in picks:
+            pyramid.tile(level, tx, ty)
+        view_us = (time.perf_counter() - t0) / reads * 1e6
+        t0 = time.perf_counter()
+        for level, tx, ty in picks:
+            pyramid.heights(level, tx, ty)
+        deq_us = (time.perf_counter() - t0) / reads * 1e6
+        t0 = time.perf_counter()
+        for level, tx, ty in picks:
+            np.load(os.path.join(npy_dir, f'{level}_{tx}_{ty}.npy'))
+        npy_us = (time.perf_counter() - t0) / reads * 1e6
+        print(f"\nRandom Tile Access ({reads} reads): view {view_us:.1f} us | "
+              f"view + dequantize {deq_us:.1f} us | np.load float32 {npy_us:.1f} us")
+        pyramid.close()
+        del dem
+    return {
+        "pyramid_bytes": nbytes,
+        "float32_bytes": float_bytes,
+        "view_us": view_us,
+        "dequantize_us": deq_us,
+        "npy_load_us": npy_us,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantized int16 heightmap tile pyramid.")
+    parser.add_argument('dem', nargs='?', help="Raw row-major heightmap (default: synthetic benchmark)")
+    parser.add_argument('-o', '--output', help="Output pyramid path")
+    parser.add_argument('--shape', nargs=2, type=int, metavar=('ROWS', 'COLS'))
+    parser.add_argument('--dtype', default='<f4')
+    parser.add_argument('--tile-samples', type=int, default=512)
+    parser.add_argument('--levels', type=int, default=N_LEVELS)
+    parser.add_argument('--post-spacing', type=float, default=2.0, help="m between DEM posts")
+    args = parser.parse_args(argv)
+
+    if not args.dem:
+        benchmark_pyramid(tile_samples=args.tile_samples)
+        return
+    if not args.shape:
+        parser.error("--shape is required for a raw DEM")
+    out_path = args.output or os.path.splitext(args.dem)[0] + '.lodp'
+    nbytes = build_pyramid(args.dem, tuple(args.shape), out_path, args.dtype, args.tile_samples,
+                           args.levels, args.post_spacing)
+    print(f"Wrote {out_path}: {nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
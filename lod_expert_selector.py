@@ -0,0 +1,248 @@
+import time
+
+import numpy as np
+
+import instrumentation
+from lod_expert_implementation import MORPH_BUFFER, LODCore
+
+# ==============================================================================
+# PER-FRAME TILE LOD SELECTOR
+# Assigns an LOD + morph factor to every tile each frame, vectorized over tiles.
+# Hysteresis per "3.2 Hysteresis (The Industry Standard)" in
+# Reports/LOD Stability and Pitch Scaling.md:
+#   Refine   (switch to High LOD) if Error > T_high (1.2 px)
+#   Simplify (switch to Low LOD)  if Error < T_low  (0.8 px)
+# ==============================================================================
+
+# Hysteresis thresholds as multiples of the SSE threshold
+T_HIGH = 1.2
+T_LOW = 0.8
+
+
+class TileLODSelector:
+    """
+    Stateful LOD selector for a fixed set of N tiles.
+
+    Switch convention matches LODConfig.get_lod_table: row i holds the distance
+    D_i = errors[i] * K * PitchScalar / tau at which LOD i hands over to LOD i+1,
+    so LOD i is valid for D_(i-1) <= D < D_i and the last LOD has no upper bound.
+
+    Tile bounds are stored as separate contiguous columns, and hysteresis state
+    lives in compact typed arrays (int8 LOD, float32 morph) updated in place
+    every frame.
+    """
+
+    def __init__(self, bounds, z_range=None, config=None, errors=None,
+                 morph_buffer=MORPH_BUFFER, t_high=T_HIGH, t_low=T_LOW):
+        config = config or LODCore()
+        errors = config.ERRORS if errors is None else errors
+        self.morph_buffer = morph_buffer
+
+        # Projected error numerator per boundary: rho_i(D) = C_i / D
+        c = np.asarray(errors, dtype=np.float64) * config.K_PERSPECTIVE * config.PITCH_SCALAR
+        tau = config.SSE_THRESHOLD
+        self.switch_dist = c / tau
+
+        # Geomorph toward LOD i+1 must be complete before the refine rule can
+        # hand the tile back to LOD i, otherwise the refine is a visible pop.
+        # So the morph zone ends at the refine distance D_i / T_high
+        # (= D_i, the terrain.vert u_LodSwitchDist, when t_high = 1).
+        self.morph_end = self.switch_dist / t_high
+        self.morph_start = self.morph_end * (1.0 - morph_buffer)
+        self._morph_start32 = self.morph_start.astype(np.float32)
+        self._morph_scale32 = (1.0 / (self.morph_end - self.morph_start)).astype(np.float32)
+
+        # Boundaries between existing levels (the last row has no coarser level)
+        boundaries = c[:-1]
+        self._switch_d = boundaries / tau              # first frame, no history
+        self._coarsen_d = boundaries / (t_low * tau)   # rho < T_low  -> simplify
+        self._refine_d = boundaries / (t_high * tau)   # rho > T_high -> refine
+
+        self.set_tiles(bounds, z_range)
+
+    def set_tiles(self, bounds, z_range=None):
+        """
+        Replaces the tile set and resets all hysteresis state.
+        bounds: (N, 4) [x0, y0, x1, y1] on the ground plane.
+        z_range: optional (N, 2) [z_min, z_max] per tile, defaults to flat ground (z = 0).
+        """
+        # float32 columns: mm precision at 20km and half the memory traffic of float64
+        bounds = np.asarray(bounds, dtype=np.float32)
+        n = bounds.shape[0]
+        self.n_tiles = n
+        self.x0, self.y0, self.x1, self.y1 = (np.ascontiguousarray(col) for col in bounds.T)
+        if z_range is None:
+            self.z0 = self.z1 = None
+        else:
+            z_range = np.asarray(z_range, dtype=np.float32)
+            self.z0, self.z1 = (np.ascontiguousarray(col) for col in z_range.T)
+
+        # Hysteresis state (-1 = not yet assigned)
+        self.has_history = False
+        self.lod = np.full(n, -1, dtype=np.int8)
+        self.morph = np.zeros(n, dtype=np.float32)
+        self.changed = np.zeros(n, dtype=bool)
+
+        # Per-frame tile distances (scaled by 1 / error_scale), kept for callers
+        self.dist = np.empty(n, dtype=np.float32)
+
+        # Scratch buffers reused across frames
+        self._tmp = np.empty(n, dtype=np.float32)
+        self._mask = np.empty(n, dtype=bool)
+        self._lo = np.empty(n, dtype=np.int8)
+        self._hi = np.empty(n, dtype=np.int8)
+        self._new = np.empty(n, dtype=np.int8)
+
+    def remap_tiles(self, bounds, src_index, z_range=None):
+        """
+        Replaces the tile set but carries state over for tiles that persist.
+        src_index[i] is the old slot of new tile i, or -1 for a newly exposed tile,
+        which gets a fresh (history-free) assignment on the next update.
+        """
+        src_index = np.asarray(src_index)
+        keep = src_index >= 0
+        lod = np.full(src_index.shape, -1, dtype=np.int8)
+        morph = np.zeros(src_index.shape, dtype=np.float32)
+        lod[keep] = self.lod[src_index[keep]]
+        morph[keep] = self.morph[src_index[keep]]
+        has_history = self.has_history
+
+        self.set_tiles(bounds, z_range)
+        self.lod[:] = lod
+        self.morph[:] = morph
+        self.has_history = has_history
+
+    def reset(self):
+        self.has_history = False
+        self.lod.fill(-1)
+        self.morph.fill(0.0)
+        self.changed.fill(False)
+
+    def _axis_gap(self, lo, hi, c, out):
+        # Squared distance from c to [lo, hi] along one axis, per tile
+        np.subtract(lo, c, out=out)
+        np.maximum(out, c - hi, out=out)
+        np.maximum(out, 0.0, out=out)
+        return np.square(out, out=out)
+
+    def tile_distances(self, cam_pos):
+        # Distance from the camera (x, y, z = altitude) to the nearest point of each tile box
+        cx, cy, cz = (np.float32(c) for c in cam_pos)
+        d = self._axis_gap(self.x0, self.x1, cx, self.dist)
+        d += self._axis_gap(self.y0, self.y1, cy, self._tmp)
+        if self.z0 is None:
+            d += cz * cz
+        else:
+            d += self._axis_gap(self.z0, self.z1, cz, self._tmp)
+        return np.sqrt(d, out=d)
+
+    def _count_above(self, dist, thresholds, out, inclusive):
+        # out[i] = number of thresholds below dist[i] (a few boundaries -> cheaper than searchsorted)
+        out.fill(0)
+        compare = np.greater_equal if inclusive else np.greater
+        mask = self._mask if dist.shape == self._mask.shape else np.empty(dist.shape, dtype=bool)
+        for t in thresholds:
+            compare(dist, np.float32(t), out=mask)
+            out += mask
+        return out
+
+    def update(self, cam_pos, error_scale=1.0):
+        """
+        Selects LOD + morph factor for all tiles for one frame.
+        error_scale multiplies every projected error (e.g. raw vs locked pitch
+        scalar); 1.0 keeps the configured PITCH_SCALAR.
+        Returns (lod, morph, changed) state arrays; changed marks tiles whose
+        LOD differs from the previous frame.
+        """
+        with instrumentation.stage('lod.select'):
+            dist = self.tile_distances(cam_pos)
+            if error_scale != 1.0:
+                dist *= np.float32(1.0 / error_scale) # rho * s = C / (D / s)
+            prev = self.lod
+            new = self._new
+
+            if not self.has_history: # First frame after set_tiles / reset
+                self._count_above(dist, self._switch_d, new, inclusive=True)
+                self.changed.fill(False)
+                self.has_history = True
+            else:
+                # Hysteresis band: finest LOD the simplify rule allows,
+                # coarsest LOD the refine rule allows.
+                finest = self._count_above(dist, self._coarsen_d, self._lo, inclusive=False)
+                coarsest = self._count_above(dist, self._refine_d, self._hi, inclusive=True)
+                np.clip(prev, finest, coarsest, out=new)
+                np.not_equal(new, prev, out=self.changed)
+
+                # Tiles exposed by remap_tiles have no history yet
+                fresh = prev < 0
+                if fresh.any():
+                    new[fresh] = self._count_above(dist[fresh], self._switch_d,
+                                                   np.empty(int(fresh.sum()), dtype=np.int8), inclusive=True)
+                    self.changed[fresh] = False
+            prev[:] = new
+            if instrumentation.ACTIVE is not None:
+                instrumentation.ACTIVE.count('lod_changes', int(np.count_nonzero(self.changed)))
+
+        with instrumentation.stage('lod.morph'):
+            # Geomorph toward the next LOD, same math as terrain.vert
+            mu = self._tmp
+            np.subtract(dist, self._morph_start32.take(new), out=mu)
+            mu *= self._morph_scale32.take(new)
+            np.clip(mu, 0.0, 1.0, out=mu)
+            # smoothstep(0, 1, mu) = mu * mu * (3 - 2 * mu)
+            morph = self.morph
+            np.multiply(mu, -2.0, out=morph)
+            morph += 3.0
+            morph *= mu
+            morph *= mu
+
+        return self.lod, self.morph, self.changed
+
+
+def make_tile_grid(tile_size, extent=20000.0):
+    # (N, 4) tile bounds covering [-extent, extent) x [0, extent)
+    xs = np.arange(-extent, extent, tile_size)
+    ys = np.arange(0.0, extent, tile_size)
+    gx, gy = np.meshgrid(xs, ys, indexing='ij')
+    x0, y0 = gx.ravel(), gy.ravel()
+    return np.stack([x0, y0, x0 + tile_size, y0 + tile_size], axis=-1)
+
+
+def benchmark_selector(n_tiles=50000, frames=200, speed=250.0, dt=1.0 / 60.0):
+    """
+    Flies a camera north over n_tiles random tiles and times update().
+    Prints tiles per second and the per-frame budget use.
+    """
+    print(f"\n--- TILE LOD SELECTOR BENCHMARK ({n_tiles} tiles, {frames} frames) ---")
+    rng = np.random.default_rng(0)
+    sizes = rng.choice([256.0, 512.0, 1024.0], n_tiles)
+    origin = rng.uniform(-20000.0, 20000.0, (n_tiles, 2))
+    bounds = np.concatenate([origin, origin + sizes[:, None]], axis=-1)
+
+    selector = TileLODSelector(bounds)
+    selector.update((0.0, 0.0, 100.0)) # Warm-up / initial assignment
+
+    changes = 0
+    frame_times = np.empty(frames)
+    for f in range(frames):
+        cam = (0.0, speed * dt * f, 100.0)
+        t0 = time.perf_counter()
+        _, _, changed = selector.update(cam)
+        frame_times[f] = time.perf_counter() - t0
+        changes += int(np.count_nonzero(changed))
+
+    mean_ms = frame_times.mean() * 1000.0
+    p99_ms = np.percentile(frame_times, 99) * 1000.0
+    print(f"Mean Frame: {mean_ms:.3f} ms | p99: {p99_ms:.3f} ms")
+    print(f"Throughput: {n_tiles / frame_times.mean() / 1e6:.2f} M tiles/s")
+    print(f"LOD Changes: {changes} over {frames} frames")
+    return {
+        "tiles_per_s": n_tiles / frame_times.mean(),
+        "mean_frame_ms": mean_ms,
+        "p99_frame_ms": p99_ms,
+        "lod_changes": changes,
+    }
+
+
+if __name__ == "__main__":
+    benchmark_selector()
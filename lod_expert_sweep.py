@@ -0,0 +1,217 @@
+import argparse
+import csv
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+
+import numpy as np
+
+from lod_expert_optimizer import BASE_GEOMETRIC_ERROR, CONSTANTS, GSD_CHECK_POINTS, LOD_LEVELS
+
+# ==============================================================================
+# BATCH PARAMETER SWEEP FOR THE LOD OPTIMIZER
+# Array-in / array-out version of calculate_lod_strategy (lod_expert_optimizer.py)
+# plus the center GSD of calculate_optimized_lod (script.py).
+# ==============================================================================
+
+# Scenario axes a sweep can vary. Everything else comes from CONSTANTS.
+SWEEP_AXES = ['Camera_Z', 'Pitch_deg', 'FOV_V_deg', 'ScreenRes_Y', 'SSE_Threshold']
+
+
+def sweep_columns():
+    # Output column order (inputs first, then derived values)
+    cols = list(SWEEP_AXES)
+    cols += ['horizon_dist_geo', 'drop_at_max_vis', 'max_vis_occluded', 'center_gsd']
+    cols += [f'switch_{level}_{level + 1}' for level in range(LOD_LEVELS - 1)]
+    for d in GSD_CHECK_POINTS:
+        cols += [f'gsd_lat_{d}', f'gsd_long_{d}', f'aniso_{d}']
+    return cols
+
+
+def sweep_lod_strategy(Camera_Z, Pitch_deg, FOV_V_deg, ScreenRes_Y, SSE_Threshold,
+                       constants=CONSTANTS, base_geometric_error=BASE_GEOMETRIC_ERROR):
+    """
+    Vectorized calculate_lod_strategy. Every input broadcasts against the others,
+    so scalars, 1D scenario columns or full meshgrids all work.
+    Returns a dict of column arrays keyed by sweep_columns().
+    """
+    z, pitch, fov_v, res_y, sse = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (Camera_Z, Pitch_deg, FOV_V_deg, ScreenRes_Y, SSE_Threshold)))
+    out = {'Camera_Z': z, 'Pitch_deg': pitch, 'FOV_V_deg': fov_v, 'ScreenRes_Y': res_y, 'SSE_Threshold': sse}
+
+    # 1. OPTICAL CALCULATIONS
+    rad_per_pixel = np.radians(fov_v) / res_y
+    k_res = 1.0 / rad_per_pixel
+
+    # 2. EARTH CURVATURE & HORIZON
+    r_e = constants['R_earth']
+    max_vis = constants['Max_Vis']
+    out['horizon_dist_geo'] = np.sqrt(2 * r_e * z + z**2)
+    out['drop_at_max_vis'] = np.broadcast_to((max_vis**2) / (2 * r_e), z.shape)
+    out['max_vis_occluded'] = ~(max_vis < out['horizon_dist_geo'])
+
+    # Center-of-view GSD from script.py: (Altitude / sin(pitch)) * rad_per_pixel
+    pitch_rad = np.radians(np.abs(pitch))
+    pitch_rad = np.where(pitch_rad == 0, 0.01, pitch_rad) # Prevent division by zero
+    out['center_gsd'] = (z / np.sin(pitch_rad)) * rad_per_pixel
+
+    # 3. SSE INVERSE SOLVER (Slant range -> ground distance, clamped to Max_Vis)
+    for level in range(LOD_LEVELS - 1):
+        error_val = base_geometric_error * (2**(level + 1))
+        req_slant_dist = (error_val / sse) * k_res
+        ground_sq = req_slant_dist**2 - z**2
+        ground_dist = np.sqrt(np.maximum(ground_sq, 0.0)) # Below aircraft -> 0
+        out[f'switch_{level}_{level + 1}'] = np.minimum(ground_dist, max_vis)
+
+    # 4. PERSPECTIVE GSD ANALYSIS
+    for d in GSD_CHECK_POINTS:
+        slant = np.sqrt(d**2 + z**2)
+        gsd_lat = slant * rad_per_pixel
+        alpha = np.arctan2(z, d)
+        gsd_long = gsd_lat / np.sin(alpha)
+        out[f'gsd_lat_{d}'] = gsd_lat
+        out[f'gsd_long_{d}'] = gsd_long
+        out[f'aniso_{d}'] = gsd_long / gsd_lat
+
+    return out
+
+
+def _axis_values(spec):
+    # Scenario axis: a list of values, a scalar, or {"start", "stop", "num"} (inclusive linspace)
+    if isinstance(spec, dict):
+        return np.linspace(spec['start'], spec['stop'], int(spec['num']))
+    return np.atleast_1d(np.asarray(spec, dtype=np.float64))
+
+
+def load_scenario(path):
+    """
+    Reads a JSON scenario file:
+      {
+        "mode": "grid" | "zip",          # grid = cartesian product (default), zip = explicit rows
+        "axes": {"Camera_Z": [100, 500], "Pitch_deg": {"start": -30, "stop": 0, "num": 31}, ...},
+        "constants": {"Max_Vis": 100000.0} # optional CONSTANTS overrides
+      }
+    Axes that are omitted are held at their CONSTANTS value.
+    """
+    with open(path) as f:
+        scenario = json.load(f)
+
+    unknown = set(scenario.get('axes', {})) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"Unknown sweep axes: {sorted(unknown)} (expected {SWEEP_AXES})")
+
+    mode = scenario.get('mode', 'grid')
+    if mode not in ('grid', 'zip'):
+        raise ValueError(f"Unknown scenario mode: {mode!r}")
+
+    constants = dict(CONSTANTS)
+    constants.update(scenario.get('constants', {}))
+    axes = {name: _axis_values(scenario.get('axes', {}).get(name, constants[name])) for name in SWEEP_AXES}
+    return axes, mode, constants
+
+
+def iter_scenario_chunks(axes, mode='grid', chunk_size=65536):
+    """
+    Yields dicts of 1D axis arrays, at most chunk_size scenarios each.
+    Grid mode unravels flat indices per chunk, so the full cartesian product
+    is never materialized.
+    """
+    if mode == 'zip':
+        cols = np.broadcast_arrays(*(axes[name] for name in SWEEP_AXES))
+        total = cols[0].size
+        for start in range(0, total, chunk_size):
+            yield {name: col[start:start + chunk_size] for name, col in zip(SWEEP_AXES, cols)}
+        return
+
+    shape = tuple(axes[name].size for name in SWEEP_AXES)
+    total = math.prod(shape)
+    for start in range(0, total, chunk_size):
+        idx = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+        yield {name: axes[name][i] for name, i in zip(SWEEP_AXES, idx)}
+
+
+def run_sweep(axes, mode='grid', constants=CONSTANTS, chunk_size=65536):
+    # Generator of result-column chunks (dicts of arrays)
+    for chunk in iter_scenario_chunks(axes, mode, chunk_size):
+        yield sweep_lod_strategy(**chunk, constants=constants)
+
+
+def write_csv(chunks, f):
+    # Streams result chunks to an open text file, one header row
+    cols = sweep_columns()
+    writer = csv.writer(f)
+    writer.writerow(cols)
+    rows = 0
+    for chunk in chunks:
+        data = [chunk[c] for c in cols]
+        writer.writerows(zip(*(col.tolist() for col in data)))
+        rows += data[0].size
+    return rows
+
+
+def write_columnar(chunks, path):
+    """
+    Column-per-array .npz (Parquet-style layout without an extra dependency).
+    Each chunk is appended to one raw spill file per column as it arrives;
+    the spill files are then copied into the (uncompressed) archive behind
+    their .npy headers, so memory stays at one chunk for any sweep size.
+    """
+    cols = sweep_columns()
+    dtypes = {c: np.dtype(np.float64) for c in cols}
+    rows = 0
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as spill:
+        files = {c: open(os.path.join(spill, f'{c}.bin'), 'wb') for c in cols}
+        try:
+            for i, chunk in enumerate(chunks):
+                for c in cols:
+                    data = np.ascontiguousarray(chunk[c])
+                    if i == 0:
+                        dtypes[c] = data.dtype
+                    files[c].write(data.astype(dtypes[c], copy=False).tobytes())
+                rows += np.size(chunk[cols[0]])
+        finally:
+            for f in files.values():
+                f.close()
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for c in cols:
+                src_path = os.path.join(spill, f'{c}.bin')
+                with zf.open(f'{c}.npy', 'w', force_zip64=True) as out, open(src_path, 'rb') as src:
+                    header = {'descr': np.lib.format.dtype_to_descr(dtypes[c]), 'fortran_order': False, 'shape': (rows,)}
+                    np.lib.format.write_array_header_2_0(out, header)
+                    shutil.copyfileobj(src, out)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch LOD strategy sweep over a scenario file.")
+    parser.add_argument('scenario', help="JSON scenario file (see load_scenario)")
+    parser.add_argument('-o', '--output', default='-', help="Output path ('-' = stdout CSV)")
+    parser.add_argument('--format', choices=['csv', 'npz'], default=None,
+                        help="Output format (default: from extension, else csv)")
+    parser.add_argument('--chunk-size', type=int, default=65536)
+    args = parser.parse_args(argv)
+
+    axes, mode, constants = load_scenario(args.scenario)
+    chunks = run_sweep(axes, mode, constants, args.chunk_size)
+
+    fmt = args.format or ('npz' if args.output.endswith('.npz') else 'csv')
+    if fmt == 'npz':
+        if args.output == '-':
+            parser.error("npz output needs a file path")
+        rows = write_columnar(chunks, args.output)
+    elif args.output == '-':
+        rows = write_csv(chunks, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as f:
+            rows = write_csv(chunks, f)
+
+    print(f"Wrote {rows} scenarios ({mode}) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
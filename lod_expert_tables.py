@@ -0,0 +1,163 @@
+import argparse
+import struct
+
+import numpy as np
+
+from lod_expert_implementation import LOD_GEOMETRIC_ERRORS, MORPH_BUFFER
+
+# ==============================================================================
+# PRECOMPILED SWITCH-DISTANCE LOOKUP TABLES
+# Bakes LODConfig.calculate_switch_distance (+ morph start) over a grid of
+# FOV and pitch-lock into a packed float32 file that is mmapped and queried
+# per frame without trig or object construction.
+# ==============================================================================
+
+# File layout (little endian):
+#   Header (HEADER_SIZE bytes, zero padded)
+#     magic 'LODT' | version u16 | n_levels u16 | n_channels u16 | reserved u16
+#     n_fov u32 | n_pitch u32
+#     fov_min, fov_max, pitch_min, pitch_max       f64
+#     screen_h, sse_threshold, morph_buffer        f64
+#     geometric_error[n_levels]                    f64
+#   Data: float32[n_fov, n_pitch, n_levels, n_channels] (C order)
+#
+# Altitude is not a table axis: D = delta * K * PitchScalar / tau does not depend
+# on it (same as LODConfig). Ground ranges for an altitude are exact at query
+# time via sqrt(D^2 - Z^2), so baking them would only add interpolation error.
+MAGIC = b'LODT'
+VERSION = 1
+HEADER_SIZE = 192
+_HEADER = struct.Struct('<4sHHHHII7d')
+
+# Per LOD channels (Euclidean camera distance, as in LODConfig / terrain.vert)
+CHANNELS = ('switch', 'morph_start')
+
+
+def build_table(path, fov_range=(5.0, 90.0, 171), pitch_range=(-45.0, 0.0, 46),
+                screen_h=1024.0, sse_threshold=1.0,
+                errors=LOD_GEOMETRIC_ERRORS, morph_buffer=MORPH_BUFFER):
+    """
+    Evaluates the switch/morph distances for every grid point in one NumPy pass
+    and writes header + packed float32 data. Ranges are (min, max, count), inclusive.
+    Returns the file size in bytes.
+    """
+    fovs = np.linspace(*fov_range[:2], int(fov_range[2]))
+    pitches = np.linspace(*pitch_range[:2], int(pitch_range[2]))
+    errors = np.asarray(errors, dtype=np.float64)
+
+    # K = S_h / (2 * tan(fov/2)),  PitchScalar = |cos(pitch_lock)|
+    k = screen_h / (2.0 * np.tan(np.radians(fovs) / 2.0))
+    pitch_scalar = np.abs(np.cos(np.radians(pitches)))
+
+    # D = (delta * K * PitchScalar) / tau  -> shape (n_fov, n_pitch, n_levels)
+    switch = errors[None, None, :] * pitch_scalar[None, :, None] * k[:, None, None] / sse_threshold
+    morph_start = switch - switch * morph_buffer
+
+    data = np.stack([switch, morph_start], axis=-1).astype(np.float32)
+
+    header = _HEADER.pack(MAGIC, VERSION, errors.size, len(CHANNELS), 0,
+                          fovs.size, pitches.size,
+                          fovs[0], fovs[-1], pitches[0], pitches[-1],
+                          screen_h, sse_threshold, morph_buffer)
+    header += struct.pack(f'<{errors.size}d', *errors)
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"Too many LOD levels for a {HEADER_SIZE} byte header: {errors.size}")
+
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(data.tobytes())
+    return data.nbytes + HEADER_SIZE
+
+
+class LODTable:
+    """
+    Read-only, memory-mapped switch-distance table.
+    All processes that open the same file share its pages (no copy).
+    lookup() is O(1): index arithmetic plus bilinear interpolation.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE or raw[:4] != MAGIC:
+            raise ValueError(f"Not a LOD table: {path}")
+        (_, version, n_levels, n_channels, _, n_fov, n_pitch,
+         fov_min, fov_max, pitch_min, pitch_max,
+         self.SCREEN_H, self.SSE_THRESHOLD, self.MORPH_BUFFER) = _HEADER.unpack_from(raw)
+        if version != VERSION:
+            raise ValueError(f"Unsupported LOD table version {version} (expected {VERSION})")
+
+        self.ERRORS = struct.unpack_from(f'<{n_levels}d', raw, _HEADER.size)
+        self.data = np.memmap(path, dtype=np.float32, mode='r', offset=HEADER_SIZE,
+                              shape=(n_fov, n_pitch, n_levels, n_channels))
+
+        # Per-axis (min, 1 / step, last index) for uniform-grid indexing
+        self._axes = [
+            (lo, (n - 1) / (hi - lo) if n > 1 else 0.0, n - 1)
+            for lo, hi, n in ((fov_min, fov_max, n_fov), (pitch_min, pitch_max, n_pitch))
+        ]
+
+    def _cell(self, value, axis):
+        # Clamped grid coordinate -> (lower index, upper index, fraction)
+        lo, inv_step, last = self._axes[axis]
+        u = np.clip((np.asarray(value, dtype=np.float64) - lo) * inv_step, 0.0, last)
+        i0 = np.minimum(u.astype(np.intp), max(last - 1, 0))
+        i1 = np.minimum(i0 + 1, last)
+        return i0, i1, u - i0
+
+    def lookup(self, fov_deg, pitch_lock_deg):
+        """
+        Bilinear lookup. Inputs broadcast; result has shape (..., n_levels, n_channels)
+        with channels in CHANNELS order.
+        """
+        f0, f1, ff = self._cell(fov_deg, 0)
+        p0, p1, fp = self._cell(pitch_lock_deg, 1)
+        ff = ff[..., None, None]
+        fp = fp[..., None, None]
+
+        d = self.data
+        c0 = d[f0, p0] * (1 - fp) + d[f0, p1] * fp
+        c1 = d[f1, p0] * (1 - fp) + d[f1, p1] * fp
+        return c0 * (1 - ff) + c1 * ff
+
+    def switch_distances(self, fov_deg, pitch_lock_deg, altitude=None):
+        """
+        (..., n_levels) switch distances. With an altitude, returns the
+        horizontal (ground) range instead: sqrt(D^2 - Z^2), 0 below the aircraft.
+        """
+        return self._ranges(0, fov_deg, pitch_lock_deg, altitude)
+
+    def morph_start_distances(self, fov_deg, pitch_lock_deg, altitude=None):
+        return self._ranges(1, fov_deg, pitch_lock_deg, altitude)
+
+    def _ranges(self, channel, fov_deg, pitch_lock_deg, altitude):
+        dist = self.lookup(fov_deg, pitch_lock_deg)[..., channel]
+        if altitude is None:
+            return dist
+        z = np.asarray(altitude, dtype=np.float64)[..., None]
+        return np.sqrt(np.maximum(dist * dist - z * z, 0.0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a precompiled LOD switch-distance table.")
+    parser.add_argument('path', help="Table file (.lodt)")
+    parser.add_argument('--fov', nargs=3, type=float, default=(5.0, 90.0, 171), metavar=('MIN', 'MAX', 'N'))
+    parser.add_argument('--pitch', nargs=3, type=float, default=(-45.0, 0.0, 46), metavar=('MIN', 'MAX', 'N'))
+    parser.add_argument('--screen-h', type=float, default=1024.0)
+    parser.add_argument('--sse', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    size = build_table(args.path, args.fov, args.pitch, args.screen_h, args.sse)
+    print(f"Wrote {args.path}: {size / 1024:.1f} KiB")
+
+    table = LODTable(args.path)
+    print(f"\n--- LOOKUP CHECK (FOV 12, Pitch Lock -15) ---")
+    print(f"{'LOD':<5} | {'Error(m)':<10} | {'Switch Dist(m)':<15} | {'Morph Start(m)':<15}")
+    print("-" * 55)
+    row = table.lookup(12.0, -15.0)
+    for i, err in enumerate(table.ERRORS):
+        print(f"{i:<5} | {err:<10} | {row[i, 0]:<15.2f} | {row[i, 1]:<15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+
+from lod_expert_implementation import MORPH_BUFFER, LODCore
+
+# ==============================================================================
+# CPU REFERENCE FOR shaders/terrain.vert
+# Vectorized float32 evaluation of the vertex stage (distance, SSE, morph
+# factor, smoothstep, mix) for millions of vertices, for offline seam / pop
+# validation. Uniform and attribute names follow the shader.
+# ==============================================================================
+
+# Vertices per chunk: keeps the scratch buffers cache/RAM friendly
+CHUNK_VERTS = 1 << 18
+
+
+def uniforms_from_config(config, level, errors=None, morph_buffer=MORPH_BUFFER, camera_pos=(0.0, 0.0, 0.0)):
+    """
+    Builds the terrain.vert uniforms for one LOD row of LODConfig.get_lod_table
+    (u_GeometricError = the error driving the LOD level -> level+1 switch).
+    errors defaults to config.ERRORS (LODCore or LODConfig).
+    """
+    errors = config.ERRORS if errors is None else errors
+    err = float(errors[level])
+    return {
+        'u_CameraPos': camera_pos,
+        'u_K_Perspective': config.K_PERSPECTIVE,
+        'u_PitchScalar': config.PITCH_SCALAR,
+        'u_GeometricError': err,
+        'u_LodSwitchDist': config.calculate_switch_distance(err),
+        'u_MorphBuffer': morph_buffer,
+    }
+
+
+def terrain_vert(a_PosHigh, a_PosLow, u_CameraPos, u_K_Perspective, u_PitchScalar,
+                 u_GeometricError, u_LodSwitchDist, u_MorphBuffer, u_ViewProj=None,
+                 chunk=CHUNK_VERTS):
+    """
+    Runs the terrain.vert main() for N vertices.
+    a_PosHigh, a_PosLow: (N, 3) world positions (cast to float32 like the GPU).
+    u_ViewProj: optional 4x4 matrix (column vectors, as GLSL) for gl_Position.
+    Returns dict with v_MorphFactor (N,), v_Distance (N,), v_WorldPos (N, 3),
+    sse_projected (N,) and, with u_ViewProj, gl_Position (N, 4).
+    """
+    f32 = np.float32
+    high = np.ascontiguousarray(a_PosHigh, dtype=f32)
+    low = np.ascontiguousarray(a_PosLow, dtype=f32)
+    if high.shape != low.shape or high.ndim != 2 or high.shape[1] != 3:
+        raise ValueError(f"a_PosHigh/a_PosLow must both be (N, 3), got {high.shape} and {low.shape}")
+    n = high.shape[0]
+    cam = np.asarray(u_CameraPos, dtype=f32)
+
+    # Per-draw constants
+    sse_num = f32(u_GeometricError) * f32(u_K_Perspective) * f32(u_PitchScalar)
+    morph_end = f32(u_LodSwitchDist)
+    morph_start = f32(u_LodSwitchDist) * (f32(1.0) - f32(u_MorphBuffer))
+    inv_range = f32(1.0) / (morph_end - morph_start)
+
+    out = {
+        'v_MorphFactor': np.empty(n, dtype=f32),
+        'v_Distance': np.empty(n, dtype=f32),
+        'v_WorldPos': np.empty((n, 3), dtype=f32),
+        'sse_projected': np.empty(n, dtype=f32),
+    }
+    if u_ViewProj is not None:
+        view_proj = np.asarray(u_ViewProj, dtype=f32)
+        out['gl_Position'] = np.empty((n, 4), dtype=f32)
+
+    # Per-component (strided 1D) ops: much faster in NumPy than (N, 3) broadcasts
+    size = min(chunk, n)
+    tmp = np.empty(size, dtype=f32)
+    one_minus_mu = np.empty(size, dtype=f32)
+    for s in range(0, n, chunk):
+        e = min(s + chunk, n)
+        h = high[s:e]
+        lo = low[s:e]
+        t = tmp[:e - s]
+        omu = one_minus_mu[:e - s]
+
+        # 1. dist = distance(u_CameraPos, a_PosHigh)
+        dist = out['v_Distance'][s:e]
+        np.subtract(h[:, 0], cam[0], out=dist)
+        dist *= dist
+        for k in (1, 2):
+            np.subtract(h[:, k], cam[k], out=t)
+            t *= t
+            dist += t
+        np.sqrt(dist, out=dist)
+
+        # 2. sse_projected = (delta * K * PitchScalar) / max(dist, 1.0)
+        sse = out['sse_projected'][s:e]
+        np.maximum(dist, f32(1.0), out=sse)
+        np.divide(sse_num, sse, out=sse)
+
+        # 3. mu_linear = clamp((dist - start) / (end - start), 0, 1); mu = smoothstep(0, 1, mu_linear)
+        mu = out['v_MorphFactor'][s:e]
+        np.subtract(dist, morph_start, out=mu)
+        mu *= inv_range
+        np.clip(mu, f32(0.0), f32(1.0), out=mu)
+        np.multiply(mu, f32(-2.0), out=t)
+        t += f32(3.0)
+        t *= mu
+        mu *= t
+
+        # 4. final_pos = mix(a_PosHigh, a_PosLow, mu) = high * (1 - mu) + low * mu
+        pos = out['v_WorldPos'][s:e]
+        np.subtract(f32(1.0), mu, out=omu)
+        for k in range(3):
+            np.multiply(h[:, k], omu, out=pos[:, k])
+            np.multiply(lo[:, k], mu, out=t)
+            pos[:, k] += t
+
+        if u_ViewProj is not None:
+            # gl_Position = u_ViewProj * vec4(final_pos, 1.0)
+            clip = out['gl_Position'][s:e]
+            np.matmul(pos, view_proj[:, :3].T, out=clip)
+            clip += view_proj[:, 3]
+
+    return out
+
+
+def benchmark_terrain_vert(n_verts=10_000_000, repeats=3):
+    """
+    Times terrain_vert over n_verts random vertices around the LOD 0 switch
+    distance and prints vertices per second (single process).
+    """
+    print(f"\n--- TERRAIN.VERT REFERENCE BENCHMARK ({n_verts / 1e6:.0f}M vertices) ---")
+    config = LODCore()
+    uniforms = uniforms_from_config(config, 0, camera_pos=(0.0, 100.0, 0.0))
+
+    rng = np.random.default_rng(0)
+    high = np.empty((n_verts, 3), dtype=np.float32)
+    high[:, 0] = rng.uniform(-600.0, 600.0, n_verts)
+    high[:, 1] = rng.uniform(0.0, 20.0, n_verts)
+    high[:, 2] = rng.uniform(0.0, 600.0, n_verts)
+    low = high.copy()
+    low[:, 1] += rng.normal(0.0, 0.1, n_verts).astype(np.float32)
+
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = terrain_vert(high, low, **uniforms)
+        best = min(best, time.perf_counter() - t0)
+
+    mu = result['v_MorphFactor']
+    print(f"Best of {repeats}: {best * 1000.0:.1f} ms -> {n_verts / best / 1e6:.1f} M vertices/s")
+    print(f"Morphing: {np.count_nonzero((mu > 0) & (mu < 1))} | Fully Low: {np.count_nonzero(mu == 1)}")
+    return n_verts / best
+
+
+if __name__ == "__main__":
+    benchmark_terrain_vert()
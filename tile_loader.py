@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from experiment_flight_replay import synthetic_trajectory
+from experiment_streaming import LOD0_SPACING, StreamingScheduler
+
+# ==============================================================================
+# ASYNC TILE LOADER
+# Fetches tiles from a local tile directory without stalling the frame loop:
+# an asyncio event loop on a background thread schedules reads on a thread
+# pool, deduplicates in-flight requests, cancels tiles that left the frustum
+# and hands finished tiles back through a non-blocking queue.
+# ==============================================================================
+
+# One finished (or failed) load. latency_s = request -> result queued.
+TileResult = collections.namedtuple('TileResult', 'key data latency_s error')
+
+
+class DirectoryTileStore:
+    """
+    Tiles as .npy files: <root>/L<level>/<ix>_<iy>.npy, keyed by (level, ix, iy).
+    read_delay_s adds a fixed per-read sleep to emulate slower storage.
+    """
+
+    def __init__(self, root, read_delay_s=0.0):
+        self.root = root
+        self.read_delay_s = read_delay_s
+
+    def path(self, key):
+        level, ix, iy = key
+        return os.path.join(self.root, f'L{level}', f'{ix}_{iy}.npy')
+
+    def write(self, key, heights):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path, heights)
+
+    def read(self, key):
+        if self.read_delay_s:
+            time.sleep(self.read_delay_s)
+        return np.load(self.path(key))
+
+
+class TileLoader:
+    """
+    Loader service for any store with a thread-safe read(key).
+    request() and retain() are called from the frame thread and never block
+    on I/O; poll() drains finished TileResults without waiting.
+    At most `workers` reads run at once; queued requests that get cancelled
+    never touch the disk. A read already running in the pool cannot be
+    interrupted: its request counts as cancelled and delivers nothing, but it
+    keeps its worker slot until the read returns.
+    """
+
+    def __init__(self, store, workers=8):
+        self.store = store
+        self.workers = workers
+        self.results = queue.SimpleQueue()
+
+        self._lock = threading.Lock()
+        self._pending = {}    # key -> request token, requested and not finished or cancelled (guarded by _lock)
+        self._tasks = {}      # key -> (token, asyncio.Task) (event loop thread only)
+        self._latencies = []
+        self._t_first = None
+        self._t_last = None
+        self.requested = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tile-io')
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name='tile-loader', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._pending)
+
+    def request(self, keys):
+        """
+        Queues loads for keys that are not already in flight.
+        Returns the number of newly queued keys. A key cancelled earlier is
+        queued again (new token) even while its old task is still unwinding.
+        """
+        t_request = time.perf_counter()
+        new = []
+        with self._lock:
+            for key in keys:
+                if key in self._pending:
+                    self.deduplicated += 1
+                else:
+                    token = object()
+                    self._pending[key] = token
+                    new.append((key, token))
+            self.requested += len(new)
+            if new and self._t_first is None:
+                self._t_first = t_request
+        if new:
+            self._loop.call_soon_threadsafe(self._start, new, t_request)
+        return len(new)
+
+    def cancel(self, keys):
+        # Cancels in-flight requests for keys (e.g. tiles that left the frustum)
+        with self._lock:
+            drop = [(key, self._pending.pop(key)) for key in keys if key in self._pending]
+        if drop:
+            self._loop.call_soon_threadsafe(self._cancel, drop)
+        return len(drop)
+
+    def retain(self, keys):
+        # Cancels every in-flight request whose key is not in keys
+        keep = keys if isinstance(keys, (set, frozenset, dict)) else set(keys)
+        with self._lock:
+            drop = [(key, token) for key, token in self._pending.items() if key not in keep]
+            for key, _ in drop:
+                del self._pending[key]
+        if drop:
+            self._loop.call_soon_threadsafe(self._cancel, drop)
+        return len(drop)
+
+    def poll(self, max_items=None):
+        # Finished TileResults so far, without blocking
+        out = []
+        while max_items is None or len(out) < max_items:
+            try:
+                out.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        return out
+
+    def _start(self, items, t_request):
+        for key, token in items:
+            task = self._loop.create_task(self._fetch(key, token, t_request))
+            task.add_done_callback(functools.partial(self._done, key, token))
+            self._tasks[key] = (token, task)
+
+    def _cancel(self, items):
+        # Only the task of the cancelled request; a re-request of the key has a new token
+        for key, token in items:
+            entry = self._tasks.get(key)
+            if entry is not None and entry[0] is token:
+                entry[1].cancel()
+
+    def _done(self, key, token, task):
+        # Every task ends here, also one cancelled before its first step (_fetch never ran)
+        self._finish(key, token)
+        if task.cancelled():
+            with self._lock:
+                self.cancelled += 1
+
+    def _finish(self, key, token):
+        entry = self._tasks.get(key)
+        if entry is not None and entry[0] is token:
+            del self._tasks[key]
+        with self._lock:
+            if self._pending.get(key) is token:
+                del self._pending[key]
+
+    async def _fetch(self, key, token, t_request):
+        try:
+            async with self._slots:
+                read = self._loop.run_in_executor(self._pool, self.store.read, key)
+                try:
+                    data = await asyncio.shield(read)
+                except asyncio.CancelledError:
+                    # The pool thread keeps reading: hold the slot until it is free
+                    await asyncio.wait([read])
+                    if not read.cancelled():
+                        read.exception() # Retrieved; a cancelled request reports nothing
+                    raise
+        except Exception as exc:
+            self._finish(key, token)
+            with self._lock:
+                self.failed += 1
+            self.results.put(TileResult(key, None, time.perf_counter() - t_request, exc))
+            return
+
+        self._finish(key, token)
+        t_done = time.perf_counter()
+        with self._lock:
+            self.completed += 1
+            self._latencies.append(t_done - t_request)
+            self._t_last = t_done
+        self.results.put(TileResult(key, data, t_done - t_request, None))
+
+    async def _cancel_all(self):
+        # Every task, including cancelled ones superseded in _tasks by a re-request
+        tasks = [task for task in asyncio.all_tasks(self._loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        """
+        Throughput (completed tiles / s between the first request and the last
+        completion) and fetch latency percentiles (ms).
+        """
+        with self._lock:
+            lat = np.asarray(self._latencies) * 1000.0
+            span = (self._t_last - self._t_first) if self._t_last is not None else 0.0
+            return {
+                "requested": self.requested,
+                "deduplicated": self.deduplicated,
+                "cancelled": self.cancelled,
+                "completed": self.completed,
+                "failed": self.failed,
+                "tiles_per_s": self.completed / span if span > 0.0 else 0.0,
+                "latency_p50_ms": float(np.percentile(lat, 50)) if lat.size else 0.0,
+                "latency_p99_ms": float(np.percentile(lat, 99)) if lat.size else 0.0,
+                "latency_max_ms": float(lat.max()) if lat.size else 0.0,
+            }
+
+    def close(self):
+        # Cancels outstanding requests and stops the loop and the pool
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._loop.close()
+
+
+def write_synthetic_tiles(store, keys, tile_size=512, seed=0):
+    # Writes one float32 height tile per key, sized like experiment_streaming.tile_bytes
+    rng = np.random.default_rng(seed)
+    for key in keys:
+        side = max(int(tile_size / (LOD0_SPACING * 2**key[0])), 1) + 1
+        store.write(key, rng.standard_normal((side, side), dtype=np.float32))
+
+
+def benchmark_loader(duration_s=10.0, speed=340.0, dt=1.0 / 30.0, tile_size=512, workers=8,
+                     read_delay_ms=2.0, lookahead_s=2.0):
+    """
+    Synthetic flight load, paced to wall-clock frames: each frame requests
+    the tiles visible now and lookahead_s ahead, retains only those
+    (cancelling the rest) and drains finished tiles. Prints throughput,
+    p99 fetch latency and late tiles, then the saturated throughput of a
+    cold burst over the whole tile directory.
+    """
+    print(f"\n--- TILE LOADER BENCHMARK ({duration_s:.0f}s at {speed:.0f} m/s, {workers} workers, "
+          f"{read_delay_ms:.1f} ms read delay) ---")
+    frames = list(synthetic_trajectory(duration_s=duration_s, dt=dt, speed=speed, turn_rate_deg_s=2.0))
+    planner = StreamingScheduler(None, None, tile_size=tile_size, lookahead_s=0.0)
+    needs = [planner.needed_tiles(f.x, f.y, f.z, f.heading_deg) for f in frames]
+    ahead = max(int(round(lookahead_s / dt)), 0)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = DirectoryTileStore(root, read_delay_ms / 1000.0)
+        all_keys = set().union(*needs)
+        write_synthetic_tiles(store, all_keys, tile_size)
+        print(f"Tile Directory: {len(all_keys)} tiles")
+
+        resident = set()
+        late = 0
+        needed = 0
+        frame_ms = []
+        with TileLoader(store, workers) as loader:
+            t_start = time.perf_counter()
+            for i, current in enumerate(needs):
+                t0 = time.perf_counter()
+                wanted = set(current).union(needs[min(i + ahead, len(needs) - 1)])
+                for result in loader.poll():
+                    if result.error is None:
+                        resident.add(result.key)
+                loader.retain(wanted)
+                loader.request([key for key in wanted if key not in resident])
+                missing = sum(1 for key in current if key not in resident)
+                late += missing
+                needed += len(current)
+                frame_ms.append((time.perf_counter() - t0) * 1000.0)
+                time.sleep(max(t_start + (i + 1) * dt - time.perf_counter(), 0.0))
+            stats = loader.stats()
+
+        # Saturation: every tile at once, fresh loader
+        with TileLoader(store, workers) as loader:
+            loader.request(all_keys)
+            while loader.in_flight():
+                time.sleep(0.001)
+            burst = loader.stats()
+
+    print(f"Requested: {stats['requested']} | Deduplicated: {stats['deduplicated']} | "
+          f"Cancelled: {stats['cancelled']} | Completed: {stats['completed']}")
+    print(f"Throughput: {stats['tiles_per_s']:.0f} tiles/s")
+    print(f"Fetch Latency: p50 {stats['latency_p50_ms']:.2f} ms | p99 {stats['latency_p99_ms']:.2f} ms")
+    print(f"Late Tile-Frames: {late}/{needed} ({late / max(needed, 1) * 100.0:.2f}%)")
+    print(f"Frame-Thread Cost: mean {np.mean(frame_ms):.3f} ms | max {np.max(frame_ms):.3f} ms")
+    print(f"Saturated Burst: {burst['tiles_per_s']:.0f} tiles/s | p99 {burst['latency_p99_ms']:.2f} ms "
+          f"({burst['completed']} tiles)")
+    stats.update(late_tile_frames=late, needed_tile_frames=needed, burst_tiles_per_s=burst['tiles_per_s'])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Async thread-pool tile loader under synthetic flight load.")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--speed', type=float, default=340.0)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--read-delay-ms', type=float, default=2.0)
+    parser.add_argument('--lookahead', type=float, default=2.0)
+    parser.add_argument('--tile-size', type=int, default=512)
+    args = parser.parse_args(argv)
+    benchmark_loader(args.duration, args.speed, tile_size=args.tile_size, workers=args.workers,
+                     read_delay_ms=args.read_delay_ms, lookahead_s=args.lookahead)
+
+
+if __name__ == "__main__":
+    main()